@@ -0,0 +1,278 @@
+"""
+Robust anomaly flags for weather readings.
+
+Bounds are computed per (Location, month) for every measurement column in
+one grouped pass, so a Phoenix July or a Chicago January is judged against
+its own climate rather than against the whole dataset. Two methods:
+
+- 'iqr': Tukey fences, q1 - k * IQR and q3 + k * IQR (default k = 1.5)
+- 'mad': median -/+ k * 1.4826 * MAD, a robust z-score (default k = 3.5)
+
+Readings are flagged, not removed. Groups with fewer than min_rows readings
+of a column, or where the column does not vary (no rain that month), get no
+bounds and are never flagged. StreamingAnomalyDetector gives the same bounds
+from chunks, using fixed-resolution histograms like streaming.ValueHistogram.
+"""
+import numpy as np
+import pandas as pd
+from data_fetcher import MEASUREMENT_COLUMNS
+
+GROUP_KEYS = ('Location', 'month')
+DEFAULT_K = {'iqr': 1.5, 'mad': 3.5}
+MIN_GROUP_ROWS = 8
+
+# Scales a MAD to the standard deviation of normally distributed data
+MAD_SCALE = 1.4826
+
+
+def _group_keys(data, by):
+    """Key Series for the groupby; month is derived from Date_Time when not precomputed."""
+    keys = []
+    for name in by:
+        if name == 'month' and name not in data:
+            keys.append(data['Date_Time'].dt.month.rename('month'))
+        else:
+            keys.append(data[name])
+    return keys
+
+
+def _check_method(method, k):
+    if method not in DEFAULT_K:
+        raise ValueError(f"Unknown anomaly method: {method}")
+    return DEFAULT_K[method] if k is None else k
+
+
+def _finish_bounds(lower, upper, spread, counts, min_rows):
+    """Blank bounds of groups that are too small or do not vary, and name the columns."""
+    unusable = (counts < min_rows) | ~(spread > 0)
+    lower, upper = lower.mask(unusable), upper.mask(unusable)
+    bounds = pd.concat([lower.add_suffix('_lower'), upper.add_suffix('_upper')], axis=1)
+    return bounds[[f'{column}_{side}' for column in lower.columns for side in ('lower', 'upper')]]
+
+
+def compute_bounds(data, columns=None, by=GROUP_KEYS, method='iqr', k=None, min_rows=MIN_GROUP_ROWS):
+    """
+    Lower and upper bounds per group for every column.
+
+    Returns a frame indexed by the group keys with <column>_lower and
+    <column>_upper columns (NaN where the group gets no bounds).
+    """
+    k = _check_method(method, k)
+    columns = [column for column in (columns or MEASUREMENT_COLUMNS) if column in data]
+    values = data[columns].astype('float64')
+    grouped = values.groupby(_group_keys(data, by), observed=True)
+    counts = grouped.count()
+    if method == 'iqr':
+        quartiles = grouped.quantile([0.25, 0.75])
+        q1, q3 = quartiles.xs(0.25, level=-1), quartiles.xs(0.75, level=-1)
+        spread = q3 - q1
+        return _finish_bounds(q1 - k * spread, q3 + k * spread, spread, counts, min_rows)
+
+    center = grouped.median()
+    # Group numbers follow the sorted group order of center, so rows can look their median up;
+    # rows with a missing key (no Location, or NaT) are numbered NaN and belong to no group
+    ids = grouped.ngroup()
+    keyed = ids.notna().to_numpy()
+    ids = ids.to_numpy()[keyed].astype('int64')
+    deviations = (values[keyed] - center.to_numpy()[ids]).abs()
+    spread = MAD_SCALE * deviations.groupby(ids).median().set_axis(center.index)
+    return _finish_bounds(center - k * spread, center + k * spread, spread, counts, min_rows)
+
+
+def _bounds_positions(bounds, keys):
+    """Position of each row's group in bounds (-1 when it has none), using integer codes rather than tuples."""
+    index = bounds.index if isinstance(bounds.index, pd.MultiIndex) else pd.MultiIndex.from_arrays([bounds.index])
+    sizes = [len(level) for level in index.levels]
+    if not len(index):
+        return np.full(len(keys[0]), -1)
+    table = np.full(int(np.prod(sizes)), -1, dtype='int64')
+    table[np.ravel_multi_index(index.codes, sizes)] = np.arange(len(index))
+    row_codes = []
+    for level, key in zip(index.levels, keys):
+        if isinstance(key.dtype, pd.CategoricalDtype):
+            # Look up each category once, then gather per row
+            lookup = np.r_[level.get_indexer(key.cat.categories), -1]
+            row_codes.append(lookup[key.cat.codes.to_numpy()])
+        else:
+            row_codes.append(level.get_indexer(key))
+    missing = np.any([codes < 0 for codes in row_codes], axis=0)
+    positions = table[np.ravel_multi_index([np.maximum(codes, 0) for codes in row_codes], sizes)]
+    positions[missing] = -1
+    return positions
+
+
+def flag_anomalies(data, bounds, by=GROUP_KEYS):
+    """
+    Boolean <column>_anomaly flags for data against bounds, plus is_anomaly for any column.
+
+    Rows of groups missing from bounds are not flagged.
+    """
+    columns = [name[:-len('_lower')] for name in bounds.columns if name.endswith('_lower') and
+               name[:-len('_lower')] in data]
+    positions = _bounds_positions(bounds, _group_keys(data, by))
+    flags = {}
+    for column in columns:
+        values = data[column].to_numpy(dtype='float64')
+        # Position -1 picks the trailing NaN; NaN bounds and readings compare False, so are never flagged
+        lower = np.r_[bounds[f'{column}_lower'].to_numpy(dtype='float64'), np.nan][positions]
+        upper = np.r_[bounds[f'{column}_upper'].to_numpy(dtype='float64'), np.nan][positions]
+        flags[f'{column}_anomaly'] = (values < lower) | (values > upper)
+    flags = pd.DataFrame(flags, index=data.index)
+    flags['is_anomaly'] = flags.any(axis=1)
+    return flags
+
+
+def detect_anomalies(data, columns=None, by=GROUP_KEYS, method='iqr', k=None, min_rows=MIN_GROUP_ROWS):
+    """Bounds from data and the flags of data against them, as (flags, bounds)."""
+    bounds = compute_bounds(data, columns, by, method, k, min_rows)
+    return flag_anomalies(data, bounds, by), bounds
+
+
+# Histogram entries pack (group id, bin) into one int64: the group in the high 32 bits
+_BIN_OFFSET = 1 << 31
+
+
+def _histogram_quantiles(groups, values, counts, q):
+    """
+    Linearly interpolated q-quantile per group of a histogram, like Series.quantile.
+
+    groups, values and counts are aligned arrays sorted by (groups, values).
+    Returns (group ids, quantiles).
+    """
+    cumulative = np.cumsum(counts)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    before = np.r_[0, cumulative[starts[1:] - 1]]
+    totals = np.r_[cumulative[starts[1:] - 1], cumulative[-1]] - before
+    position = q * (totals - 1)
+    lower = values[np.searchsorted(cumulative, before + np.floor(position), side='right')]
+    upper = values[np.searchsorted(cumulative, before + np.ceil(position), side='right')]
+    return groups[starts], lower + (upper - lower) * (position - np.floor(position))
+
+
+class StreamingAnomalyDetector:
+    """
+    compute_bounds over data read in chunks.
+
+    Every column keeps one histogram per group at `resolution`, so memory
+    depends on the number of groups and the value range, not on the rows;
+    bounds are exact while readings lie on that grid (two decimals for 0.01).
+    flag() judges a chunk against the bounds of everything seen so far.
+    """
+
+    def __init__(self, columns=None, by=GROUP_KEYS, method='iqr', k=None, min_rows=MIN_GROUP_ROWS,
+                 resolution=0.01):
+        self.k = _check_method(method, k)
+        self.method = method
+        self.columns = list(columns or MEASUREMENT_COLUMNS)
+        self.by = list(by)
+        self.min_rows = min_rows
+        self.resolution = resolution
+        # Group key tuple -> group id, in order of first appearance
+        self.groups = {}
+        # Column -> list of (packed keys, counts) pairs, compacted on demand
+        self._entries = {}
+        self._bounds = None
+
+    def _group_ids(self, chunk):
+        """Group id of every row, assigning ids to groups not seen before."""
+        codes = []
+        uniques = []
+        for key in _group_keys(chunk, self.by):
+            key_codes, key_uniques = pd.factorize(key)
+            codes.append(key_codes)
+            uniques.append(key_uniques)
+        # One integer per key combination (code 0 marks a missing key), then one id per distinct combination
+        sizes = [len(key_uniques) + 1 for key_uniques in uniques]
+        combo_of_row, combos = pd.factorize(np.ravel_multi_index([key_codes + 1 for key_codes in codes], sizes))
+        ids = []
+        for parts in zip(*np.unravel_index(combos, sizes)):
+            if min(parts) == 0:
+                ids.append(-1)
+            else:
+                group = tuple(key_uniques[part - 1] for key_uniques, part in zip(uniques, parts))
+                ids.append(self.groups.setdefault(group, len(self.groups)))
+        return np.asarray(ids, dtype='int64')[combo_of_row]
+
+    def _add(self, column, keys, counts):
+        entries = self._entries.setdefault(column, [])
+        entries.append((keys, counts))
+        if len(entries) > 16:
+            self._compact(column)
+
+    def _compact(self, column):
+        """Merge a column's histogram pieces into one sorted (keys, counts) pair."""
+        entries = self._entries.get(column)
+        if not entries:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+        if len(entries) > 1:
+            keys, inverse = np.unique(np.concatenate([keys for keys, _ in entries]), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate([counts for _, counts in entries]))
+            entries[:] = [(keys, counts.astype('int64'))]
+        return entries[0]
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk into the histograms."""
+        ids = self._group_ids(chunk)
+        for column in self.columns:
+            if column not in chunk:
+                continue
+            values = chunk[column].to_numpy(dtype='float64')
+            present = ~np.isnan(values) & (ids >= 0)
+            bins = np.rint(values[present] / self.resolution).astype('int64')
+            keys, counts = np.unique((ids[present] << 32) + bins + _BIN_OFFSET, return_counts=True)
+            self._add(column, keys, counts)
+        self._bounds = None
+        return self
+
+    def merge(self, other):
+        """Combine with a detector over other chunks (same settings)."""
+        # Translate the other detector's group ids into this one's
+        translate = np.array([self.groups.setdefault(group, len(self.groups)) for group in other.groups],
+                             dtype='int64')
+        for column in other._entries:
+            keys, counts = other._compact(column)
+            if len(keys):
+                groups = translate[keys >> 32]
+                self._add(column, (groups << 32) + (keys & 0xFFFFFFFF), counts)
+        self._bounds = None
+        return self
+
+    def _column_bounds(self, column):
+        """(group ids, lower, upper, spread, sizes) of one column."""
+        keys, counts = self._compact(column)
+        groups = keys >> 32
+        values = ((keys & 0xFFFFFFFF) - _BIN_OFFSET) * self.resolution
+        if self.method == 'iqr':
+            group_ids, q1 = _histogram_quantiles(groups, values, counts, 0.25)
+            _, q3 = _histogram_quantiles(groups, values, counts, 0.75)
+            spread = q3 - q1
+            lower, upper = q1 - self.k * spread, q3 + self.k * spread
+        else:
+            group_ids, center = _histogram_quantiles(groups, values, counts, 0.5)
+            deviation = np.abs(values - center[np.searchsorted(group_ids, groups)])
+            order = np.lexsort((deviation, groups))
+            _, mad = _histogram_quantiles(groups[order], deviation[order], counts[order], 0.5)
+            spread = MAD_SCALE * mad
+            lower, upper = center - self.k * spread, center + self.k * spread
+        sizes = np.bincount(np.searchsorted(group_ids, groups), weights=counts)
+        return group_ids, lower, upper, spread, sizes
+
+    def bounds(self):
+        """Bounds in the format of compute_bounds."""
+        if self._bounds is None:
+            names = list(self.groups)
+            parts = {'lower': {}, 'upper': {}, 'spread': {}, 'sizes': {}}
+            for column in self.columns:
+                if not len(self._compact(column)[0]):
+                    continue
+                group_ids, *values = self._column_bounds(column)
+                index = pd.MultiIndex.from_tuples([names[group] for group in group_ids], names=self.by)
+                for part, column_values in zip(parts.values(), values):
+                    part[column] = pd.Series(column_values, index=index)
+            frames = [pd.DataFrame(part) for part in parts.values()]
+            self._bounds = _finish_bounds(*frames, self.min_rows).sort_index()
+        return self._bounds
+
+    def flag(self, chunk):
+        """flag_anomalies for a chunk against the current bounds."""
+        return flag_anomalies(chunk, self.bounds(), self.by)
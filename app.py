@@ -1,46 +1,255 @@
-from flask import Flask, render_template, request
-from module import WeatherData, populate_database, db
-from weather_analysis import WeatherAnalysis
-
-app = Flask(__name__, template_folder="templates")
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///weather_app.db'
-db.init_app(app)
-
-@app.route('/')
-def show_results():
-    """Render results with paginated weather data."""
-    try:
-        # Pagination parameters
-        page = int(request.args.get('page', 1))  # Current page
-        per_page = 100  # Rows per page
-        offset = (page - 1) * per_page
-
-        # Retrieve a subset of weather data
-        weather_data = WeatherData.query.offset(offset).limit(per_page).all()
-        total_rows = WeatherData.query.count()
-        total_pages = (total_rows + per_page - 1) // per_page  # Calculate total pages
-
-        # Analyze predefined CSV file for stats and visualizations
-        file_path = "C:/Users/msong/OneDrive/Documents/cs3270/weather_analysis_project/weather_data.csv"
-        analysis = WeatherAnalysis(file_path)
-        analysis.fetch_data()
-        stats = analysis.calculate_statistics()
-
-        # Return results template with paginated data
-        return render_template(
-            'results.html',
-            stats=stats,
-            weather_data=weather_data,
-            current_page=page,
-            total_pages=total_pages,
-            message="Analysis completed successfully!",
-        )
-    except Exception as e:
-        return render_template('results.html', stats={}, weather_data=[], message=f"Error: {str(e)}")
-
-
-if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        populate_database("C:/Users/msong/OneDrive/Documents/cs3270/weather_analysis_project/weather_data.csv")
-    app.run(debug=True)
+import os
+import json
+import zlib
+import time
+from datetime import datetime
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, abort, g
+from module import populate_database, db, fetch_page, cached_row_count, iter_weather_rows, API_COLUMNS
+from database import configure_app, read_engine
+from cache import dataset_cache
+from model_registry import ModelRegistry, DEFAULT_MODEL_DIR
+from rendering import chart_renderer
+from rollups import downsample
+from instrumentation import RequestMetrics, render_prometheus
+
+# CSV behind the stats shown on every page; override with WEATHER_DATA_FILE
+DATA_FILE = os.environ.get(
+    'WEATHER_DATA_FILE',
+    "C:/Users/msong/OneDrive/Documents/cs3270/weather_analysis_project/weather_data.csv",
+)
+
+# Models are loaded lazily on the first prediction request that needs them
+model_registry = ModelRegistry(os.environ.get('WEATHER_MODEL_DIR', DEFAULT_MODEL_DIR))
+
+app = Flask(__name__, template_folder="templates")
+configure_app(app, db)
+
+# Latency per endpoint, exported with cache and stage metrics at /metrics
+request_metrics = RequestMetrics()
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        status = response.status_code
+        # Streamed bodies finish after this hook, so observe when the response closes
+        response.call_on_close(
+            lambda: request_metrics.observe(endpoint, status, time.perf_counter() - started))
+    return response
+
+def _parse_date(value):
+    """Parse an optional ISO date/datetime query parameter."""
+    return datetime.fromisoformat(value) if value else None
+
+@app.route('/')
+def show_results():
+    """Render results with paginated weather data."""
+    # Keyset pagination: cursors carry the (date_time, id) of the page edge, so a page
+    # number is only a label carried along with a cursor and cannot be jumped to
+    page = request.args.get('page', 1, type=int)
+    if page != 1 and not (request.args.get('after') or request.args.get('before')):
+        abort(400, description="Page numbers cannot be jumped to; follow the next/previous page links.")
+    try:
+        per_page = 100  # Rows per page
+        location = request.args.get('location') or None
+        start = _parse_date(request.args.get('start'))
+        end = _parse_date(request.args.get('end'))
+
+        # Retrieve a subset of weather data
+        weather_data, next_cursor, prev_cursor = fetch_page(
+            per_page=per_page,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            location=location,
+            start=start,
+            end=end,
+            engine=read_engine(db),
+        )
+        if location or start or end:
+            total_pages = None  # Counting a filtered range would need a scan
+        else:
+            total_rows = cached_row_count()
+            total_pages = (total_rows + per_page - 1) // per_page  # Calculate total pages
+
+        # Stats are parsed once per file version and shared across requests
+        stats = dataset_cache.get_statistics(DATA_FILE)
+
+        # Return results template with paginated data
+        return render_template(
+            'results.html',
+            stats=stats,
+            weather_data=weather_data,
+            current_page=page,
+            total_pages=total_pages,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            message="Analysis completed successfully!",
+        )
+    except Exception as e:
+        return render_template('results.html', stats={}, weather_data=[], message=f"Error: {str(e)}")
+
+
+@app.route('/predict/<city>', methods=['GET', 'POST'])
+def predict(city):
+    """
+    Predict temperatures with the saved model for a city.
+
+    POST a JSON body {"rows": [{feature: value, ...}, ...]}, or GET with one
+    row's features as query parameters.
+    """
+    try:
+        if request.method == 'POST':
+            rows = (request.get_json(silent=True) or {}).get('rows', [])
+        else:
+            rows = [request.args.to_dict()]
+        predictions = model_registry.predict(city, rows)
+        return jsonify(city=city, predictions=predictions)
+    except KeyError as e:
+        return jsonify(error=str(e.args[0])), 404
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+@app.route('/charts/<name>')
+def chart(name):
+    """Serve a rendered chart from static/ with its content hash as the ETag."""
+    if not name.endswith('.png'):
+        abort(404)
+    path = os.path.join(app.static_folder, name)
+    if not os.path.isfile(path):
+        abort(404)
+    # Fall back to Werkzeug's mtime/size ETag for images not rendered by this process
+    etag = chart_renderer.etag(path) or True
+    return send_from_directory(app.static_folder, name, etag=etag, conditional=True, max_age=0)
+
+
+def _encode_rows(batches, columns, as_array):
+    """Serialize row batches as NDJSON lines, or as one JSON array."""
+    first = True
+    if as_array:
+        yield "["
+    for batch in batches:
+        lines = []
+        for row in batch:
+            record = dict(zip(columns, row))
+            if 'date_time' in record:
+                record['date_time'] = record['date_time'].isoformat()
+            lines.append(json.dumps(record))
+        if not lines:
+            continue
+        if as_array:
+            yield ("" if first else ",") + ",".join(lines)
+        else:
+            yield "\n".join(lines) + "\n"
+        first = False
+    if as_array:
+        yield "]"
+
+
+def _gzip_stream(chunks):
+    """Gzip a text stream incrementally, flushing after every chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@app.route('/api/weather')
+def weather_api():
+    """
+    Stream weather rows as NDJSON (default) or a JSON array (format=json).
+
+    Query parameters: city, start, end (ISO dates), fields (comma-separated
+    column projection) and format. Responses are gzip-encoded when the client
+    accepts it.
+    """
+    try:
+        fields = request.args.get('fields')
+        columns = tuple(fields.split(',')) if fields else API_COLUMNS
+        unknown = [column for column in columns if column not in API_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}")
+        as_array = request.args.get('format', 'ndjson') == 'json'
+        batches = iter_weather_rows(
+            read_engine(db),
+            columns=columns,
+            location=request.args.get('city') or None,
+            start=_parse_date(request.args.get('start')),
+            end=_parse_date(request.args.get('end')),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    body = _encode_rows(batches, columns, as_array)
+    headers = {'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = _gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    mimetype = 'application/json' if as_array else 'application/x-ndjson'
+    return Response(body, mimetype=mimetype, headers=headers)
+
+
+@app.route('/api/rollups')
+def rollup_series():
+    """
+    JSON time series from the precomputed rollups.
+
+    Query parameters: grain (hourly/daily/monthly, default daily), location,
+    start, end and max_points (LTTB downsampling on mean temperature, default 1000).
+    """
+    try:
+        grain = request.args.get('grain', 'daily')
+        location = request.args.get('location') or None
+        max_points = int(request.args.get('max_points', 1000))
+        if max_points < 1:
+            raise ValueError(f"max_points must be positive, got {max_points}")
+        # Held off from in-place refreshes while the shared rollups are read
+        with dataset_cache.reading(DATA_FILE) as analysis:
+            series = analysis.rollups().query(grain, location=location,
+                                              start=_parse_date(request.args.get('start')),
+                                              end=_parse_date(request.args.get('end')))
+        total = len(series)
+        if total:
+            series = downsample(series, 'Temperature_C_mean', max_points)
+        # Readings are float32 (about 7 significant digits), so drop the widening noise;
+        # NaN is not valid JSON, so empty buckets become null
+        series = series.astype('float64').round(4)
+        records = series.astype(object).where(series.notna(), None).to_dict('records')
+        points = [{'time': time.isoformat(), **row} for time, row in zip(series.index, records)]
+        return jsonify(grain=grain, location=location, total_points=total, points=points)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: request latency, cache hit rates and analysis stage timings."""
+    caches = {
+        'dataset': (dataset_cache.hits, dataset_cache.misses),
+        'model': (model_registry.hits, model_registry.misses),
+        'chart': (chart_renderer.skipped, chart_renderer.rendered),
+    }
+    body = render_prometheus(request_metrics, caches)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def refresh_charts():
+    """Queue chart renders for the current dataset; unchanged charts are skipped."""
+    static = app.static_folder
+    # The chart data is aggregated before rendering is queued, so the read lock covers it
+    with dataset_cache.reading(DATA_FILE) as analysis:
+        analysis.plot_daily_avg_temp_and_precip(os.path.join(static, 'daily_avg_temp_precip.png'), wait=False)
+        analysis.plot_temperature_distribution(os.path.join(static, 'temperature_distribution.png'), wait=False)
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+        populate_database(DATA_FILE)
+    refresh_charts()
+    app.run(debug=True)
@@ -0,0 +1,83 @@
+"""
+Concurrency benchmark: page reads running alongside the bulk ingest.
+
+Loads a synthetic CSV with populate_database while reader threads page
+through weather_data via the read-only engine, once with the shared WAL
+settings and once with SQLite's default rollback journal, and reports ingest
+time and reader latency for both.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --rows 500000 --readers 8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from unittest.mock import patch
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flask import Flask  # noqa: E402
+import database  # noqa: E402
+import module as mod  # noqa: E402
+from bench_feature_pipeline import make_frame  # noqa: E402
+
+
+def run(csv_path, db_path, journal_mode, readers, chunk_size):
+    app = Flask(__name__)
+    pragmas = dict(database.CONNECTION_PRAGMAS, journal_mode=journal_mode)
+    with patch.dict(database.CONNECTION_PRAGMAS, pragmas):
+        database.configure_app(app, mod.db, "sqlite:///" + db_path)
+    latencies = []
+    done = threading.Event()
+
+    def reader():
+        with app.app_context():
+            engine = database.read_engine(mod.db)
+            while not done.is_set():
+                started = time.perf_counter()
+                try:
+                    mod.fetch_page(location='Chicago', engine=engine)
+                except Exception:
+                    pass  # "database is locked" counts as a slow read
+                latencies.append(time.perf_counter() - started)
+                mod.db.session.remove()
+
+    with app.app_context():
+        mod.db.create_all()
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        mod.populate_database(csv_path, chunk_size=chunk_size)
+        ingest_seconds = time.perf_counter() - started
+        done.set()
+        for thread in threads:
+            thread.join()
+        mod.db.engine.dispose()
+        database.read_engine(mod.db).dispose()
+
+    latencies = np.array(latencies) * 1000
+    print(f"{journal_mode:>6}: ingest {ingest_seconds:.2f}s | {len(latencies)} reads | "
+          f"p50 {np.percentile(latencies, 50):.1f} ms  p99 {np.percentile(latencies, 99):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "weather_data.csv")
+        make_frame(args.rows).to_csv(csv_path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+        for journal_mode in ('WAL', 'DELETE'):
+            run(csv_path, os.path.join(tmp_dir, f"{journal_mode}.db"), journal_mode,
+                args.readers, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
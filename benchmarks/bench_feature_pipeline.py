@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: derived columns and shared aggregates, before vs after precompute.
+
+"Before" replays the original per-method work (Series.apply for season,
+Python date objects for Date, and a fresh groupby / idxmax scan in each of
+summarize_by_location, save_summary and find_extreme_weather). "After" uses
+WeatherAnalysis.precompute and the memoized aggregates.
+
+Usage:
+    python benchmarks/bench_feature_pipeline.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from weather_analysis import WeatherAnalysis  # noqa: E402
+
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix',
+          'Philadelphia', 'San Antonio', 'San Diego', 'Dallas', 'San Jose']
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Location': rng.choice(CITIES, rows),
+        'Date_Time': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 366 * 86400, rows), unit='s'),
+        'Temperature_C': rng.normal(15, 12, rows),
+        'Humidity_pct': rng.uniform(20, 90, rows),
+        'Precipitation_mm': rng.exponential(2, rows),
+        'Wind_Speed_kmh': rng.uniform(0, 30, rows),
+    })
+
+
+def before(data):
+    data['month'] = data['Date_Time'].dt.month
+    data['season'] = data['month'].apply(lambda x: (x % 12 + 3) // 3)
+    data['Date'] = data['Date_Time'].dt.date
+    data.groupby('Date').agg(avg_temp=('Temperature_C', 'mean'), avg_precip=('Precipitation_mm', 'mean'))
+    # find_extreme_weather, summarize_by_location and save_summary each redo their scans
+    for _ in range(2):
+        data.loc[data['Temperature_C'].idxmax()]
+        data.loc[data['Temperature_C'].idxmin()]
+    for _ in range(2):
+        data.groupby('Location').agg(avg_temp=('Temperature_C', 'mean'), avg_precip=('Precipitation_mm', 'mean'))
+
+
+def after(data):
+    analysis = WeatherAnalysis(None)
+    analysis.data = data
+    analysis.precompute()
+    analysis.daily_averages()
+    for _ in range(2):
+        analysis.extreme_days()
+    for _ in range(2):
+        analysis.location_summary()
+
+
+def time_it(func, frame, repeat):
+    timings = []
+    for _ in range(repeat):
+        data = frame.copy()
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    scale = 1_000_000 / args.rows
+    for name, func in [('before', before), ('after', after)]:
+        seconds = time_it(func, frame, args.repeat)
+        print(f"{name:>6}: {seconds * scale:.3f} s per million rows")
+
+
+if __name__ == '__main__':
+    main()
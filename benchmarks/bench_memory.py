@@ -0,0 +1,77 @@
+"""
+Memory and groupby speed of the loaded frame: inferred dtypes vs the explicit schema.
+
+"Before" replays the old load (read_csv with inferred object/float64
+columns, a format-guessing date parse and int64 derived columns). "After"
+is WeatherAnalysis.fetch_data with DataFetcher's schema.
+
+Usage:
+    python benchmarks/bench_memory.py --cities 12 --years 3
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_fetcher import frame_memory  # noqa: E402
+from synthetic_data import write_synthetic_csv  # noqa: E402
+from weather_analysis import WeatherAnalysis  # noqa: E402
+
+
+def load_before(path):
+    data = pd.read_csv(path)
+    data['Date_Time'] = pd.to_datetime(data['Date_Time'], errors='coerce')
+    data = data.dropna(subset=['Temperature_C', 'Date_Time'])
+    data['Location_Encoded'] = pd.factorize(data['Location'], sort=True)[0].astype('int64')
+    data['month'] = data['Date_Time'].dt.month.astype('int64')
+    data['season'] = (data['month'] % 12 + 3) // 3
+    data['Date'] = data['Date_Time'].dt.normalize()
+    return data
+
+
+def load_after(path):
+    analysis = WeatherAnalysis(path)
+    analysis.fetch_data()
+    return analysis.data
+
+
+def measure(load, path, repeat):
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = load(path)
+    load_seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data.groupby('Location', observed=True)['Temperature_C'].mean()
+        data.groupby(['Location', 'month'], observed=True)[['Temperature_C', 'Precipitation_mm']].agg(['mean', 'max'])
+        timings.append(time.perf_counter() - started)
+    return frame_memory(data), peak, load_seconds, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cities', type=int, default=12)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'weather_data.csv')
+        rows = write_synthetic_csv(path, cities=args.cities, years=args.years)
+        print(f"{rows} rows")
+        for name, load in [('before', load_before), ('after', load_after)]:
+            frame_bytes, peak, load_seconds, groupby_seconds = measure(load, path, args.repeat)
+            print(f"{name:>6}: frame {frame_bytes / 2**20:7.1f} MiB | load peak {peak / 2**20:7.1f} MiB | "
+                  f"load {load_seconds:.2f} s | groupbys {groupby_seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
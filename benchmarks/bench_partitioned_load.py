@@ -0,0 +1,69 @@
+"""
+Load time of one CSV vs the same readings partitioned per city and month.
+
+Writes a synthetic dataset twice (one file, and city/YYYY-MM.csv partitions),
+then times WeatherAnalysis.fetch_data on each. Partitions are parsed in
+parallel, so compare --workers 1 with the number of cores.
+
+Usage:
+    python benchmarks/bench_partitioned_load.py --cities 12 --years 3 --workers 8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import data_fetcher  # noqa: E402
+from synthetic_data import iter_synthetic_frames  # noqa: E402
+from weather_analysis import WeatherAnalysis  # noqa: E402
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def write_dataset(directory, cities, years):
+    """Write all.csv plus parts/<city>/<YYYY-MM>.csv and return the number of rows."""
+    single = os.path.join(directory, 'all.csv')
+    rows = 0
+    for frame in iter_synthetic_frames(cities, years):
+        frame.to_csv(single, mode='a' if rows else 'w', header=not rows, index=False, date_format=DATE_FORMAT)
+        month = frame['Date_Time'].iloc[0].strftime('%Y-%m')
+        for city, readings in frame.groupby('Location'):
+            city_dir = os.path.join(directory, 'parts', city)
+            os.makedirs(city_dir, exist_ok=True)
+            readings.to_csv(os.path.join(city_dir, f'{month}.csv'), index=False, date_format=DATE_FORMAT)
+        rows += len(frame)
+    return rows
+
+
+def time_load(source, repeat, workers=None):
+    timings = []
+    for _ in range(repeat):
+        analysis = WeatherAnalysis(source)
+        started = time.perf_counter()
+        analysis.fetch_data(max_workers=workers)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cities', type=int, default=12)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = write_dataset(directory, args.cities, args.years)
+        partitions = os.path.join(directory, 'parts', '*', '*.csv')
+        print(f"{rows} rows, {len(data_fetcher.source_files(partitions))} partitions, "
+              f"pyarrow {'on' if data_fetcher.HAS_PYARROW else 'off'}")
+        print(f"  one file          : {time_load(os.path.join(directory, 'all.csv'), args.repeat):.2f} s")
+        for workers in sorted({1, args.workers}):
+            print(f"  partitions, {workers:>2} workers: {time_load(partitions, args.repeat, workers):.2f} s")
+
+
+if __name__ == '__main__':
+    main()
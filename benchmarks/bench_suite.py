@@ -0,0 +1,139 @@
+"""
+pytest-benchmark suite for the analysis pipeline on synthetic multi-city data.
+
+Covers fetch_data, calculate_statistics, summarize_by_location,
+add_features, detect_anomalies, train_predictive_model and populate_database on a CSV from
+synthetic_data.py. Size it with WEATHER_BENCH_CITIES / WEATHER_BENCH_YEARS
+(default 12 cities x 1 year, about 105k rows; 12 x 10 is about 1M).
+
+Save a baseline, then compare later runs against it and fail on a regression:
+    pip install pytest-benchmark
+    python -m pytest benchmarks/bench_suite.py --benchmark-autosave
+    python -m pytest benchmarks/bench_suite.py --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Results are stored per machine under .benchmarks/; compare runs from the same machine.
+"""
+import os
+import sys
+import pytest
+from flask import Flask
+
+pytest.importorskip('pytest_benchmark')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import module as mod  # noqa: E402
+from database import configure_app, read_engine  # noqa: E402
+import weather_analysis  # noqa: E402
+from rendering import ChartRenderer  # noqa: E402
+from synthetic_data import write_synthetic_csv  # noqa: E402
+from weather_analysis import WeatherAnalysis, WeatherAnalysisImproved  # noqa: E402
+
+CITIES = int(os.environ.get('WEATHER_BENCH_CITIES', 12))
+YEARS = int(os.environ.get('WEATHER_BENCH_YEARS', 1))
+
+FEATURE_COLUMNS = ["Humidity_pct", "Precipitation_mm", "Wind_Speed_kmh", "Location_Encoded", "month", "season",
+                   "temp_lag_1", "temp_lag_7", "temp_mean_24h", "temp_mean_7D", "humidity_precip_interaction"]
+
+
+@pytest.fixture(scope='session')
+def csv_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('weather') / 'weather_data.csv'
+    write_synthetic_csv(path, cities=CITIES, years=YEARS)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def loaded(csv_path):
+    analysis = WeatherAnalysisImproved(csv_path)
+    analysis.fetch_data()
+    return analysis
+
+
+@pytest.fixture(scope='session')
+def featured(loaded):
+    analysis = WeatherAnalysisImproved(loaded.file_path)
+    analysis.data = loaded.data.copy()
+    analysis.add_features()
+    return analysis
+
+
+def _csv_rows(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+
+def _record_rows(benchmark, rows):
+    benchmark.extra_info['rows'] = rows
+    benchmark.extra_info['rows_per_second'] = rows / benchmark.stats.stats.mean
+
+
+def test_fetch_data(benchmark, csv_path):
+    def setup():
+        return (WeatherAnalysis(csv_path),), {}
+
+    benchmark.pedantic(lambda analysis: analysis.fetch_data(), setup=setup, rounds=3)
+    _record_rows(benchmark, _csv_rows(csv_path))
+
+
+def test_calculate_statistics(benchmark, loaded):
+    stats = benchmark(loaded.calculate_statistics)
+    assert stats
+    _record_rows(benchmark, len(loaded.data))
+
+
+def test_summarize_by_location(benchmark, loaded):
+    def setup():
+        # Drop memoized aggregates so every round rebuilds the rollups
+        loaded._aggregates = {}
+
+    benchmark.pedantic(loaded.summarize_by_location, setup=setup, rounds=5)
+    _record_rows(benchmark, len(loaded.data))
+
+
+def test_add_features(benchmark, loaded):
+    def setup():
+        analysis = WeatherAnalysisImproved(loaded.file_path)
+        analysis.data = loaded.data.copy()
+        return (analysis,), {}
+
+    benchmark.pedantic(lambda analysis: analysis.add_features(), setup=setup, rounds=3)
+    _record_rows(benchmark, len(loaded.data))
+
+
+def test_detect_anomalies(benchmark, loaded):
+    def setup():
+        # Flag a copy so the session fixture keeps its original columns
+        analysis = WeatherAnalysisImproved(loaded.file_path)
+        analysis.data = loaded.data.copy()
+        return (analysis,), {}
+
+    flags = benchmark.pedantic(lambda analysis: analysis.detect_anomalies(), setup=setup, rounds=5)
+    assert flags['is_anomaly'].mean() < 0.1
+    _record_rows(benchmark, len(loaded.data))
+
+
+def test_train_predictive_model(benchmark, featured, tmp_path, monkeypatch):
+    # Keep chart hashes in tmp_path rather than in the shared renderer's state
+    renderer = ChartRenderer(state_path=str(tmp_path / 'charts.json'))
+    monkeypatch.setattr(weather_analysis, 'chart_renderer', renderer)
+    city = featured.data['Location'].iloc[0]
+    results = benchmark.pedantic(
+        featured.train_predictive_model, args=("Temperature_C", FEATURE_COLUMNS),
+        kwargs={'city': city, 'graph_path': str(tmp_path / 'actual_vs_predicted.png')}, rounds=2)
+    assert results['r2'] > 0
+    _record_rows(benchmark, int((featured.data['Location'] == city).sum()))
+
+
+def test_populate_database(benchmark, csv_path, tmp_path):
+    app = Flask(__name__)
+    configure_app(app, mod.db, "sqlite:///" + str(tmp_path / 'weather.db'))
+    with app.app_context():
+        def setup():
+            mod.db.drop_all()
+            mod.db.create_all()
+
+        inserted = benchmark.pedantic(mod.populate_database, args=(csv_path,), setup=setup, rounds=2)
+        assert inserted == _csv_rows(csv_path)
+        mod.db.engine.dispose()
+        read_engine(mod.db).dispose()
+    _record_rows(benchmark, inserted)
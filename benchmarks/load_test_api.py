@@ -0,0 +1,60 @@
+"""
+Local load test for the streaming /api/weather endpoint.
+
+Fires concurrent requests at a running app and reports latency percentiles
+(time to the last byte) and rows served per second.
+
+Usage:
+    python app.py &
+    python benchmarks/load_test_api.py --url http://127.0.0.1:5000 \\
+        --query "city=Chicago&start=2024-01-01&end=2024-02-01" --requests 200 --concurrency 16
+"""
+import gzip
+import time
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def fetch(url, use_gzip):
+    """Download one response; returns (seconds, rows, bytes on the wire)."""
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'} if use_gzip else {})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        # urllib does not decode Content-Encoding, so this is the compressed size when gzipped
+        body = response.read()
+        wire_bytes = len(body)
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+    elapsed = time.perf_counter() - started
+    return elapsed, body.count(b"\n"), wire_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--query', default='', help="query string for /api/weather (NDJSON format)")
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/api/weather?{args.query}"
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda _: fetch(url, args.gzip), range(args.requests)))
+    wall = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    rows = sum(r[1] for r in results)
+    wire = sum(r[2] for r in results)
+    print(f"requests: {args.requests} at concurrency {args.concurrency} in {wall:.2f}s")
+    print(f"latency ms: p50 {np.percentile(latencies, 50):.1f}  p99 {np.percentile(latencies, 99):.1f}  "
+          f"max {latencies.max():.1f}")
+    print(f"throughput: {rows / wall:,.0f} rows/s, {args.requests / wall:.1f} req/s, "
+          f"{wire / wall / 1e6:.1f} MB/s on the wire")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Process-wide cache of parsed weather datasets and their statistics.
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from data_fetcher import source_files
+from weather_analysis import WeatherAnalysis
+
+
+class ReadWriteLock:
+    """Any number of readers or one writer; a waiting writer holds off new readers."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class DatasetCache:
+    """
+    Keeps one parsed dataset per source, keyed on the path, mtime and size of its files.
+
+    A source that only grew is refreshed in place under the entry's write
+    lock; read shared analyses inside reading() so a refresh never changes
+    data or aggregates under a request.
+    """
+
+    def __init__(self, analysis_class=WeatherAnalysis):
+        self.analysis_class = analysis_class
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Misses served by appending new rows instead of re-parsing the file
+        self.refreshes = 0
+
+    @staticmethod
+    def _key(file_path):
+        """
+        Build the cache key for a source: (absolute path, ((file, mtime_ns, size), ...)).
+
+        Raises FileNotFoundError if the file is missing or a pattern matches nothing.
+        """
+        files = source_files(file_path)
+        if not files:
+            raise FileNotFoundError(f"No CSV files match {file_path}.")
+        versions = []
+        for name in files:
+            st = os.stat(name)
+            versions.append((os.path.abspath(name), st.st_mtime_ns, st.st_size))
+        return (os.path.abspath(file_path), tuple(versions))
+
+    @staticmethod
+    def _only_grew(old_key, key):
+        """Whether every file of the old key is still there and no smaller (new files may have appeared)."""
+        sizes = {name: size for name, _, size in key[1]}
+        return all(name in sizes and sizes[name] >= size for name, _, size in old_key[1])
+
+    def get(self, file_path):
+        """
+        Return the cached entry (analysis + stats), re-parsing only if the file changed.
+
+        A file that only grew is refreshed in place, reading just the appended rows.
+        """
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key[0])
+            if entry is not None and entry['key'] == key:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            if entry is not None and self._only_grew(entry['key'], key):
+                # Files grew or were added: parse only the new rows, once no request is reading
+                try:
+                    with entry['lock'].writing():
+                        entry['analysis'].refresh()
+                        entry['stats'] = entry['analysis'].calculate_statistics()
+                    entry['key'] = key
+                    self.refreshes += 1
+                    logging.info(f"Dataset cache appended new rows from {file_path}")
+                    return entry
+                except Exception as e:
+                    logging.error(f"Error refreshing cached dataset, reloading it: {e}")
+
+            analysis = self.analysis_class(file_path)
+            analysis.fetch_data()
+            # A new entry: requests still reading the old analysis keep a consistent copy
+            entry = {
+                'key': key,
+                'analysis': analysis,
+                'stats': analysis.calculate_statistics(),
+                'lock': ReadWriteLock(),
+            }
+            self._entries[key[0]] = entry
+            logging.info(f"Dataset cache refreshed for {file_path}")
+            return entry
+
+    def get_analysis(self, file_path):
+        """Return the cached WeatherAnalysis for file_path; use reading() while requests may refresh it."""
+        return self.get(file_path)['analysis']
+
+    @contextmanager
+    def reading(self, file_path):
+        """Yield the cached WeatherAnalysis for file_path, held off from in-place refreshes until the block ends."""
+        entry = self.get(file_path)
+        with entry['lock'].reading():
+            yield entry['analysis']
+
+    def get_statistics(self, file_path):
+        """Return a copy of the precomputed statistics for file_path."""
+        return dict(self.get(file_path)['stats'])
+
+    def invalidate(self, file_path=None):
+        """Drop one file (or every file) from the cache."""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(file_path), None)
+
+
+# Shared by every request handled in this process
+dataset_cache = DatasetCache()
@@ -0,0 +1,187 @@
+"""
+CSV reading kept free of Flask and SQLAlchemy, so analysis code can load data
+without importing the database layer. module.DataFetcher re-exports it.
+
+A source is one CSV, a directory of CSVs or a glob pattern; partitioned
+sources are parsed in parallel and concatenated into one frame.
+"""
+import os
+import csv
+import glob
+import logging
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# pyarrow is optional; its CSV reader parses on native threads without holding the GIL
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+MEASUREMENT_COLUMNS = ['Temperature_C', 'Humidity_pct', 'Precipitation_mm', 'Wind_Speed_kmh']
+
+# Categorical locations and float32 readings need well under half the memory of the
+# inferred object/float64 columns, and group faster
+CSV_DTYPES = {'Location': 'category', **dict.fromkeys(MEASUREMENT_COLUMNS, 'float32')}
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def parse_date_times(values, date_format=DATE_FORMAT):
+    """Parse with a fixed format; only values that do not match it are inferred one by one."""
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    unmatched = parsed.isna() & values.notna()
+    if unmatched.any():
+        parsed[unmatched] = pd.to_datetime(values[unmatched], format='mixed', errors='coerce')
+    return parsed
+
+def frame_memory(frame):
+    """Bytes held by a DataFrame, including string contents."""
+    return int(frame.memory_usage(deep=True).sum())
+
+def source_files(path):
+    """
+    The CSV files making up a source, in name order.
+
+    path is a file, a directory (its *.csv files) or a glob pattern such as
+    "data/*/2024-*.csv". Raises FileNotFoundError for a missing file; an
+    empty directory or a pattern without matches gives an empty list.
+    """
+    path = os.fspath(path)
+    if any(char in path for char in '*?['):
+        return sorted(name for name in glob.glob(path, recursive=True) if os.path.isfile(name))
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith('.csv')]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File {path} does not exist.")
+    return [path]
+
+def read_header(file_name):
+    """Column names from a CSV's first line, as written (whitespace included)."""
+    with open(file_name, newline='') as f:
+        return next(csv.reader(f), [])
+
+def concat_frames(frames):
+    """Concatenate frames with a fresh index, keeping categorical columns categorical."""
+    frames = list(frames)
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames if column in frame):
+            # pd.concat falls back to object unless every frame has the same categories;
+            # a column with no values at all has categories of another dtype, so it is left out of the union
+            columns = [frame[column] for frame in frames if column in frame]
+            categories = union_categoricals([values for values in columns if len(values.cat.categories)]
+                                            or columns[:1]).categories
+            for frame in frames:
+                if column in frame:
+                    frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def _arrow_types(header, dtypes):
+    """pyarrow column types for a CSV header, mirroring DataFetcher's pandas schema."""
+    import pyarrow as pa
+    types = {}
+    for name in header:
+        dtype = (dtypes or {}).get(name.strip())
+        if dtype == 'category':
+            types[name] = pa.dictionary(pa.int32(), pa.string())
+        elif dtype is not None:
+            types[name] = pa.from_numpy_dtype(np.dtype(dtype))
+        elif name.strip() == 'Date_Time':
+            # Parsed afterwards by parse_date_times, like the pandas readers
+            types[name] = pa.string()
+    return types
+
+def _read_arrow(file_name, dtypes):
+    from pyarrow import csv as arrow_csv
+    # pyarrow's default null markers match pandas'; strings_can_be_null applies them to text columns too
+    options = arrow_csv.ConvertOptions(column_types=_arrow_types(read_header(file_name), dtypes),
+                                       strings_can_be_null=True)
+    table = arrow_csv.read_csv(file_name, convert_options=options)
+    return table.rename_columns([name.strip() for name in table.column_names])
+
+def _read_pandas(file_name, dtypes):
+    frame = pd.read_csv(file_name, **DataFetcher(file_name)._read_options(dtypes))
+    frame.columns = frame.columns.str.strip()
+    return frame
+
+class DataFetcher:
+    def __init__(self, file_name, max_workers=None):
+        self.file_name = file_name
+        # Parallel readers for partitioned sources (defaults to the number of cores)
+        self.max_workers = max_workers
+
+    def _read_options(self, dtypes):
+        # Map the schema onto the raw header names, which may carry stray whitespace
+        header = read_header(self.file_name)
+        return {'dtype': {name: dtypes[name.strip()] for name in header if name.strip() in (dtypes or {})}}
+
+    @staticmethod
+    def _finish(data_frame):
+        data_frame.columns = data_frame.columns.str.strip()
+        if 'Date_Time' in data_frame.columns:
+            data_frame['Date_Time'] = parse_date_times(data_frame['Date_Time'])
+        return data_frame
+
+    def csv_pandas(self, dtypes=CSV_DTYPES):
+        """
+        Reads a CSV file, or every file of a partitioned source, into a pandas DataFrame.
+
+        Columns named in dtypes get those types (None infers them all) and
+        Date_Time is parsed as DATE_FORMAT; unparseable dates become NaT.
+        """
+        try:
+            files = source_files(self.file_name)
+            if not files:
+                raise FileNotFoundError(f"No CSV files match {self.file_name}.")
+            if len(files) == 1:
+                data_frame = pd.read_csv(files[0], **DataFetcher(files[0])._read_options(dtypes))
+            else:
+                data_frame = self._read_partitions(files, dtypes)
+            return self._finish(data_frame)
+        except Exception as e:
+            logging.error(f"Error reading CSV: {e}")
+            return None
+
+    def _read_partitions(self, files, dtypes):
+        """
+        Parse files in parallel and concatenate them.
+
+        With pyarrow, threads parse the files into Arrow tables that are
+        concatenated without copying and converted to pandas once. Without it,
+        each file is parsed in a worker process.
+        """
+        max_workers = min(self.max_workers or os.cpu_count() or 1, len(files))
+        if HAS_PYARROW:
+            import pyarrow as pa
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                tables = list(executor.map(_read_arrow, files, [dtypes] * len(files)))
+            # One dictionary for Location across files, so it converts to a single categorical
+            table = pa.concat_tables(tables, promote_options='default').unify_dictionaries()
+            return table.to_pandas(split_blocks=True)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return concat_frames(executor.map(_read_pandas, files, [dtypes] * len(files)))
+
+    def csv_chunks(self, chunk_size=50000, skip_rows=0, dtypes=CSV_DTYPES):
+        """
+        Yields the CSV as DataFrames of at most chunk_size rows, skipping the first skip_rows data rows.
+
+        A partitioned source is read file by file, in name order.
+        """
+        try:
+            for file_name in source_files(self.file_name):
+                reader = pd.read_csv(file_name, chunksize=chunk_size,
+                                     skiprows=range(1, skip_rows + 1), **DataFetcher(file_name)._read_options(dtypes))
+                rows = 0
+                for chunk in reader:
+                    if chunk.empty:
+                        continue
+                    rows += len(chunk)
+                    yield self._finish(chunk)
+                if skip_rows and not rows:
+                    # The whole file was skipped; carry the rest over to the next one
+                    with open(file_name, 'rb') as f:
+                        skip_rows -= max(sum(1 for _ in f) - 1, 0)
+                else:
+                    skip_rows = 0
+        except Exception as e:
+            logging.error(f"Error reading CSV in chunks: {e}")
+            raise
@@ -0,0 +1,108 @@
+"""
+Shared SQLite engine configuration for module.py and app.py.
+
+One place decides the database URI, pool sizing and connection pragmas.
+The primary engine runs in WAL mode so readers never wait for the ingest
+writer, and a read-only engine on the same file serves the query routes.
+"""
+import os
+from flask import current_app
+from sqlalchemy import create_engine, event, make_url
+
+DATABASE_URI = os.environ.get('WEATHER_DATABASE_URI', 'sqlite:///weather_app.db')
+
+# Pool sizing; SQLite connections are cheap but reusing them keeps their page cache warm
+POOL_OPTIONS = {
+    'pool_size': int(os.environ.get('WEATHER_DB_POOL_SIZE', 8)),
+    'max_overflow': int(os.environ.get('WEATHER_DB_MAX_OVERFLOW', 16)),
+    'pool_timeout': 30,
+    'pool_pre_ping': True,
+}
+
+# Applied to every new connection
+CONNECTION_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers and the writer no longer block each other
+    'synchronous': 'NORMAL',        # safe with WAL; fsync only at checkpoints
+    'mmap_size': str(256 * 1024 * 1024),
+    'busy_timeout': '5000',
+    'temp_store': 'MEMORY',
+}
+
+# Read-only connections skip journal_mode (it needs write access) and refuse writes
+READONLY_PRAGMAS = {
+    'query_only': 'ON',
+    'mmap_size': CONNECTION_PRAGMAS['mmap_size'],
+    'busy_timeout': CONNECTION_PRAGMAS['busy_timeout'],
+    'temp_store': CONNECTION_PRAGMAS['temp_store'],
+}
+
+# app.extensions key holding the read-only engine
+READONLY_ENGINE = 'weather_readonly_engine'
+
+
+def is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def readonly_uri(uri):
+    """URI opening the same SQLite file in read-only mode."""
+    url = make_url(uri)
+    database = url.database[5:] if url.query.get('uri') else url.database
+    return f"sqlite:///file:{database}?mode=ro&uri=true"
+
+
+def engine_options(uri):
+    """Keyword arguments for create_engine / SQLALCHEMY_ENGINE_OPTIONS."""
+    if not is_file_sqlite(uri):
+        return {}
+    return dict(POOL_OPTIONS, connect_args={'check_same_thread': False, 'timeout': 30})
+
+
+def install_pragmas(engine, pragmas):
+    """Run the given PRAGMAs on every connection the engine opens."""
+    if engine.dialect.name != 'sqlite':
+        return engine
+    pragmas = dict(pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return engine
+
+
+def make_engine(uri=DATABASE_URI, readonly=False):
+    """Standalone engine with the shared pool and pragma settings (scripts, benchmarks)."""
+    if readonly:
+        engine = create_engine(readonly_uri(uri), **engine_options(uri))
+        return install_pragmas(engine, READONLY_PRAGMAS)
+    return install_pragmas(create_engine(uri, **engine_options(uri)), CONNECTION_PRAGMAS)
+
+
+def configure_app(app, db, uri=None):
+    """
+    Point a Flask app at the database and initialise Flask-SQLAlchemy on it.
+
+    File databases also get a read-only engine on the same file, used by
+    read_engine for the query routes.
+    """
+    uri = uri or app.config.get('SQLALCHEMY_DATABASE_URI') or DATABASE_URI
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    db.init_app(app)
+    with app.app_context():
+        install_pragmas(db.engine, CONNECTION_PRAGMAS)
+        if is_file_sqlite(uri):
+            # Flask-SQLAlchemy resolved relative paths against the instance folder
+            resolved = db.engine.url.render_as_string(hide_password=False)
+            app.extensions[READONLY_ENGINE] = make_engine(resolved, readonly=True)
+    return app
+
+
+def read_engine(db):
+    """Engine for query routes: the read-only engine when there is one."""
+    return current_app.extensions.get(READONLY_ENGINE) or db.engine
@@ -0,0 +1,71 @@
+"""
+Time-series features for forecasting, computed per city in time order.
+
+Lags are row-based within each Location; rolling means are time-based
+windows that exclude the current reading, so no feature ever sees the
+value it is used to predict or a reading from another city.
+"""
+import numpy as np
+import pandas as pd
+
+LAGS = (1, 7)
+WINDOWS = ('24h', '7D')
+
+
+def lag_columns(lags=LAGS):
+    return [f'temp_lag_{lag}' for lag in lags]
+
+
+def window_columns(windows=WINDOWS):
+    return [f'temp_mean_{window}' for window in windows]
+
+
+def add_time_series_features(data, lags=LAGS, windows=WINDOWS):
+    """Return data sorted by (Location, Date_Time) with grouped lag, rolling and interaction features."""
+    data = data.sort_values(['Location', 'Date_Time'], kind='mergesort')
+    grouped = data.groupby('Location', observed=True, sort=False)
+
+    for lag, column in zip(lags, lag_columns(lags)):
+        data[column] = grouped['Temperature_C'].shift(lag)
+
+    # Rows without a Location belong to no group; sorting puts them last
+    keyed = data['Location'].notna().to_numpy()
+    for window, column in zip(windows, window_columns(windows)):
+        # closed='left' keeps the current reading out of its own window; the
+        # frame is already sorted by group, so results line up with the keyed rows
+        rolled = grouped.rolling(window, on='Date_Time', closed='left')['Temperature_C'].mean()
+        values = np.full(len(data), np.nan)
+        values[keyed] = rolled.to_numpy()
+        data[column] = values
+
+    # Interaction terms
+    data['humidity_precip_interaction'] = data['Humidity_pct'] * data['Precipitation_mm']
+    return data
+
+
+def extend_time_series_features(history, new_rows, lags=LAGS, windows=WINDOWS):
+    """
+    Compute features for new_rows only, using just enough of history as context.
+
+    new_rows must be later than the history of their city (append-only feeds).
+    For each city the context is the last max(lags) readings plus every reading
+    inside the widest window before its first new row, so the cost depends on
+    the size of the update rather than on the length of the history. The
+    result is sorted by (Location, Date_Time) with a fresh index.
+    """
+    columns = list(new_rows.columns)
+    max_lag = max(lags, default=0)
+    max_window = max((pd.Timedelta(window) for window in windows), default=pd.Timedelta(0))
+
+    history = history.sort_values(['Location', 'Date_Time'], kind='mergesort')
+    first_new = new_rows.groupby('Location', observed=True)['Date_Time'].min()
+    city_start = history['Location'].astype(object).map(first_new)
+    from_end = history.groupby('Location', observed=True, sort=False).cumcount(ascending=False)
+    needed = city_start.notna() & ((history['Date_Time'] >= city_start - max_window) | (from_end < max_lag))
+
+    combined = pd.concat(
+        [history.loc[needed, columns].assign(_is_new=False), new_rows.assign(_is_new=True)],
+        ignore_index=True,
+    )
+    combined = add_time_series_features(combined, lags, windows)
+    return combined[combined['_is_new']].drop(columns='_is_new').reset_index(drop=True)
@@ -0,0 +1,113 @@
+"""
+On-disk columnar cache of the cleaned, feature-enriched weather frame.
+
+Entries are Arrow/Feather files keyed by a hash of the source CSV(s) and
+CLEANING_VERSION, and are memory-mapped on load. Without pyarrow the cache
+falls back to pickle files, which are still far cheaper than re-parsing text.
+"""
+import os
+import json
+import hashlib
+import logging
+import importlib.util
+import pandas as pd
+from data_fetcher import source_files
+
+# pyarrow is optional and slow to import, so it is only loaded on first cache access
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def _feather():
+    import pyarrow.feather as feather
+    return feather
+
+# Bump whenever fetch_data's cleaning or derived columns change
+CLEANING_VERSION = 3
+
+DEFAULT_CACHE_DIR = ".weather_cache"
+
+
+def file_digest(file_path, block_size=1 << 20):
+    """BLAKE2b digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FrameCache:
+    """Stores and loads cleaned DataFrames keyed by source content and cleaning version."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.extension = ".feather" if HAS_PYARROW else ".pkl"
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def source_key(self, file_path):
+        """
+        Cache key for a source file, or for all files of a partitioned source.
+
+        Hashing a whole file is only needed when its mtime or size changed
+        since the last lookup; otherwise the recorded digest is reused.
+        """
+        index = self._read_index()
+        digests = []
+        changed = False
+        for name in source_files(file_path):
+            st = os.stat(name)
+            path = os.path.abspath(name)
+            entry = index.get(path)
+            if not (entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size):
+                entry = index[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'digest': file_digest(name)}
+                changed = True
+            digests.append(entry['digest'])
+        if changed:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._index_path(), 'w') as f:
+                json.dump(index, f)
+        if len(digests) == 1:
+            digest = digests[0]
+        else:
+            digest = hashlib.blake2b(' '.join(digests).encode(), digest_size=16).hexdigest()
+        return f"{digest}-v{CLEANING_VERSION}"
+
+    def path_for(self, file_path):
+        """Location of the cache entry for file_path."""
+        return os.path.join(self.cache_dir, self.source_key(file_path) + self.extension)
+
+    def load(self, file_path):
+        """Return the cached frame for file_path, or None on a miss."""
+        cache_path = self.path_for(file_path)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            if HAS_PYARROW:
+                table = _feather().read_table(cache_path, memory_map=True)
+                # split_blocks avoids consolidating columns, keeping numeric columns zero-copy
+                return table.to_pandas(split_blocks=True)
+            return pd.read_pickle(cache_path)
+        except Exception as e:
+            logging.error(f"Ignoring unreadable frame cache {cache_path}: {e}")
+            return None
+
+    def store(self, file_path, frame):
+        """Write frame as the cache entry for file_path."""
+        cache_path = self.path_for(file_path)
+        tmp_path = cache_path + ".tmp"
+        if HAS_PYARROW:
+            _feather().write_feather(frame.reset_index(drop=True), tmp_path, compression='uncompressed')
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+        logging.info(f"Stored frame cache {cache_path}")
+        return cache_path
@@ -0,0 +1,275 @@
+"""
+Incremental ingestion of live weather CSVs.
+
+TailReader remembers a byte offset per file and only parses what was
+appended since, so a refresh costs time proportional to the new data. A
+source is one CSV that grows, or a directory or glob that new CSVs are
+dropped into (each file is then tailed on its own). A half-written last
+line is left for the next read, and a file that shrinks, whose header
+changes or whose bytes just before the offset differ is treated as replaced
+and read again from the start.
+
+Watermarks keep the latest Date_Time seen per location. Rows at or before
+their location's mark are treated as duplicates or late arrivals (for
+example from drop-in files that overlap) and skipped.
+
+LocationCodes numbers locations so that a code never changes once given,
+whichever partition or run first saw the location.
+"""
+import io
+import os
+import json
+import logging
+import threading
+import numpy as np
+from contextlib import contextmanager
+from itertools import islice
+import pandas as pd
+from data_fetcher import CSV_DTYPES, DataFetcher, source_files
+
+try:
+    import fcntl
+except ImportError:  # Windows: the codes file is only locked between threads
+    fcntl = None
+
+# Bytes kept from just before each offset, compared on the next read to notice a rewritten file
+CHECK_BYTES = 256
+
+
+def offset_after_rows(file_path, rows):
+    """Byte offset just past the header and the first `rows` data lines."""
+    with open(file_path, 'rb') as f:
+        f.readline()
+        for _ in islice(f, rows):
+            pass
+        return f.tell()
+
+
+def _bytes_before(f, offset, size=CHECK_BYTES):
+    start = max(offset - size, 0)
+    f.seek(start)
+    return f.read(offset - start)
+
+
+def _end_of_last_line(f, block_size=1 << 16):
+    """Offset just past the last newline in an open binary file, scanning back from the end."""
+    position = f.seek(0, os.SEEK_END)
+    while position > 0:
+        start = max(position - block_size, 0)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+class TailReader:
+    """Reads the rows appended to a file, or to the files in a directory, since the last read."""
+
+    def __init__(self, path, offsets=None, dtypes=CSV_DTYPES):
+        self.path = path
+        self.dtypes = dtypes
+        # Absolute file path -> {'offset': bytes consumed, 'header': header line,
+        # optionally 'check': the bytes just before offset}
+        self.offsets = dict(offsets or {})
+
+    def skip_existing(self):
+        """Mark every complete line currently in the source as read."""
+        for file_path in source_files(self.path):
+            with open(file_path, 'rb') as f:
+                header = f.readline()
+                if not header.endswith(b'\n'):
+                    continue
+                self.offsets[os.path.abspath(file_path)] = self._state(f, max(_end_of_last_line(f), len(header)), header)
+
+    @staticmethod
+    def _state(f, offset, header):
+        return {'offset': offset, 'header': header.decode(), 'check': _bytes_before(f, offset)}
+
+    @staticmethod
+    def _is_replaced(f, state, header):
+        """Whether an open file no longer starts with what was read from it before."""
+        if state['header'] != header.decode() or os.fstat(f.fileno()).st_size < state['offset']:
+            return True
+        return 'check' in state and _bytes_before(f, state['offset']) != state['check']
+
+    def replaced(self):
+        """Files read before that were truncated or rewritten since."""
+        files = []
+        for file_path in source_files(self.path):
+            state = self.offsets.get(os.path.abspath(file_path))
+            if state is not None:
+                with open(file_path, 'rb') as f:
+                    if self._is_replaced(f, state, f.readline()):
+                        files.append(file_path)
+        return files
+
+    def _start(self, f, file_path, header):
+        """Where to resume reading file_path, restarting if it was truncated or replaced."""
+        state = self.offsets.get(os.path.abspath(file_path))
+        if state is None:
+            return len(header)
+        if self._is_replaced(f, state, header):
+            logging.warning(f"{file_path} was truncated or replaced; reading it from the start")
+            return len(header)
+        return state['offset']
+
+    def iter_new(self, chunk_size=None):
+        """
+        Yield (file_path, frame, state) for every chunk of new complete lines.
+
+        state is the file's offset entry once the chunk is consumed; pass it to
+        commit() after the chunk has been stored. Offsets only move on commit,
+        so a failed load is retried from the same place.
+        """
+        for file_path in source_files(self.path):
+            with open(file_path, 'rb') as f:
+                header = f.readline()
+                if not header.endswith(b'\n'):
+                    continue  # Header still being written
+                offset = self._start(f, file_path, header)
+                f.seek(offset)
+                options = DataFetcher(file_path)._read_options(self.dtypes)
+                while True:
+                    lines = list(islice(f, chunk_size)) if chunk_size else f.readlines()
+                    if lines and not lines[-1].endswith(b'\n'):
+                        lines.pop()  # Incomplete last line; picked up by the next read
+                    if not lines:
+                        break
+                    offset += sum(len(line) for line in lines)
+                    frame = pd.read_csv(io.BytesIO(header + b''.join(lines)), **options)
+                    state = self._state(f, offset, header)
+                    f.seek(offset)
+                    yield file_path, DataFetcher._finish(frame), state
+                    if chunk_size is None or len(lines) < chunk_size:
+                        break
+
+    def commit(self, file_path, state):
+        self.offsets[os.path.abspath(file_path)] = state
+
+    def read_new(self):
+        """All new rows as one DataFrame (empty if nothing was appended); offsets advance."""
+        frames = []
+        for file_path, frame, state in self.iter_new():
+            frames.append(frame)
+            self.commit(file_path, state)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+
+class Watermarks:
+    """Latest timestamp seen per location."""
+
+    def __init__(self, marks=None, location_column='Location', time_column='Date_Time'):
+        self.marks = dict(marks or {})
+        self.location_column = location_column
+        self.time_column = time_column
+
+    @classmethod
+    def from_frame(cls, frame, location_column='Location', time_column='Date_Time'):
+        watermarks = cls(location_column=location_column, time_column=time_column)
+        return watermarks.advance(frame)
+
+    def select_new(self, frame):
+        """Rows strictly later than their location's mark (all rows of unseen locations)."""
+        if frame.empty or not self.marks:
+            return frame
+        marks = frame[self.location_column].map(self.marks).astype('datetime64[ns]')
+        return frame[marks.isna().to_numpy() | (frame[self.time_column] > marks).to_numpy()]
+
+    def latest(self, frame):
+        """Per-location maximum timestamp of a frame, as a dict."""
+        if frame.empty:
+            return {}
+        return frame.groupby(self.location_column, observed=True)[self.time_column].max().to_dict()
+
+    def advance(self, frame):
+        """Raise the marks to cover frame's rows."""
+        for location, latest in self.latest(frame).items():
+            if location not in self.marks or latest > self.marks[location]:
+                self.marks[location] = latest
+        return self
+
+
+# JSON file keeping Location_Encoded stable across runs; unset keeps the codes per process
+LOCATION_CODES_FILE = os.environ.get('WEATHER_LOCATION_CODES')
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on path across threads and, where fcntl exists, across processes."""
+    with _path_locks_guard:
+        lock = _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+    with lock, open(path + ".lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class LocationCodes:
+    """
+    Location name -> Location_Encoded.
+
+    New names get the next free codes (in name order, so a fresh mapping
+    matches sorted factorize codes) and existing codes never change. With a
+    path, the mapping is loaded from and saved to that JSON file; instances
+    sharing the file merge each other's codes under a lock before adding.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.codes = self._read() if path else {}
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def add(self, names):
+        """Give codes to names not seen before."""
+        new = set(names) - set(self.codes)
+        if not new:
+            return self
+        if not self.path:
+            self._assign(new)
+            return self
+        # Other instances and processes share the file: merge what they saved before numbering
+        with _file_lock(self.path):
+            codes = self._read()
+            for name, code in self.codes.items():
+                codes.setdefault(name, code)
+            self.codes = codes
+            if self._assign(new):
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.codes, f, indent=1)
+                os.replace(tmp_path, self.path)
+        return self
+
+    def _assign(self, names):
+        """Number the names that still have no code; returns them."""
+        new = sorted(set(names) - set(self.codes))
+        for name in new:
+            self.codes[name] = max(self.codes.values(), default=-1) + 1
+        return new
+
+    def encode(self, locations):
+        """int16 codes for a Series of locations (-1 for missing ones)."""
+        if isinstance(locations.dtype, pd.CategoricalDtype):
+            positions, names = locations.cat.codes.to_numpy(), locations.cat.categories.astype(str)
+        else:
+            positions, names = pd.factorize(locations)
+        self.add(names)
+        # Look codes up once per distinct name, then gather per row
+        lookup = np.array([self.codes[name] for name in names] + [-1], dtype='int16')
+        return pd.Series(lookup[positions], index=locations.index, name='Location_Encoded')
@@ -0,0 +1,336 @@
+"""
+Timing, resource and profiling instrumentation for analysis stages and the web app.
+
+Every stage run records wall time, CPU time, rows processed and (when
+tracemalloc is tracing) the peak memory allocated during the stage.
+Totals are kept in stage_metrics and exported with the web request
+metrics in Prometheus text format. Profiling and memory tracing are
+opt-in through WEATHER_PROFILE_DIR, WEATHER_PROFILER and
+WEATHER_TRACE_MEMORY (or configure_profiling).
+"""
+import os
+import sys
+import time
+import bisect
+import logging
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+LOG_FILE = os.environ.get('WEATHER_LOG_FILE', 'weather_analysis.log')
+LOG_LEVEL = os.environ.get('WEATHER_LOG_LEVEL', 'ERROR')
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d: %(message)s'
+
+# Latency histogram bucket bounds in seconds (Prometheus defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_profiling = {
+    'directory': os.environ.get('WEATHER_PROFILE_DIR') or None,
+    'profiler': os.environ.get('WEATHER_PROFILER', 'cprofile'),
+}
+_local = threading.local()
+
+if os.environ.get('WEATHER_TRACE_MEMORY') == '1':
+    tracemalloc.start()
+
+
+def configure_logging(filename=LOG_FILE, level=LOG_LEVEL):
+    """Set up the shared log file once; later calls are no-ops."""
+    root = logging.getLogger()
+    if getattr(configure_logging, 'done', False):
+        return root
+    logging.basicConfig(filename=filename, level=level, format=LOG_FORMAT)
+    configure_logging.done = True
+    return root
+
+
+def configure_profiling(directory=None, profiler='cprofile', trace_memory=False):
+    """
+    Dump a profile of every outermost stage into directory (None disables).
+
+    profiler is 'cprofile' (.prof files for pstats/snakeviz) or 'pyinstrument'
+    (.html, needs the optional pyinstrument package). trace_memory starts
+    tracemalloc so stages report their peak allocation; it slows pandas code
+    down noticeably, so it is off unless asked for.
+    """
+    if profiler not in ('cprofile', 'pyinstrument'):
+        raise ValueError(f"Unknown profiler: {profiler}")
+    _profiling['directory'] = directory
+    _profiling['profiler'] = profiler
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class StageRecord:
+    """Measurements for one run of a stage."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_memory = None
+        self.error = False
+        self._child_peak = 0
+
+
+class StageMetrics:
+    """Thread-safe running totals per stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, record):
+        with self._lock:
+            totals = self._stages.setdefault(record.name, {
+                'calls': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                'rows': 0, 'last_wall_seconds': 0.0, 'peak_memory_bytes': None,
+            })
+            totals['calls'] += 1
+            totals['errors'] += record.error
+            totals['wall_seconds'] += record.wall_seconds
+            totals['cpu_seconds'] += record.cpu_seconds
+            totals['rows'] += record.rows or 0
+            totals['last_wall_seconds'] = record.wall_seconds
+            if record.peak_memory is not None:
+                totals['peak_memory_bytes'] = max(totals['peak_memory_bytes'] or 0, record.peak_memory)
+
+    def snapshot(self):
+        """Copy of the totals, keyed by stage name."""
+        with self._lock:
+            return {name: dict(totals) for name, totals in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+stage_metrics = StageMetrics()
+
+
+def _start_profiler(name):
+    directory = _profiling['directory']
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    if _profiling['profiler'] == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler, path + '.prof'
+    profiler.start()
+    return profiler, path + '.html'
+
+
+def _stop_profiler(profiler, path):
+    if hasattr(profiler, 'dump_stats'):
+        profiler.disable()
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    logging.info(f"Wrote profile {path}")
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Time the enclosed block as stage name and yield its StageRecord.
+
+    Set record.rows inside the block if the row count is only known there.
+    Stages nest: an outer stage's time and peak memory include its inner
+    stages, and only the outermost one is profiled.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    record = StageRecord(name, rows)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Carry the enclosing stage's peak so far before resetting it for this one
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        tracemalloc.reset_peak()
+        memory_start = current
+    profiler = None if stack else _start_profiler(name)
+    stack.append(record)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    except BaseException:
+        record.error = True
+        raise
+    finally:
+        record.wall_seconds = time.perf_counter() - wall_start
+        record.cpu_seconds = time.process_time() - cpu_start
+        stack.pop()
+        if tracing and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], record._child_peak)
+            record.peak_memory = max(peak - memory_start, 0)
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        if profiler is not None:
+            _stop_profiler(*profiler)
+        stage_metrics.record(record)
+        logging.debug(f"Stage {name}: {record.wall_seconds:.3f}s wall, {record.cpu_seconds:.3f}s CPU, "
+                      f"{record.rows} rows, peak memory {record.peak_memory}")
+
+
+def format_stage_report(stages=stage_metrics):
+    """Plain-text table of stage totals, slowest first."""
+    lines = [f"{'stage':<40} {'calls':>5} {'wall s':>9} {'cpu s':>9} {'rows':>10} {'peak MB':>8}"]
+    for name, totals in sorted(stages.snapshot().items(), key=lambda item: -item[1]['wall_seconds']):
+        peak = totals['peak_memory_bytes']
+        lines.append(f"{name:<40} {totals['calls']:>5} {totals['wall_seconds']:>9.3f} {totals['cpu_seconds']:>9.3f} "
+                     f"{totals['rows']:>10} {'-' if peak is None else f'{peak / 2**20:.1f}':>8}")
+    return "\n".join(lines)
+
+
+def _frame_rows(args, result):
+    """Default row count: the length of self.data after the call, if any."""
+    data = getattr(args[0], 'data', None) if args else None
+    return len(data) if data is not None else None
+
+
+def instrumented(name=None, rows=_frame_rows):
+    """
+    Decorator running a function as a stage.
+
+    rows(args, result) gives the row count; by default it is len(self.data).
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if record.rows is None and rows is not None:
+                    record.rows = rows(args, result)
+                return result
+        return wrapper
+    return decorate
+
+
+def timed_iter(name, iterable):
+    """Yield from iterable, timing each step (but not the consumer) as stage name."""
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as record:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            record.rows = len(item)
+        yield item
+
+
+class RequestMetrics:
+    """Request counts and latency histograms per endpoint and status code."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, endpoint, status, seconds):
+        with self._lock:
+            series = self._series.setdefault((endpoint, str(status)), {
+                'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0,
+            })
+            series['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+            series['sum'] += seconds
+            series['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {'buckets': list(series['buckets']), 'sum': series['sum'], 'count': series['count']}
+                    for key, series in self._series.items()}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    """Prometheus label set, e.g. {stage="fetch_data"}."""
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _max_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def render_prometheus(request_metrics=None, caches=None, stages=stage_metrics):
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    caches maps a cache name to a (hits, misses) pair.
+    """
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+    if request_metrics is not None:
+        requests = sorted(request_metrics.snapshot().items())
+        # Histogram series carry _bucket/_sum/_count suffixes, so they are written out here
+        lines.append("# HELP weather_request_duration_seconds Request latency, including streamed bodies.")
+        lines.append("# TYPE weather_request_duration_seconds histogram")
+        for (endpoint, status), series in requests:
+            cumulative = 0
+            for bound, count in zip(request_metrics.buckets + ('+Inf',), series['buckets']):
+                cumulative += count
+                lines.append(f"weather_request_duration_seconds_bucket"
+                             f"{_labels(endpoint=endpoint, status=status, le=bound)} {cumulative}")
+            lines.append(f"weather_request_duration_seconds_sum{_labels(endpoint=endpoint, status=status)} "
+                         f"{series['sum']}")
+            lines.append(f"weather_request_duration_seconds_count{_labels(endpoint=endpoint, status=status)} "
+                         f"{series['count']}")
+
+    if caches:
+        metric('weather_cache_hits_total', 'counter', 'Cache lookups served from memory or disk.',
+               [(_labels(cache=name), hits) for name, (hits, _) in caches.items()])
+        metric('weather_cache_misses_total', 'counter', 'Cache lookups that had to recompute.',
+               [(_labels(cache=name), misses) for name, (_, misses) in caches.items()])
+        metric('weather_cache_hit_ratio', 'gauge', 'Hits over lookups since start (0 before any lookup).',
+               [(_labels(cache=name), hits / (hits + misses) if hits + misses else 0.0)
+                for name, (hits, misses) in caches.items()])
+
+    snapshot = sorted(stages.snapshot().items())
+    metric('weather_stage_calls_total', 'counter', 'Analysis stage runs.',
+           [(_labels(stage=name), totals['calls']) for name, totals in snapshot])
+    metric('weather_stage_errors_total', 'counter', 'Analysis stage runs that raised.',
+           [(_labels(stage=name), totals['errors']) for name, totals in snapshot])
+    metric('weather_stage_wall_seconds_total', 'counter', 'Wall-clock time spent in each stage.',
+           [(_labels(stage=name), totals['wall_seconds']) for name, totals in snapshot])
+    metric('weather_stage_cpu_seconds_total', 'counter', 'Process CPU time spent in each stage.',
+           [(_labels(stage=name), totals['cpu_seconds']) for name, totals in snapshot])
+    metric('weather_stage_rows_total', 'counter', 'Rows processed by each stage.',
+           [(_labels(stage=name), totals['rows']) for name, totals in snapshot])
+    metric('weather_stage_peak_memory_bytes', 'gauge', 'Largest allocation peak seen in a stage (needs tracemalloc).',
+           [(_labels(stage=name), totals['peak_memory_bytes']) for name, totals in snapshot
+            if totals['peak_memory_bytes'] is not None])
+
+    rss = _max_rss_bytes()
+    if rss is not None:
+        metric('weather_process_max_rss_bytes', 'gauge', 'Peak resident set size of the process.', [('', rss)])
+    return "\n".join(lines) + "\n"
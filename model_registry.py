@@ -0,0 +1,229 @@
+"""
+Persisted forecasting models and a batching front end for serving them.
+
+Each model is stored as <name>.joblib next to <name>.json holding its
+feature list, training data hash and metrics. Loaded models live in a small
+LRU cache, and concurrent predictions for the same model are coalesced into
+one model.predict call.
+"""
+import os
+import re
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# joblib is imported by save/load, so importing the app does not load it
+
+DEFAULT_MODEL_DIR = "models"
+
+
+def frame_digest(frame):
+    """Stable hash of a DataFrame's contents, used to tie a model to its training data."""
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class PredictionBatcher:
+    """Coalesces concurrent predict calls for one model into a single model.predict."""
+
+    def __init__(self, model, max_batch=1024, max_wait=0.005):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        # Guards closed, so no request is queued behind the stop sentinel
+        self._lock = threading.Lock()
+        self.closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def predict(self, rows):
+        """
+        Predict for a 2-D array of feature rows; blocks until the batch containing it runs.
+
+        A closed batcher (e.g. evicted from the registry while a caller still
+        held it) predicts inline instead of queueing to the stopped worker.
+        """
+        rows = np.asarray(rows, dtype='float64')
+        # Checked before queueing, so one malformed request cannot fail the batch it lands in
+        if not len(rows):
+            return np.empty(0)
+        width = getattr(self.model, 'n_features_in_', None)
+        if rows.ndim != 2 or (width is not None and rows.shape[1] != width):
+            raise ValueError(f"Expected rows of {width or 'equal-length'} features, got shape {rows.shape}")
+        request = {'rows': rows, 'done': threading.Event()}
+        with self._lock:
+            queued = not self.closed
+            if queued:
+                self._requests.put(request)
+        if queued:
+            request['done'].wait()
+        else:
+            self._serve([request])
+        if 'error' in request:
+            raise request['error']
+        return request['result']
+
+    def close(self):
+        """Stop the worker thread once queued requests are served; later predicts run inline."""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._requests.put(None)
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(batch[0]['rows'])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Serve what we have, then stop
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+                size += len(request['rows'])
+            self._serve(batch)
+
+    def _serve(self, batch):
+        """Run one model.predict for a batch of requests and hand each its slice."""
+        try:
+            features = np.vstack([r['rows'] for r in batch])
+            if hasattr(self.model, 'feature_names_in_'):
+                features = pd.DataFrame(features, columns=self.model.feature_names_in_)
+            predictions = self.model.predict(features)
+            offset = 0
+            for request in batch:
+                count = len(request['rows'])
+                request['result'] = predictions[offset:offset + count]
+                offset += count
+        except Exception as e:
+            logging.error(f"Error in batched prediction: {e}")
+            for request in batch:
+                request['error'] = e
+        for request in batch:
+            request['done'].set()
+
+
+class ModelRegistry:
+    """Saves fitted models with their metadata and serves them from an LRU cache."""
+
+    def __init__(self, root=DEFAULT_MODEL_DIR, max_loaded=8):
+        self.root = root
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # Model name -> lock held while that model is read from disk
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name, extension):
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        if safe_name != name:
+            # Tell "New York" from "New_York"; '@' never survives the substitution, so no plain name collides
+            safe_name += '@' + hashlib.blake2b(name.encode(), digest_size=4).hexdigest()
+        return os.path.join(self.root, safe_name + extension)
+
+    def save(self, name, model, feature_columns, data_hash, metrics):
+        """Persist a fitted model with its feature list, training data hash and metrics."""
+        os.makedirs(self.root, exist_ok=True)
+        metadata = {
+            'name': name,
+            'feature_columns': list(feature_columns),
+            'data_hash': data_hash,
+            'metrics': {key: float(value) for key, value in metrics.items()},
+            'saved_at': time.time(),
+        }
+        import joblib
+        joblib.dump(model, self._path(name, ".joblib"))
+        with open(self._path(name, ".json"), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        with self._lock:
+            # Drop any stale copy so the next request loads the new model
+            stale = self._loaded.pop(name, None)
+        if stale is not None:
+            stale[0].close()
+        logging.info(f"Saved model {name} to {self.root}")
+        return metadata
+
+    def metadata(self, name):
+        """Metadata saved with a model; raises KeyError if there is no such model."""
+        try:
+            with open(self._path(name, ".json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"No saved model named {name}")
+
+    def load(self, name):
+        """Return (batcher, metadata) for a model, loading it from disk on first use."""
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                self.hits += 1
+                return self._loaded[name]
+            loading = self._loading.setdefault(name, threading.Lock())
+        # Read from disk outside the registry lock, so a cold load does not block cached models;
+        # the per-name lock keeps concurrent requests for the same model to one read
+        with loading:
+            with self._lock:
+                if name in self._loaded:
+                    self.hits += 1
+                    return self._loaded[name]
+                self.misses += 1
+            try:
+                metadata = self.metadata(name)
+                import joblib
+                model = joblib.load(self._path(name, ".joblib"))
+            except Exception:
+                with self._lock:
+                    self._loading.pop(name, None)
+                raise
+            entry = (PredictionBatcher(model), metadata)
+            evicted = []
+            with self._lock:
+                self._loaded[name] = entry
+                self._loading.pop(name, None)
+                while len(self._loaded) > self.max_loaded:
+                    evicted.append(self._loaded.popitem(last=False)[1][0])
+        # Callers still holding an evicted batcher fall back to inline predictions
+        for batcher in evicted:
+            batcher.close()
+        return entry
+
+    def predict(self, name, rows):
+        """
+        Predict with a saved model.
+
+        rows is a list of {feature: value} dicts; missing features raise ValueError.
+        """
+        batcher, metadata = self.load(name)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("rows must be a list of {feature: value} objects")
+        if not rows:
+            return []
+        features = metadata['feature_columns']
+        missing = sorted({f for row in rows for f in features if f not in row})
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        try:
+            matrix = [[float(row[f]) for f in features] for row in rows]
+        except TypeError as e:
+            raise ValueError(f"Feature values must be numbers: {e}")
+        return batcher.predict(matrix).tolist()
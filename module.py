@@ -1,53 +1,306 @@
-import pandas as pd
-import csv
-import logging
-from flask_sqlalchemy import SQLAlchemy
-from flask import Flask
-
-logging.basicConfig(filename="weather_analysis.log", 
-                    level=logging.ERROR, 
-                    format="%(asctime)s - %(levelname)s - %(message)s")
-
-# Flask app setup
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///weather_app.db'
-db = SQLAlchemy(app)
-
-class WeatherData(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    location = db.Column(db.String(100), nullable=False)
-    date_time = db.Column(db.String(100), nullable=False)
-    temperature = db.Column(db.Float, nullable=False)
-    humidity = db.Column(db.Float, nullable=True)
-    precipitation = db.Column(db.Float, nullable=True)
-    wind_speed = db.Column(db.Float, nullable=True)
-
-class DataFetcher:
-    def __init__(self, file_name):
-        self.file_name = file_name
-
-    def csv_pandas(self):
-        """Reads a CSV file into a pandas DataFrame."""
-        try:
-            data_frame = pd.read_csv(self.file_name)
-            data_frame.columns = data_frame.columns.str.strip()
-            return data_frame
-        except Exception as e:
-            logging.error(f"Error reading CSV: {e}")
-            return None
-
-def populate_database(file_name):
-    fetcher = DataFetcher(file_name)
-    data_frame = fetcher.csv_pandas()
-    if data_frame is not None:
-        for _, row in data_frame.iterrows():
-            weather_entry = WeatherData(
-                location=row['Location'],
-                date_time=row['Date_Time'],
-                temperature=row['Temperature_C'],
-                humidity=row['Humidity_pct'],
-                precipitation=row['Precipitation_mm'],
-                wind_speed=row['Wind_Speed_kmh']
-            )
-            db.session.add(weather_entry)
-        db.session.commit()
+import os
+from datetime import datetime
+import pandas as pd
+import logging
+from sqlalchemy import func, insert, select, tuple_, update
+from flask_sqlalchemy import SQLAlchemy
+from flask import Flask
+from database import configure_app
+from data_fetcher import DataFetcher, source_files  # DataFetcher is re-exported for existing callers
+from ingest import TailReader, Watermarks, offset_after_rows
+from instrumentation import configure_logging, instrumented, stage, timed_iter
+
+configure_logging()
+
+# Flask app setup; engine settings are shared with app.py through database.py
+app = Flask(__name__)
+db = SQLAlchemy()
+configure_app(app, db)
+
+class WeatherData(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    location = db.Column(db.String(100), nullable=False)
+    date_time = db.Column(db.DateTime, nullable=False)
+    temperature = db.Column(db.Float, nullable=False)
+    humidity = db.Column(db.Float, nullable=True)
+    precipitation = db.Column(db.Float, nullable=True)
+    wind_speed = db.Column(db.Float, nullable=True)
+
+    # SQLite appends the rowid to every index, so both also serve (date_time, id) keyset scans
+    __table_args__ = (
+        db.Index('ix_weather_data_location_date_time', 'location', 'date_time'),
+        db.Index('ix_weather_data_date_time', 'date_time'),
+    )
+
+class TableStats(db.Model):
+    """Row counts maintained on ingest so pages never run COUNT(*)."""
+    table_name = db.Column(db.String(100), primary_key=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+
+class IngestLog(db.Model):
+    """How many data rows of each source CSV are already in weather_data."""
+    source = db.Column(db.String(500), primary_key=True)
+    rows_loaded = db.Column(db.Integer, nullable=False, default=0)
+
+class IngestCursor(db.Model):
+    """Byte offset up to which each source CSV has been loaded, and the header it was read with."""
+    source = db.Column(db.String(500), primary_key=True)
+    byte_offset = db.Column(db.BigInteger, nullable=False, default=0)
+    header = db.Column(db.Text, nullable=False, default='')
+
+class LocationWatermark(db.Model):
+    """Latest date_time loaded per location; ingest skips rows at or before it."""
+    location = db.Column(db.String(100), primary_key=True)
+    max_date_time = db.Column(db.DateTime, nullable=False)
+
+# CSV header -> WeatherData column
+CSV_COLUMNS = {
+    'Location': 'location',
+    'Date_Time': 'date_time',
+    'Temperature_C': 'temperature',
+    'Humidity_pct': 'humidity',
+    'Precipitation_mm': 'precipitation',
+    'Wind_Speed_kmh': 'wind_speed',
+}
+
+# Applied for the duration of a bulk load only
+LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-65536',  # 64 MiB page cache
+}
+
+def _set_pragmas(connection, pragmas):
+    """Apply SQLite pragmas on a connection and return their previous values."""
+    previous = {}
+    for name, value in pragmas.items():
+        previous[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+    connection.commit()
+    return previous
+
+def _add_to_row_count(connection, count):
+    """Bump the cached weather_data row count inside the caller's transaction."""
+    stats_table = TableStats.__table__
+    table_name = WeatherData.__tablename__
+    updated = connection.execute(
+        update(stats_table).where(stats_table.c.table_name == table_name)
+        .values(row_count=stats_table.c.row_count + count)
+    ).rowcount
+    if not updated:
+        # First load (or a database created before the cache existed): seed it from COUNT(*)
+        total = connection.execute(select(func.count()).select_from(WeatherData.__table__)).scalar()
+        connection.execute(insert(stats_table), {'table_name': table_name, 'row_count': total})
+
+def cached_row_count():
+    """Returns the number of weather_data rows without scanning the table."""
+    entry = db.session.get(TableStats, WeatherData.__tablename__)
+    if entry is not None:
+        return entry.row_count
+    total = WeatherData.query.count()
+    db.session.add(TableStats(table_name=WeatherData.__tablename__, row_count=total))
+    db.session.commit()
+    return total
+
+def encode_cursor(entry):
+    """Encodes a row's (date_time, id) sort key as a page cursor."""
+    return f"{entry.date_time.isoformat()}_{entry.id}"
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor."""
+    date_time, _, row_id = cursor.rpartition('_')
+    return datetime.fromisoformat(date_time), int(row_id)
+
+def fetch_page(per_page=100, after=None, before=None, location=None, start=None, end=None, engine=None):
+    """
+    Keyset pagination over weather_data ordered by (date_time, id).
+
+    after / before are cursors from encode_cursor; the cost of a page does not
+    depend on how deep it is. Returns (rows, next_cursor, prev_cursor), where a
+    cursor is None when there is nothing further in that direction. engine
+    overrides the session's bind, e.g. to read from the read-only replica.
+    """
+    query = WeatherData.query
+    if location:
+        query = query.filter(WeatherData.location == location)
+    if start is not None:
+        query = query.filter(WeatherData.date_time >= start)
+    if end is not None:
+        query = query.filter(WeatherData.date_time < end)
+
+    sort_key = tuple_(WeatherData.date_time, WeatherData.id)
+    if before:
+        query = query.filter(sort_key < tuple_(*decode_cursor(before)))
+        query = query.order_by(WeatherData.date_time.desc(), WeatherData.id.desc())
+    else:
+        if after:
+            query = query.filter(sort_key > tuple_(*decode_cursor(after)))
+        query = query.order_by(WeatherData.date_time, WeatherData.id)
+
+    # One extra row tells us whether another page exists
+    query = query.limit(per_page + 1)
+    if engine is not None:
+        rows = db.session.execute(query.statement, bind_arguments={'bind': engine}).scalars().all()
+    else:
+        rows = query.all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and after else None
+    return rows, next_cursor, prev_cursor
+
+# Columns the JSON API may project
+API_COLUMNS = ('location', 'date_time', 'temperature', 'humidity', 'precipitation', 'wind_speed')
+
+def iter_weather_rows(engine, columns=API_COLUMNS, location=None, start=None, end=None, batch_size=1000):
+    """
+    Yields batches of weather_data rows as tuples, in (date_time, id) order.
+
+    Rows are pulled from a server-side cursor batch_size at a time, so a
+    large date range is never materialized in memory. The connection is
+    released when the generator is exhausted or closed.
+    """
+    table = WeatherData.__table__
+    query = select(*[table.c[name] for name in columns])
+    if location:
+        query = query.where(table.c.location == location)
+    if start is not None:
+        query = query.where(table.c.date_time >= start)
+    if end is not None:
+        query = query.where(table.c.date_time < end)
+    query = query.order_by(table.c.date_time, table.c.id)
+
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for batch in result.partitions():
+            yield batch
+
+def _load_ingest_state(connection, files):
+    """
+    Read the byte offsets of files and the per-location watermarks.
+
+    Offsets of sources only known to IngestLog (loaded before byte offsets
+    were kept) are rebuilt from their row counts once, and the watermarks
+    are seeded from weather_data the first time they are needed.
+    """
+    log_table = IngestLog.__table__
+    cursor_table = IngestCursor.__table__
+    mark_table = LocationWatermark.__table__
+    offsets = {}
+    for file_path in files:
+        source = os.path.abspath(file_path)
+        cursor = connection.execute(
+            select(cursor_table.c.byte_offset, cursor_table.c.header).where(cursor_table.c.source == source)
+        ).first()
+        if cursor is None:
+            rows_loaded = connection.execute(
+                select(log_table.c.rows_loaded).where(log_table.c.source == source)
+            ).scalar()
+            if rows_loaded is None:
+                connection.execute(insert(log_table), {'source': source, 'rows_loaded': 0})
+                continue
+            with open(file_path, 'rb') as f:
+                header = f.readline().decode()
+            cursor = (offset_after_rows(file_path, rows_loaded), header)
+            connection.execute(insert(cursor_table), {'source': source, 'byte_offset': cursor[0], 'header': header})
+        offsets[source] = {'offset': cursor[0], 'header': cursor[1]}
+
+    marks = dict(connection.execute(select(mark_table.c.location, mark_table.c.max_date_time)).all())
+    if not marks:
+        table = WeatherData.__table__
+        marks = dict(connection.execute(
+            select(table.c.location, func.max(table.c.date_time)).group_by(table.c.location)
+        ).all())
+        if marks:
+            connection.execute(insert(mark_table), [
+                {'location': location, 'max_date_time': latest} for location, latest in marks.items()
+            ])
+    return offsets, marks
+
+def _save_ingest_state(connection, source, state, rows_consumed, marks, latest):
+    """Record a loaded chunk's offset, row count and watermarks inside the caller's transaction."""
+    cursor_table = IngestCursor.__table__
+    mark_table = LocationWatermark.__table__
+    updated = connection.execute(
+        update(cursor_table).where(cursor_table.c.source == source)
+        .values(byte_offset=state['offset'], header=state['header'])
+    ).rowcount
+    if not updated:
+        connection.execute(insert(cursor_table), {
+            'source': source, 'byte_offset': state['offset'], 'header': state['header'],
+        })
+    log_table = IngestLog.__table__
+    connection.execute(
+        update(log_table).where(log_table.c.source == source)
+        .values(rows_loaded=log_table.c.rows_loaded + rows_consumed)
+    )
+    for location, date_time in latest.items():
+        date_time = date_time.to_pydatetime()
+        if location not in marks:
+            connection.execute(insert(mark_table), {'location': location, 'max_date_time': date_time})
+        elif date_time > marks[location]:
+            connection.execute(
+                update(mark_table).where(mark_table.c.location == location).values(max_date_time=date_time)
+            )
+        else:
+            continue
+        marks[location] = date_time
+
+@instrumented(rows=lambda args, inserted: inserted)
+def populate_database(file_name, chunk_size=50000):
+    """
+    Bulk-loads a weather CSV, or a directory of CSVs, into the weather_data table.
+
+    Each file is read from the byte offset where the previous run stopped, in
+    chunks; every chunk is written with a single executemany inside its own
+    transaction, together with the new offset. Re-running the load therefore
+    only parses and appends what was added since, and a half-written last
+    line is left for the next run. Rows at or before the latest date_time
+    loaded for their location before the current file was started are
+    skipped, so files that overlap do not create duplicates.
+
+    Returns the number of rows inserted.
+    """
+    files = source_files(file_name)
+    inserted = 0
+    with db.engine.connect() as connection:
+        previous_pragmas = _set_pragmas(connection, LOAD_PRAGMAS)
+        try:
+            with connection.begin():
+                offsets, marks = _load_ingest_state(connection, files)
+            current_file = None
+
+            # Readings keep float64 so the stored values match the CSV text exactly
+            tail = TailReader(file_name, offsets, dtypes=None)
+            chunks = timed_iter('populate_database.read_csv', tail.iter_new(chunk_size))
+            for file_path, chunk, state in chunks:
+                if file_path != current_file:
+                    # Rows of one file are only filtered against what earlier files and runs loaded
+                    watermarks = Watermarks(marks)
+                    current_file = file_path
+                with stage('populate_database.prepare', rows=len(chunk)):
+                    rows_consumed = len(chunk)
+                    chunk = chunk.dropna(subset=['Location', 'Date_Time', 'Temperature_C'])
+                    chunk = watermarks.select_new(chunk)
+                    latest = watermarks.latest(chunk)
+                    chunk = chunk[list(CSV_COLUMNS)].rename(columns=CSV_COLUMNS)
+                    records = chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+                with stage('populate_database.insert', rows=len(records)), connection.begin():
+                    if records:
+                        connection.execute(insert(WeatherData.__table__), records)
+                        _add_to_row_count(connection, len(records))
+                    _save_ingest_state(connection, os.path.abspath(file_path), state, rows_consumed, marks, latest)
+                tail.commit(file_path, state)
+                inserted += len(records)
+            logging.info(f"Loaded {inserted} new rows from {file_name}")
+            return inserted
+        except Exception as e:
+            logging.error(f"Error populating database: {e}")
+            raise
+        finally:
+            _set_pragmas(connection, previous_pragmas)
@@ -0,0 +1,181 @@
+"""
+Chart rendering off the request path.
+
+Charts are drawn with the object-oriented Figure API (no pyplot global
+state), so they are safe to render from worker threads. Each chart is keyed
+by a content hash of the aggregates it plots; when the hash matches the one
+recorded for the target file, rendering is skipped. The same hash is served
+as the image's ETag. Hashes are kept in a .charts.json next to the images
+(or in one state_path), and entries of deleted images are dropped.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from instrumentation import instrumented
+
+# Bump when chart styling changes so existing images are redrawn
+RENDER_VERSION = 1
+
+# Per-directory record of the content hash behind each rendered image
+STATE_FILE_NAME = ".charts.json"
+
+
+def content_hash(name, data):
+    """Hash of a chart name and the DataFrame/array it plots."""
+    digest = hashlib.blake2b(f"{name}:v{RENDER_VERSION}".encode(), digest_size=16)
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        columns = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+        digest.update(repr(columns).encode())
+    else:
+        for part in data:
+            digest.update(np.ascontiguousarray(part).tobytes())
+    return digest.hexdigest()
+
+
+def _new_figure(**kwargs):
+    # matplotlib is imported on the first render rather than with this module
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+
+def daily_avg_figure(daily_data):
+    """Line chart of daily average temperature over bars of daily precipitation."""
+    fig = _new_figure(figsize=(12, 6))
+    ax1 = fig.add_subplot()
+    ax2 = ax1.twinx()
+    ax1.plot(daily_data.index, daily_data['avg_temp'], 'g-', label="Avg Temp (°C)")
+    ax2.bar(daily_data.index, daily_data['avg_precip'], color='blue', alpha=0.5, label="Avg Precip (mm)")
+
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('Temperature (°C)', color='green')
+    ax2.set_ylabel('Precipitation (mm)', color='blue')
+    ax1.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+def temperature_histogram_figure(histogram):
+    """Histogram from precomputed (counts, bin_edges)."""
+    counts, edges = histogram
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color='skyblue', edgecolor='black')
+    ax.set_xlabel('Temperature (°C)')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Temperature Distribution')
+    return fig
+
+
+def actual_vs_predicted_figure(daily_results, title):
+    """Daily average actual vs predicted temperatures."""
+    fig = _new_figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    ax.plot(daily_results['Date'], daily_results['Actual'], label="Actual", color="blue", linestyle='-', marker='o', alpha=0.7)
+    ax.plot(daily_results['Date'], daily_results['Predicted'], label="Predicted", color="red", linestyle='--', marker='x', alpha=0.7)
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Temperature (°C)")
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+class ChartRenderer:
+    """Renders charts in a background thread pool, skipping unchanged ones."""
+
+    def __init__(self, max_workers=2, state_path=None):
+        # None keeps the hashes in a STATE_FILE_NAME next to each output directory's images
+        self.state_path = state_path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart")
+        self._lock = threading.Lock()
+        # State file -> {absolute image path: content hash}, loaded on first use
+        self._states = {}
+        self.rendered = 0
+        self.skipped = 0
+
+    def _state_file(self, key):
+        return self.state_path or os.path.join(os.path.dirname(key), STATE_FILE_NAME)
+
+    def _hashes(self, key):
+        """The hashes recorded alongside image path key; call with the lock held."""
+        state_file = self._state_file(key)
+        if state_file not in self._states:
+            try:
+                with open(state_file) as f:
+                    hashes = json.load(f)
+            except (FileNotFoundError, ValueError):
+                hashes = {}
+            self._states[state_file] = {path: digest for path, digest in hashes.items() if os.path.exists(path)}
+        return self._states[state_file]
+
+    def _write_state(self, key):
+        state_file = self._state_file(key)
+        hashes = self._states[state_file]
+        for path in [path for path in hashes if not os.path.exists(path)]:
+            del hashes[path]
+        os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+        tmp_path = state_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, state_file)
+
+    def etag(self, save_path):
+        """Content hash of the image last rendered to save_path, or None."""
+        key = os.path.abspath(save_path)
+        with self._lock:
+            return self._hashes(key).get(key)
+
+    def submit(self, figure_func, data, save_path, *args):
+        """
+        Render figure_func(data, *args) to save_path in the background.
+
+        Returns a Future resolving to save_path. If the image on disk was
+        rendered from identical data, nothing is redrawn.
+        """
+        key = os.path.abspath(save_path)
+        digest = content_hash(figure_func.__name__ + repr(args), data)
+        with self._lock:
+            unchanged = self._hashes(key).get(key) == digest and os.path.exists(save_path)
+        if unchanged:
+            self.skipped += 1
+            future = Future()
+            future.set_result(save_path)
+            return future
+        return self._executor.submit(self._render, figure_func, data, save_path, args, key, digest)
+
+    @instrumented('render_chart', rows=None)
+    def _render(self, figure_func, data, save_path, args, key, digest):
+        try:
+            fig = figure_func(data, *args)
+            # Write next to the target and swap in, so readers never see a partial PNG
+            root, extension = os.path.splitext(save_path)
+            tmp_path = f"{root}.{threading.get_ident()}.tmp{extension}"
+            try:
+                fig.savefig(tmp_path, bbox_inches='tight')
+                os.replace(tmp_path, save_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            with self._lock:
+                self._hashes(key)[key] = digest
+                self.rendered += 1
+                self._write_state(key)
+            logging.info(f"Rendered chart {save_path}")
+            return save_path
+        except Exception as e:
+            logging.error(f"Error rendering chart {save_path}: {e}")
+            raise
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+# Shared by WeatherAnalysis and the Flask app
+chart_renderer = ChartRenderer()
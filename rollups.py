@@ -0,0 +1,222 @@
+"""
+Pre-aggregated hourly, daily and monthly rollups per location.
+
+Each grain keeps sum, non-null count, min and max for every measure, indexed
+by (Location, bucket start). These merge exactly, so rollups can be built
+once and then updated with only the newly appended rows, and queries read
+O(buckets) instead of O(rows). An update only aggregates the new rows; the
+partial rollups are merged into the tables on the next read, so a run of
+refreshes between two queries pays for one merge.
+"""
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+
+GRAINS = ('hourly', 'daily', 'monthly')
+MEASURES = ('Temperature_C', 'Humidity_pct', 'Precipitation_mm', 'Wind_Speed_kmh')
+STATS = ('sum', 'count', 'min', 'max')
+
+# How partial rollups of the same bucket combine
+_MERGE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _merge_rules(table):
+    """groupby().agg spec combining partial rollups column by column."""
+    return {column: _MERGE[column.rsplit('_', 1)[1]] for column in table.columns}
+
+
+def bucket_start(date_times, grain):
+    """Start of the hourly/daily/monthly bucket containing each timestamp."""
+    if grain == 'hourly':
+        return date_times.dt.floor('h')
+    if grain == 'daily':
+        return date_times.dt.floor('D')
+    if grain == 'monthly':
+        return date_times.dt.to_period('M').dt.to_timestamp()
+    raise ValueError(f"Unknown grain: {grain}")
+
+
+class RollupStore:
+    """Per-location rollups at several time grains, updatable with appended rows."""
+
+    def __init__(self, measures=MEASURES):
+        self.measures = list(measures)
+        self._tables = {grain: None for grain in GRAINS}
+        # Partial rollups of updates not yet merged into _tables
+        self._pending = {grain: [] for grain in GRAINS}
+        self._lock = threading.Lock()
+        self.row_count = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def tables(self):
+        """grain -> rollup table (None before any rows), with pending updates merged in."""
+        with self._lock:
+            for grain in GRAINS:
+                if self._pending[grain]:
+                    self._tables[grain] = self._merge(self._tables[grain], self._pending[grain])
+                    self._pending[grain] = []
+            return dict(self._tables)
+
+    @staticmethod
+    def _merge(table, partials):
+        """Combine a table with partial rollups, merging only the buckets present in several of them."""
+        combined = pd.concat(partials if table is None else [table, *partials])
+        shared = combined.index.duplicated(keep=False)
+        if shared.any():
+            merged = combined[shared].groupby(level=[0, 1]).agg(_merge_rules(combined))
+            combined = pd.concat([combined[~shared], merged])
+        if not combined.index.is_monotonic_increasing:
+            combined = combined.sort_index()
+        return combined
+
+    @classmethod
+    def from_frame(cls, data, measures=MEASURES):
+        """Build rollups for a whole frame."""
+        return cls([m for m in measures if m in data.columns]).update(data)
+
+    def _hourly(self, data):
+        """Hourly rollup straight from raw rows."""
+        # Rows without a Location belong to no city (astype(str) would make them one called "nan")
+        keyed = data['Location'].notna()
+        if not keyed.all():
+            data = data[keyed]
+        bucket = bucket_start(data['Date_Time'], 'hourly').rename('Date_Time')
+        grouped = data.groupby([data['Location'].astype(str), bucket])[self.measures]
+        table = grouped.agg(list(STATS))
+        table.columns = [f"{measure}_{stat}" for measure, stat in table.columns]
+        return table
+
+    @staticmethod
+    def _coarsen(table, grain):
+        """Roll a finer table up to a coarser grain without touching raw rows."""
+        buckets = bucket_start(table.index.get_level_values(1).to_series(), grain).rename('Date_Time')
+        keys = [table.index.get_level_values(0), buckets.to_numpy()]
+        return table.groupby(keys).agg(_merge_rules(table)).rename_axis(['Location', 'Date_Time'])
+
+    def update(self, new_rows):
+        """
+        Fold newly appended rows into every grain.
+
+        Aggregating costs O(len(new_rows)); merging into the stored tables
+        (O(buckets)) waits for the next read, once for all updates since.
+        """
+        if new_rows.empty:
+            return self
+        partial = self._hourly(new_rows)
+        partials = {}
+        for grain in GRAINS:
+            if grain != 'hourly':
+                partial = self._coarsen(partial, grain)
+            partials[grain] = partial
+        with self._lock:
+            for grain, partial in partials.items():
+                self._pending[grain].append(partial)
+            self.row_count += len(new_rows)
+        return self
+
+    def query(self, grain='daily', location=None, start=None, end=None):
+        """
+        Mean, min and max per bucket for one location, or across all locations.
+
+        Returns a frame indexed by bucket start with <measure>_mean/_min/_max columns.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"Unknown grain: {grain}")
+        table = self.tables[grain]
+        if table is None:
+            return pd.DataFrame()
+
+        if location is not None:
+            if location not in table.index.get_level_values(0):
+                return pd.DataFrame()
+            table = table.xs(location, level=0)
+        else:
+            table = table.groupby(level=1).agg(_merge_rules(table))
+        if start is not None:
+            table = table[table.index >= pd.Timestamp(start)]
+        if end is not None:
+            table = table[table.index < pd.Timestamp(end)]
+        return self._finish(table)
+
+    def by_location(self):
+        """Mean, min and max of every measure per location over all time."""
+        table = self.tables['monthly']
+        if table is None:
+            return pd.DataFrame()
+        return self._finish(table.groupby(level=0).agg(_merge_rules(table))).rename_axis('Location')
+
+    def _finish(self, table):
+        result = pd.DataFrame(index=table.index)
+        for measure in self.measures:
+            result[f"{measure}_mean"] = table[f"{measure}_sum"] / table[f"{measure}_count"]
+            result[f"{measure}_min"] = table[f"{measure}_min"]
+            result[f"{measure}_max"] = table[f"{measure}_max"]
+        return result
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points that preserve the visual
+    shape of the (x, y) series. x must be increasing and numeric.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    # Interior points split into threshold - 2 equal buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        areas = np.abs((x[previous] - avg_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(frame, column, max_points):
+    """
+    Keep at most max_points rows of a time-indexed frame, chosen by LTTB on column.
+
+    LTTB needs three points (both ends and one bucket), so smaller caps keep
+    evenly spaced rows instead.
+    """
+    if max_points < 1:
+        raise ValueError(f"max_points must be positive, got {max_points}")
+    if len(frame) <= max_points:
+        return frame
+    valid = frame[column].notna().to_numpy()
+    frame = frame[valid]
+    if max_points < 3:
+        return frame.iloc[np.unique(np.linspace(0, len(frame) - 1, max_points).round().astype('int64'))]
+    x = frame.index.to_numpy(dtype='datetime64[ns]').astype('int64')
+    return frame.iloc[lttb(x, frame[column].to_numpy(), max_points)]
@@ -0,0 +1,175 @@
+"""
+Mergeable accumulators for analysing weather CSVs that do not fit in memory.
+
+Each accumulator is updated one chunk at a time and can be merged with
+another accumulator of the same kind, so partial results from separate
+chunks (or processes) combine into the same answer as a single pass.
+"""
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """Count, sum, min and max of a column, remembering the rows holding the extremes."""
+
+    def __init__(self, column):
+        self.column = column
+        self.count = 0
+        self.total = 0.0
+        self.min_row = None
+        self.max_row = None
+
+    @property
+    def min(self):
+        return None if self.min_row is None else self.min_row[self.column]
+
+    @property
+    def max(self):
+        return None if self.max_row is None else self.max_row[self.column]
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk into the accumulator."""
+        values = chunk[self.column].dropna()
+        if values.empty:
+            return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self._offer(chunk.loc[values.idxmin()], chunk.loc[values.idxmax()])
+        return self
+
+    def merge(self, other):
+        """Combine with another RunningStats over the same column."""
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self._offer(other.min_row, other.max_row)
+        return self
+
+    def _offer(self, min_row, max_row):
+        # Strict comparisons keep the first occurrence, like idxmin/idxmax
+        if self.min_row is None or min_row[self.column] < self.min:
+            self.min_row = min_row
+        if self.max_row is None or max_row[self.column] > self.max:
+            self.max_row = max_row
+
+
+class ValueHistogram:
+    """
+    Fixed-resolution histogram used as a sketch for median and mode.
+
+    Values are rounded to `resolution`, so memory is bounded by the value
+    range divided by the resolution rather than by the number of rows.
+    """
+
+    def __init__(self, resolution=0.01):
+        self.resolution = resolution
+        self.counts = pd.Series(dtype='int64')
+
+    def update(self, values):
+        """Add a Series of values to the histogram."""
+        values = values.dropna()
+        if not values.empty:
+            bins = np.rint(values.to_numpy(dtype='float64') / self.resolution).astype('int64')
+            bin_ids, bin_counts = np.unique(bins, return_counts=True)
+            self.counts = self.counts.add(pd.Series(bin_counts, index=bin_ids), fill_value=0).astype('int64')
+        return self
+
+    def merge(self, other):
+        """Combine with another histogram of the same resolution."""
+        self.counts = self.counts.add(other.counts, fill_value=0).astype('int64')
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile (within one resolution step)."""
+        if self.counts.empty:
+            return None
+        counts = self.counts.sort_index()
+        cumulative = counts.cumsum().to_numpy()
+        # Linear interpolation between ranks, matching Series.quantile
+        position = q * (cumulative[-1] - 1)
+        lower_rank = int(np.floor(position))
+        upper_rank = int(np.ceil(position))
+        lower = counts.index[np.searchsorted(cumulative, lower_rank, side='right')]
+        upper = counts.index[np.searchsorted(cumulative, upper_rank, side='right')]
+        return (lower + (upper - lower) * (position - lower_rank)) * self.resolution
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def mode(self):
+        """Most frequent bin; ties go to the smallest value, as with Series.mode()[0]."""
+        if self.counts.empty:
+            return None
+        counts = self.counts.sort_index()
+        return counts.idxmax() * self.resolution
+
+
+class ColumnSketch:
+    """
+    RunningStats plus a ValueHistogram of one column, for statistics that can grow row by row.
+
+    The histogram's median and mode are exact while every value lies on its
+    grid (readings recorded to two decimals, for resolution 0.01); `exact`
+    turns False as soon as one does not.
+    """
+
+    def __init__(self, column, resolution=0.01):
+        self.stats = RunningStats(column)
+        self.histogram = ValueHistogram(resolution)
+        self.exact = True
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk into the sketch."""
+        values = chunk[self.stats.column].dropna()
+        if self.exact and not values.empty:
+            scaled = values.to_numpy(dtype='float64') / self.histogram.resolution
+            # float32 readings are off the grid by ~1e-4 steps at most
+            self.exact = bool(np.abs(scaled - np.rint(scaled)).max() < 1e-3)
+        self.stats.update(chunk)
+        self.histogram.update(values)
+        return self
+
+
+class GroupAggregates:
+    """Per-group sums and non-null counts, enough to rebuild group means."""
+
+    def __init__(self, by, columns):
+        self.by = by
+        self.columns = list(columns)
+        self.sums = None
+        self.counts = None
+
+    def update(self, chunk):
+        """Fold a DataFrame chunk into the per-group totals."""
+        # Cast before summing so float32 chunks accumulate in float64 too
+        chunk = chunk.astype(dict.fromkeys(self.columns, 'float64'))
+        grouped = chunk.groupby(self.by, observed=True)[self.columns]
+        sums, counts = grouped.sum(), grouped.count()
+        if isinstance(sums.index, pd.CategoricalIndex):
+            # Each chunk has its own category set, so align on the plain labels
+            sums.index = counts.index = sums.index.astype(sums.index.categories.dtype)
+        self._add(sums, counts)
+        return self
+
+    def merge(self, other):
+        """Combine with another GroupAggregates over the same columns."""
+        if other.sums is not None:
+            self._add(other.sums, other.counts)
+        return self
+
+    def _add(self, sums, counts):
+        if self.sums is None:
+            self.sums, self.counts = sums, counts
+        else:
+            self.sums = self.sums.add(sums, fill_value=0)
+            self.counts = self.counts.add(counts, fill_value=0)
+
+    def means(self):
+        """DataFrame of per-group means indexed by the group key."""
+        if self.sums is None:
+            return pd.DataFrame(columns=self.columns)
+        return (self.sums / self.counts).sort_index()
@@ -0,0 +1,143 @@
+"""
+Synthetic hourly weather CSVs with the real schema, for tests and benchmarks.
+
+Each city gets a climate (annual mean, seasonal and daily temperature
+swings, rain probability); readings follow those cycles plus persistent
+AR(1) noise. The file is written one month at a time, ordered by time and
+then city, so memory stays flat from 1M up to 100M+ rows.
+
+Usage:
+    python synthetic_data.py weather_1m.csv --cities 12 --years 10
+    python synthetic_data.py weather_100m.csv --cities 250 --years 46
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Location', 'Date_Time', 'Temperature_C', 'Humidity_pct', 'Precipitation_mm', 'Wind_Speed_kmh']
+
+# Annual mean °C, seasonal amplitude, daily amplitude, hourly rain probability
+CITY_CLIMATES = {
+    'New York': (12.9, 12.0, 4.5, 0.11),
+    'Los Angeles': (18.6, 4.5, 5.5, 0.03),
+    'Chicago': (10.5, 14.0, 5.0, 0.11),
+    'Houston': (21.2, 8.0, 5.5, 0.09),
+    'Phoenix': (24.4, 10.0, 7.0, 0.02),
+    'Philadelphia': (13.3, 12.0, 5.0, 0.10),
+    'San Antonio': (21.0, 8.5, 6.0, 0.06),
+    'San Diego': (18.0, 4.0, 4.0, 0.03),
+    'Dallas': (19.5, 10.0, 6.0, 0.07),
+    'San Jose': (16.0, 5.5, 7.0, 0.05),
+}
+
+# Hour-to-hour persistence and spread of the temperature anomaly
+AR_COEFFICIENT = 0.95
+AR_SCALE = 0.8
+
+
+def city_climates(cities, seed=0):
+    """
+    Climates for cities: a list of names, or a count.
+
+    Known names use CITY_CLIMATES; a count takes the real cities first and
+    then adds "City 011", "City 012", ... with random but seeded climates.
+    """
+    if isinstance(cities, int):
+        names = list(CITY_CLIMATES)[:cities]
+        names += [f"City {i:03d}" for i in range(len(names) + 1, cities + 1)]
+    else:
+        names = list(cities)
+    rng = np.random.default_rng([seed, len(names)])
+    climates = {}
+    for name in names:
+        climates[name] = CITY_CLIMATES.get(name) or (
+            rng.uniform(5, 25), rng.uniform(4, 14), rng.uniform(4, 7), rng.uniform(0.02, 0.12))
+    return climates
+
+
+def expected_rows(cities, years, start_year=2024, freq='h'):
+    """Number of rows write_synthetic_csv produces for these settings."""
+    count = cities if isinstance(cities, int) else len(cities)
+    times = pd.date_range(f"{start_year}-01-01", f"{start_year + years}-01-01", freq=freq, inclusive='left')
+    return count * len(times)
+
+
+def iter_synthetic_frames(cities=10, years=1, start_year=2024, freq='h', seed=0, missing_rate=0.0):
+    """
+    Yield one DataFrame per month with a reading for every city at every step.
+
+    missing_rate blanks that fraction of the humidity, precipitation and wind
+    values (temperatures are always present).
+    """
+    climates = city_climates(cities, seed)
+    names = np.array(list(climates), dtype=object)
+    mean, seasonal, daily, rain = (np.array(values, dtype=float) for values in zip(*climates.values()))
+    rng = np.random.default_rng(seed)
+    anomaly = np.zeros(len(names))
+
+    months = pd.date_range(f"{start_year}-01-01", periods=years * 12 + 1, freq='MS')
+    for month_start, month_end in zip(months[:-1], months[1:]):
+        times = pd.date_range(month_start, month_end, freq=freq, inclusive='left')
+        steps = len(times)
+        day_of_year = times.dayofyear.to_numpy()[:, None]
+        hour = (times.hour.to_numpy() + times.minute.to_numpy() / 60)[:, None]
+
+        # Coldest around mid-January and 5 am, warmest around mid-July and 3 pm
+        cycle = (mean - seasonal * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+                 - daily * np.cos(2 * np.pi * (hour - 3) / 24))
+        shocks = rng.normal(0, AR_SCALE, (steps, len(names)))
+        anomalies = np.empty_like(shocks)
+        for step in range(steps):
+            anomaly = AR_COEFFICIENT * anomaly + shocks[step]
+            anomalies[step] = anomaly
+        temperature = cycle + anomalies
+
+        raining = rng.random((steps, len(names))) < rain
+        precipitation = np.where(raining, rng.exponential(1.5, (steps, len(names))), 0.0)
+        humidity = np.clip(65 - 1.5 * (temperature - mean) + 20 * raining
+                           + rng.normal(0, 8, (steps, len(names))), 5, 100)
+        wind = rng.gamma(2.0, 6.0, (steps, len(names)))
+
+        frame = pd.DataFrame({
+            'Location': np.tile(names, steps),
+            'Date_Time': np.repeat(times.to_numpy(), len(names)),
+            'Temperature_C': temperature.ravel().round(2),
+            'Humidity_pct': humidity.ravel().round(1),
+            'Precipitation_mm': precipitation.ravel().round(2),
+            'Wind_Speed_kmh': wind.ravel().round(1),
+        })
+        if missing_rate:
+            for column in ['Humidity_pct', 'Precipitation_mm', 'Wind_Speed_kmh']:
+                frame.loc[rng.random(len(frame)) < missing_rate, column] = np.nan
+        yield frame
+
+
+def write_synthetic_csv(path, cities=10, years=1, start_year=2024, freq='h', seed=0, missing_rate=0.0):
+    """Write a synthetic weather CSV to path and return the number of rows written."""
+    rows = 0
+    header = True
+    for frame in iter_synthetic_frames(cities, years, start_year, freq, seed, missing_rate):
+        frame.to_csv(path, mode='w' if header else 'a', header=header, index=False,
+                     date_format='%Y-%m-%d %H:%M:%S')
+        header = False
+        rows += len(frame)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path')
+    parser.add_argument('--cities', type=int, default=10)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--start-year', type=int, default=2024)
+    parser.add_argument('--freq', default='h', help="pandas frequency of readings (default hourly)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--missing-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    rows = write_synthetic_csv(args.path, args.cities, args.years, args.start_year, args.freq,
+                               args.seed, args.missing_rate)
+    print(f"Wrote {rows} rows to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
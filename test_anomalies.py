@@ -0,0 +1,132 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from anomalies import compute_bounds, flag_anomalies, detect_anomalies, StreamingAnomalyDetector
+from weather_analysis import WeatherAnalysisImproved
+
+
+def make_readings(seed=0, hours=48):
+    """Hourly Chicago and Phoenix readings in January and July, recorded to two decimals."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city, january, july in [("Chicago", -5.0, 24.0), ("Phoenix", 13.0, 41.0)]:
+        for start, mean in [("2024-01-01", january), ("2024-07-01", july)]:
+            frames.append(pd.DataFrame({
+                'Location': city,
+                'Date_Time': pd.date_range(start, periods=hours, freq='h'),
+                'Temperature_C': (mean + rng.uniform(-2, 2, hours)).round(2),
+                'Humidity_pct': rng.uniform(20, 80, hours).round(2),
+                'Precipitation_mm': 0.0,
+                'Wind_Speed_kmh': rng.uniform(0, 20, hours).round(2),
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestAnomalies(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_readings()
+        # Normal for a Phoenix July, but not for Chicago
+        self.data.loc[10, 'Temperature_C'] = 41.0
+        self.data.loc[100, 'Humidity_pct'] = 400.0
+
+    def test_bounds_are_per_location_and_month(self):
+        flags, bounds = detect_anomalies(self.data)
+        self.assertEqual(list(flags.index[flags['Temperature_C_anomaly']]), [10])
+        self.assertEqual(list(flags.index[flags['Humidity_pct_anomaly']]), [100])
+        self.assertEqual(list(flags.index[flags['is_anomaly']]), [10, 100])
+        self.assertEqual(len(bounds), 4)
+        self.assertGreater(bounds.loc[("Phoenix", 7), 'Temperature_C_lower'], 30)
+        # No rain at all: the column does not vary, so nothing is judged
+        self.assertTrue(bounds['Precipitation_mm_lower'].isna().all())
+
+    def test_mad_method(self):
+        flags, _ = detect_anomalies(self.data, method='mad')
+        self.assertTrue(flags.loc[[10, 100], 'is_anomaly'].all())
+        with self.assertRaises(ValueError):
+            compute_bounds(self.data, method='zscore')
+
+    def test_rows_without_keys_are_ignored(self):
+        data = self.data.astype({'Location': 'category'})
+        data.loc[5, 'Location'] = None
+        data.loc[6, 'Date_Time'] = pd.NaT
+        data.loc[[5, 6], 'Temperature_C'] = 90.0
+        for method in ('iqr', 'mad'):
+            flags, bounds = detect_anomalies(data, method=method)
+            self.assertEqual(len(bounds), 4)
+            self.assertFalse(flags.loc[[5, 6], 'is_anomaly'].any())
+            self.assertTrue(flags.loc[10, 'is_anomaly'])
+
+    def test_small_and_unknown_groups_are_not_flagged(self):
+        bounds = compute_bounds(self.data, columns=['Temperature_C'], min_rows=100)
+        self.assertTrue(bounds.isna().all().all())
+        bounds = compute_bounds(self.data, columns=['Temperature_C'])
+        new = pd.DataFrame({'Location': ["Dallas", "Chicago"], 'Date_Time': pd.to_datetime(["2024-01-02"] * 2),
+                            'Temperature_C': [90.0, 90.0]})
+        self.assertEqual(list(flag_anomalies(new, bounds)['is_anomaly']), [False, True])
+
+    def test_streaming_matches_in_memory(self):
+        for method in ('iqr', 'mad'):
+            expected = compute_bounds(self.data, method=method)
+            detector = StreamingAnomalyDetector(method=method)
+            other = StreamingAnomalyDetector(method=method)
+            for start in range(0, len(self.data), 50):
+                (detector if start < 100 else other).update(self.data.iloc[start:start + 50])
+            bounds = detector.merge(other).bounds()
+            pd.testing.assert_frame_equal(bounds, expected, check_index_type=False, atol=1e-9)
+            pd.testing.assert_frame_equal(detector.flag(self.data), detect_anomalies(self.data, method=method)[0])
+
+
+class TestWeatherAnalysisAnomalies(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.temp_csv = os.path.join(self.temp_dir.name, "weather_data.csv")
+        data = make_readings()
+        data.loc[10, 'Temperature_C'] = 41.0
+        data.to_csv(self.temp_csv, index=False)
+
+    def test_flag_then_remove(self):
+        analysis = WeatherAnalysisImproved(self.temp_csv)
+        analysis.fetch_data()
+        flags = analysis.detect_anomalies(columns=['Temperature_C'])
+        self.assertEqual(int(flags['is_anomaly'].sum()), 1)
+        self.assertEqual(len(analysis.data), 192)
+        self.assertTrue(analysis.data.loc[10, 'Temperature_C_anomaly'])
+
+        analysis.remove_outliers(columns=['Temperature_C'])
+        self.assertEqual(len(analysis.data), 191)
+        self.assertNotIn('is_anomaly', analysis.data)
+
+    def test_refresh_flags_new_rows(self):
+        analysis = WeatherAnalysisImproved(self.temp_csv)
+        analysis.fetch_data()
+        analysis.detect_anomalies()
+        with open(self.temp_csv, 'a') as f:
+            f.write("Phoenix,2024-07-03 00:00:00,5.0,50.0,0.0,10.0\n"
+                    "Phoenix,2024-07-03 01:00:00,40.0,50.0,0.0,10.0\n")
+        new_rows = analysis.refresh()
+        self.assertEqual(list(new_rows['Temperature_C_anomaly']), [True, False])
+        self.assertEqual(int(analysis.data['is_anomaly'].sum()), 2)
+
+    def test_refresh_uses_the_detection_keys(self):
+        analysis = WeatherAnalysisImproved(self.temp_csv)
+        analysis.fetch_data()
+        analysis.detect_anomalies(columns=['Temperature_C'], by=('month',))
+        with open(self.temp_csv, 'a') as f:
+            f.write("Phoenix,2024-07-03 00:00:00,95.0,50.0,0.0,10.0\n")
+        self.assertEqual(list(analysis.refresh()['Temperature_C_anomaly']), [True])
+
+    def test_stream_anomalies(self):
+        analysis = WeatherAnalysisImproved(self.temp_csv)
+        results = analysis.stream_anomalies(chunk_size=50, columns=['Temperature_C'])
+        self.assertEqual(results['row_count'], 192)
+        self.assertEqual(list(results['anomalies']['Date_Time']), [pd.Timestamp('2024-01-01 10:00')])
+        self.assertEqual(len(results['bounds']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import json
+import gzip
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, insert
+import app as web
+import module as mod
+
+
+class TestWeatherApi(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.engine = create_engine("sqlite:///" + os.path.join(cls.temp_dir.name, "weather.db"))
+        mod.WeatherData.__table__.create(cls.engine)
+        start = datetime(2024, 1, 1)
+        rows = [
+            {'location': city, 'date_time': start + timedelta(hours=h), 'temperature': float(h),
+             'humidity': 50.0, 'precipitation': None, 'wind_speed': 3.0}
+            for h in range(2500) for city in ('Chicago', 'Phoenix')
+        ]
+        with cls.engine.begin() as connection:
+            connection.execute(insert(mod.WeatherData.__table__), rows)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        cls.temp_dir.cleanup()
+
+    def setUp(self):
+        patcher = patch.object(web, 'read_engine', return_value=self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = web.app.test_client()
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/api/weather?city=Chicago')
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 2500)
+        first = json.loads(lines[0])
+        self.assertEqual(first['location'], 'Chicago')
+        self.assertEqual(first['date_time'], '2024-01-01T00:00:00')
+        self.assertIsNone(first['precipitation'])
+
+    def test_projection_range_and_json_array(self):
+        response = self.client.get('/api/weather?fields=temperature,date_time&format=json'
+                                   '&start=2024-01-02&end=2024-01-02T02:00')
+        rows = response.get_json()
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(set(rows[0]), {'temperature', 'date_time'})
+
+    def test_gzip(self):
+        response = self.client.get('/api/weather?city=Phoenix&fields=temperature',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        self.assertEqual(len(lines), 2500)
+
+    def test_empty_result_is_valid_json(self):
+        response = self.client.get('/api/weather?city=Atlantis&format=json')
+        self.assertEqual(response.get_json(), [])
+
+    def test_page_number_needs_a_cursor(self):
+        self.assertEqual(self.client.get('/?page=5').status_code, 400)
+
+    def test_unknown_field(self):
+        self.assertEqual(self.client.get('/api/weather?fields=password').status_code, 400)
+
+    def test_metrics_record_streamed_requests(self):
+        before = web.request_metrics.snapshot().get(('weather_api', '200'), {'count': 0})['count']
+        response = self.client.get('/api/weather?city=Chicago&fields=temperature')
+        response.get_data()
+        response.close()
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertEqual(web.request_metrics.snapshot()[('weather_api', '200')]['count'], before + 1)
+        self.assertIn('weather_request_duration_seconds_count{endpoint="weather_api",status="200"}', text)
+        self.assertIn('weather_cache_hits_total{cache="model"}', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from cache import DatasetCache
+from weather_analysis import WeatherAnalysis
+
+ROWS = (
+    "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+    "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n"
+    "Chicago,2024-01-01 01:00:00,-4.0,71.2,0.5,10.1\n"
+    "Phoenix,2024-01-01 00:00:00,12.0,20.4,0.0,5.6\n"
+    "Phoenix,2024-01-01 01:00:00,11.5,22.0,0.0,6.2\n"
+)
+
+
+class TestDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_csv = "temp_cache_weather_data.csv"
+        with open(self.temp_csv, 'w') as f:
+            f.write(ROWS)
+
+    def tearDown(self):
+        os.remove(self.temp_csv)
+
+    def test_reuses_parsed_dataset(self):
+        cache = DatasetCache()
+        with patch.object(WeatherAnalysis, 'fetch_data', autospec=True,
+                          side_effect=WeatherAnalysis.fetch_data) as fetch:
+            first = cache.get_statistics(self.temp_csv)
+            second = cache.get_statistics(self.temp_csv)
+        self.assertEqual(first, second)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_invalidates_when_file_changes(self):
+        cache = DatasetCache()
+        self.assertEqual(cache.get_statistics(self.temp_csv)['range_temp'], 16.0)
+        with open(self.temp_csv, 'a') as f:
+            f.write("Phoenix,2024-01-01 02:00:00,30.0,15.0,0.0,4.0\n")
+        self.assertEqual(cache.get_statistics(self.temp_csv)['range_temp'], 34.0)
+        self.assertEqual(cache.misses, 2)
+
+    def test_appended_rows_are_read_incrementally(self):
+        cache = DatasetCache()
+        cache.get_statistics(self.temp_csv)
+        with open(self.temp_csv, 'a') as f:
+            f.write("Phoenix,2024-01-01 02:00:00,30.0,15.0,0.0,4.0\n")
+        with patch.object(WeatherAnalysis, 'fetch_data', autospec=True) as fetch:
+            stats = cache.get_statistics(self.temp_csv)
+        fetch.assert_not_called()
+        self.assertEqual(stats['range_temp'], 34.0)
+        self.assertEqual(len(cache.get_analysis(self.temp_csv).data), 5)
+        self.assertEqual(cache.refreshes, 1)
+
+    def test_rewritten_file_is_reloaded(self):
+        cache = DatasetCache()
+        cache.get_statistics(self.temp_csv)
+        with open(self.temp_csv, 'w') as f:
+            f.write(ROWS.replace("-4.0", "-8.0") + "Phoenix,2024-01-01 02:00:00,30.0,15.0,0.0,4.0\n")
+        self.assertEqual(cache.get_statistics(self.temp_csv)['range_temp'], 38.0)
+        self.assertEqual(len(cache.get_analysis(self.temp_csv).data), 5)
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            DatasetCache().get("non_existing_file.csv")
+        with self.assertRaises(FileNotFoundError):
+            DatasetCache().get(os.path.join(tempfile.gettempdir(), "no_such_dir_*", "*.csv"))
+
+    def test_directory_and_glob_sources(self):
+        with tempfile.TemporaryDirectory() as directory:
+            part = os.path.join(directory, "2024-01.csv")
+            with open(part, 'w') as f:
+                f.write(ROWS)
+            cache = DatasetCache()
+            for source in (directory, os.path.join(directory, "*.csv")):
+                self.assertEqual(len(cache.get_analysis(source).data), 4)
+            with open(part, 'a') as f:
+                f.write("Phoenix,2024-01-01 02:00:00,30.0,15.0,0.0,4.0\n")
+            with open(os.path.join(directory, "2024-02.csv"), 'w') as f:
+                f.write(ROWS.replace("2024-01-01", "2024-02-01"))
+            for source in (directory, os.path.join(directory, "*.csv")):
+                self.assertEqual(len(cache.get_analysis(source).data), 9)
+            self.assertEqual(cache.refreshes, 2)
+
+    def test_refresh_waits_for_readers(self):
+        cache = DatasetCache()
+        refresh = threading.Thread(target=cache.get, args=(self.temp_csv,))
+        with cache.reading(self.temp_csv) as analysis:
+            with open(self.temp_csv, 'a') as f:
+                f.write("Phoenix,2024-01-01 02:00:00,30.0,15.0,0.0,4.0\n")
+            refresh.start()
+            refresh.join(timeout=0.2)
+            self.assertTrue(refresh.is_alive())
+            self.assertEqual(len(analysis.data), 4)
+        refresh.join()
+        self.assertEqual(len(cache.get_analysis(self.temp_csv).data), 5)
+        self.assertEqual(cache.refreshes, 1)
+
+if __name__ == '__main__':
+    unittest.main()
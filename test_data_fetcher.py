@@ -0,0 +1,136 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import data_fetcher
+from data_fetcher import DataFetcher, parse_date_times, frame_memory, source_files
+from weather_analysis import WeatherAnalysis
+
+ROWS = (
+    "Location , Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+    "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n"
+    "Chicago,2024-01-01T01:00,-4.0,,0.5,10.1\n"
+    "Phoenix,not a date,12.0,20.4,0.0,5.6\n"
+    "Phoenix,2024-07-01 01:00:00,39.5,22.0,,6.2\n"
+)
+
+
+class TestDataFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.temp_csv = os.path.join(self.temp_dir.name, "weather_data.csv")
+        with open(self.temp_csv, 'w') as f:
+            f.write(ROWS)
+
+    def test_schema(self):
+        data = DataFetcher(self.temp_csv).csv_pandas()
+        self.assertEqual(list(data.columns)[:2], ['Location', 'Date_Time'])
+        self.assertEqual(str(data['Location'].dtype), 'category')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(data['Date_Time']))
+        for column in ['Temperature_C', 'Humidity_pct', 'Precipitation_mm', 'Wind_Speed_kmh']:
+            self.assertEqual(str(data[column].dtype), 'float32')
+        self.assertEqual(data['Temperature_C'].iloc[0], -3.5)
+
+    def test_dates_outside_the_format_fall_back(self):
+        parsed = parse_date_times(pd.Series(['2024-01-01 00:00:00', '2024-01-01T01:00', 'not a date', None]))
+        self.assertEqual(list(parsed[:2]), [pd.Timestamp('2024-01-01 00:00'), pd.Timestamp('2024-01-01 01:00')])
+        self.assertTrue(parsed[2:].isna().all())
+
+    def test_inferred_dtypes_and_chunks(self):
+        fetcher = DataFetcher(self.temp_csv)
+        inferred = fetcher.csv_pandas(dtypes=None)
+        self.assertEqual(str(inferred['Temperature_C'].dtype), 'float64')
+        chunks = list(fetcher.csv_chunks(chunk_size=2, skip_rows=1))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(str(chunks[0]['Humidity_pct'].dtype), 'float32')
+        self.assertEqual(chunks[0]['Date_Time'].iloc[0], pd.Timestamp('2024-01-01 01:00'))
+
+    def test_fetch_data_derived_columns_are_small(self):
+        analysis = WeatherAnalysis(self.temp_csv)
+        analysis.fetch_data()
+        self.assertEqual(len(analysis.data), 3)
+        dtypes = analysis.data.dtypes
+        self.assertEqual(str(dtypes['Location_Encoded']), 'int16')
+        self.assertEqual(str(dtypes['month']), 'int8')
+        self.assertEqual(str(dtypes['season']), 'int8')
+        self.assertEqual(list(analysis.data['Location_Encoded']), [0, 0, 1])
+        inferred = DataFetcher(self.temp_csv).csv_pandas(dtypes=None)
+        self.assertLess(frame_memory(DataFetcher(self.temp_csv).csv_pandas()), frame_memory(inferred))
+
+
+class TestPartitionedSource(unittest.TestCase):
+
+    HEADER = "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.root = self.temp_dir.name
+        partitions = {
+            ("Phoenix", "2024-01"): ["Phoenix,2024-01-01 00:00:00,12.0,20.4,0.0,5.6\n"],
+            ("Phoenix", "2024-02"): ["Phoenix,2024-02-01 00:00:00,14.0,18.0,,4.0\n"],
+            ("Chicago", "2024-01"): ["Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n",
+                                     "Chicago,2024-01-01 01:00:00,-4.0,71.2,0.5,10.1\n"],
+        }
+        for (city, month), rows in partitions.items():
+            os.makedirs(os.path.join(self.root, city), exist_ok=True)
+            with open(os.path.join(self.root, city, f"{month}.csv"), 'w') as f:
+                f.write(self.HEADER + "".join(rows))
+        self.pattern = os.path.join(self.root, "*", "*.csv")
+
+    def test_glob_and_directory_sources(self):
+        self.assertEqual([os.path.relpath(name, self.root) for name in source_files(self.pattern)],
+                         [os.path.join("Chicago", "2024-01.csv"), os.path.join("Phoenix", "2024-01.csv"),
+                          os.path.join("Phoenix", "2024-02.csv")])
+        self.assertEqual(source_files(os.path.join(self.root, "Phoenix")),
+                         [os.path.join(self.root, "Phoenix", name) for name in ["2024-01.csv", "2024-02.csv"]])
+        self.assertEqual(source_files(os.path.join(self.root, "*.csv")), [])
+
+    def test_partitions_match_one_file(self):
+        for has_pyarrow in (True, False):
+            with patch.object(data_fetcher, 'HAS_PYARROW', has_pyarrow):
+                data = DataFetcher(self.pattern, max_workers=2).csv_pandas()
+            self.assertEqual(str(data['Location'].dtype), 'category')
+            self.assertEqual(list(data['Location']), ["Chicago", "Chicago", "Phoenix", "Phoenix"])
+            self.assertEqual(str(data['Humidity_pct'].dtype), 'float32')
+            self.assertTrue(pd.isna(data['Precipitation_mm'].iloc[3]))
+            self.assertEqual(data['Date_Time'].iloc[3], pd.Timestamp('2024-02-01'))
+            self.assertEqual(list(data.index), [0, 1, 2, 3])
+
+    @unittest.skipUnless(data_fetcher.HAS_PYARROW, "pyarrow is not installed")
+    def test_arrow_and_pandas_readers_agree_on_missing_values(self):
+        with open(os.path.join(self.root, "Phoenix", "2024-03.csv"), 'w') as f:
+            f.write(self.HEADER + ",2024-03-01 00:00:00,15.0,,0.0,4.0\n"
+                                  "NA,,16.0,17.0,NA,4.0\n")
+        arrow = DataFetcher(self.pattern).csv_pandas()
+        with patch.object(data_fetcher, 'HAS_PYARROW', False):
+            pandas = DataFetcher(self.pattern).csv_pandas()
+        pd.testing.assert_frame_equal(arrow, pandas)
+        self.assertEqual(int(arrow['Location'].isna().sum()), 2)
+        self.assertNotIn("", arrow['Location'].cat.categories)
+
+    def test_chunks_span_files(self):
+        chunks = list(DataFetcher(self.pattern).csv_chunks(chunk_size=10, skip_rows=3))
+        self.assertEqual([list(chunk['Location']) for chunk in chunks], [["Phoenix"]])
+
+    def test_codes_stable_across_partitions_and_runs(self):
+        codes_path = os.path.join(self.root, "location_codes.json")
+        analysis = WeatherAnalysis(os.path.join(self.root, "Phoenix"), location_codes_path=codes_path)
+        analysis.fetch_data()
+        self.assertEqual(list(analysis.data['Location_Encoded']), [0, 0])
+        # Chicago sorts first but arrives later, so it gets the next code
+        analysis = WeatherAnalysis(self.pattern, location_codes_path=codes_path)
+        analysis.fetch_data()
+        codes = dict(zip(analysis.data['Location'], analysis.data['Location_Encoded']))
+        self.assertEqual(codes, {"Phoenix": 0, "Chicago": 1})
+
+    def test_missing_source(self):
+        with self.assertRaises(FileNotFoundError):
+            WeatherAnalysis(os.path.join(self.root, "*.csv")).fetch_data()
+
+
+if __name__ == '__main__':
+    unittest.main()
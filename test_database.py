@@ -0,0 +1,60 @@
+import unittest
+import os
+import tempfile
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+import module as mod
+from database import configure_app, read_engine, readonly_uri
+
+
+class TestDatabaseLayer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        configure_app(self.app, mod.db, "sqlite:///" + os.path.join(self.temp_dir.name, "weather.db"))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        mod.db.create_all()
+
+    def tearDown(self):
+        mod.db.session.remove()
+        mod.db.engine.dispose()
+        read_engine(mod.db).dispose()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def test_connection_pragmas(self):
+        with mod.db.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql("PRAGMA journal_mode").scalar(), 'wal')
+            self.assertEqual(connection.exec_driver_sql("PRAGMA synchronous").scalar(), 1)
+            self.assertGreater(connection.exec_driver_sql("PRAGMA mmap_size").scalar(), 0)
+
+    def test_readonly_engine_refuses_writes(self):
+        engine = read_engine(mod.db)
+        self.assertIsNot(engine, mod.db.engine)
+        with engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT count(*) FROM weather_data")).scalar(), 0)
+            with self.assertRaises(OperationalError):
+                connection.execute(text("DELETE FROM weather_data"))
+
+    def test_readers_not_blocked_by_open_write(self):
+        with mod.db.engine.connect() as writer:
+            writer.exec_driver_sql("BEGIN IMMEDIATE")
+            writer.exec_driver_sql(
+                "INSERT INTO weather_data (location, date_time, temperature) "
+                "VALUES ('Chicago', '2024-01-01 00:00:00.000000', 1.0)")
+            # The uncommitted row is invisible, but the read does not wait for the lock
+            rows, _, _ = mod.fetch_page(engine=read_engine(mod.db))
+            self.assertEqual(rows, [])
+            writer.exec_driver_sql("COMMIT")
+        rows, _, _ = mod.fetch_page(engine=read_engine(mod.db))
+        self.assertEqual([r.location for r in rows], ['Chicago'])
+
+    def test_readonly_uri(self):
+        self.assertEqual(readonly_uri("sqlite:////data/weather.db"),
+                         "sqlite:///file:/data/weather.db?mode=ro&uri=true")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import pandas as pd
+from features import add_time_series_features, extend_time_series_features
+
+
+def make_frame(hours=48):
+    times = pd.date_range('2024-01-01', periods=hours, freq='h')
+    frames = []
+    for city, offset in [('Chicago', 0.0), ('Phoenix', 100.0)]:
+        frames.append(pd.DataFrame({
+            'Location': city,
+            'Date_Time': times,
+            'Temperature_C': offset + np.arange(hours, dtype=float),
+            'Humidity_pct': 50.0,
+            'Precipitation_mm': 1.0,
+        }))
+    # Interleave cities and shuffle time order, as in the raw CSV
+    return pd.concat(frames).sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+class TestTimeSeriesFeatures(unittest.TestCase):
+
+    def test_lags_stay_within_city(self):
+        data = add_time_series_features(make_frame())
+        phoenix = data[data['Location'] == 'Phoenix']
+        self.assertTrue(phoenix['Date_Time'].is_monotonic_increasing)
+        self.assertTrue(np.isnan(phoenix['temp_lag_1'].iloc[0]))
+        self.assertEqual(phoenix['temp_lag_1'].iloc[1], 100.0)
+        self.assertEqual(phoenix['temp_lag_7'].iloc[10], 103.0)
+
+    def test_rolling_window_excludes_current_reading(self):
+        data = add_time_series_features(make_frame())
+        chicago = data[data['Location'] == 'Chicago'].set_index('Date_Time')
+        # The 24h window before hour 30 holds hours 6..29
+        self.assertEqual(chicago.loc['2024-01-02 06:00', 'temp_mean_24h'], np.mean(np.arange(6, 30)))
+        self.assertEqual(chicago.loc['2024-01-02 06:00', 'temp_mean_7D'], np.mean(np.arange(0, 30)))
+
+    def test_rows_without_location(self):
+        frame = make_frame()
+        frame.loc[5, 'Location'] = None
+        data = add_time_series_features(frame)
+        self.assertEqual(len(data), 96)
+        self.assertTrue(data.loc[[5], ['temp_lag_1', 'temp_mean_24h']].isna().all().all())
+        expected = add_time_series_features(make_frame().drop(index=5))
+        pd.testing.assert_frame_equal(data.drop(index=5), expected)
+
+    def test_extend_matches_full_recompute(self):
+        frame = make_frame()
+        cutoff = pd.Timestamp('2024-01-02 12:00')
+        history = add_time_series_features(frame[frame['Date_Time'] < cutoff])
+        new_rows = frame[frame['Date_Time'] >= cutoff]
+
+        extended = extend_time_series_features(history, new_rows)
+        expected = add_time_series_features(frame)
+        expected = expected[expected['Date_Time'] >= cutoff].reset_index(drop=True)
+        pd.testing.assert_frame_equal(extended, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import module as mod
+from frame_cache import FrameCache
+from weather_analysis import WeatherAnalysis
+
+ROWS = (
+    "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+    "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n"
+    "Chicago,not a date,-4.0,71.2,0.5,10.1\n"
+    "Phoenix,2024-07-01 00:00:00,41.0,20.4,0.0,5.6\n"
+    "Phoenix,2024-07-01 01:00:00,39.5,22.0,0.0,6.2\n"
+)
+
+
+class TestFrameCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.temp_csv = os.path.join(self.temp_dir.name, "weather_data.csv")
+        with open(self.temp_csv, 'w') as f:
+            f.write(ROWS)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_warm_start_skips_csv_parsing(self):
+        cold = WeatherAnalysis(self.temp_csv)
+        cold.fetch_data(use_cache=True, cache_dir=self.cache_dir)
+
+        warm = WeatherAnalysis(self.temp_csv)
+        with patch.object(mod.DataFetcher, 'csv_pandas') as csv_pandas:
+            warm.fetch_data(use_cache=True, cache_dir=self.cache_dir)
+        csv_pandas.assert_not_called()
+        pd.testing.assert_frame_equal(warm.data, cold.data)
+        self.assertEqual(len(warm.data), 3)
+
+    def test_compact_dtypes(self):
+        analysis = WeatherAnalysis(self.temp_csv)
+        analysis.fetch_data(use_cache=True, cache_dir=self.cache_dir)
+        dtypes = analysis.data.dtypes
+        self.assertEqual(str(dtypes['Location']), 'category')
+        self.assertEqual(str(dtypes['Temperature_C']), 'float32')
+        self.assertEqual(str(dtypes['month']), 'int8')
+        self.assertEqual(str(dtypes['season']), 'int8')
+
+    def test_key_follows_file_contents(self):
+        cache = FrameCache(self.cache_dir)
+        before = cache.source_key(self.temp_csv)
+        self.assertEqual(cache.source_key(self.temp_csv), before)
+        with open(self.temp_csv, 'a') as f:
+            f.write("Phoenix,2024-07-01 02:00:00,38.0,22.0,0.0,6.2\n")
+        self.assertNotEqual(cache.source_key(self.temp_csv), before)
+        self.assertIsNone(cache.load(self.temp_csv))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import subprocess
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Extra seconds weather_analysis may add on top of pandas, which it cannot avoid
+IMPORT_BUDGET_SECONDS = float(os.environ.get('WEATHER_IMPORT_BUDGET', 0.5))
+
+# Loaded only by the stages that need them (training, plotting, model files, the database)
+HEAVY_MODULES = ['sklearn', 'scipy', 'matplotlib', 'joblib']
+DATABASE_MODULES = ['flask', 'flask_sqlalchemy', 'sqlalchemy']
+
+
+def run_python(code, importtime=False):
+    """Run code in a fresh interpreter outside the repo; returns the completed process."""
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+        result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise AssertionError(result.stderr)
+    return result
+
+
+def import_times(module):
+    """Map of top-level package name -> cumulative import seconds from python -X importtime."""
+    stderr = run_python(f"import {module}", importtime=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        times[package] = max(times.get(package, 0.0), int(cumulative) / 1e6)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_weather_analysis_stays_light(self):
+        times = import_times('weather_analysis')
+        for package in HEAVY_MODULES + DATABASE_MODULES:
+            self.assertNotIn(package, times, f"importing weather_analysis loads {package}")
+        self.assertLess(times['weather_analysis'] - times['pandas'], IMPORT_BUDGET_SECONDS)
+
+    def test_app_skips_training_and_plotting(self):
+        times = import_times('app')
+        for package in HEAVY_MODULES:
+            self.assertNotIn(package, times, f"importing app loads {package}")
+
+    def test_statistics_do_not_load_training_stack(self):
+        csv_text = "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\\n" \
+                   "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\\n" \
+                   "Phoenix,2024-01-01 00:00:00,12.0,20.4,0.0,5.6\\n"
+        code = (
+            "import sys\n"
+            f"open('weather.csv', 'w').write('{csv_text}')\n"
+            "from weather_analysis import WeatherAnalysis\n"
+            "analysis = WeatherAnalysis('weather.csv')\n"
+            "analysis.fetch_data()\n"
+            "print(analysis.calculate_statistics()['mean_temp'])\n"
+            f"print(sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+        )
+        mean, loaded = run_python(code).stdout.splitlines()
+        self.assertEqual(float(mean), 4.25)
+        self.assertEqual(loaded, '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from data_fetcher import source_files
+from ingest import TailReader, Watermarks, LocationCodes, offset_after_rows
+
+HEADER = "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+ROWS = [
+    "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n",
+    "Phoenix,2024-01-01 00:00:00,12.0,20.4,0.0,5.6\n",
+    "Chicago,2024-01-01 01:00:00,-4.0,71.2,0.5,10.1\n",
+    "Phoenix,2024-01-01 01:00:00,11.5,22.0,0.0,6.2\n",
+]
+
+
+class TestTailReader(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "weather_data.csv")
+        self.write(HEADER + "".join(ROWS[:2]))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, text, mode='w', path=None):
+        with open(path or self.path, mode) as f:
+            f.write(text)
+
+    def test_reads_only_appended_rows(self):
+        tail = TailReader(self.path)
+        self.assertEqual(len(tail.read_new()), 2)
+        self.assertTrue(tail.read_new().empty)
+        self.write(ROWS[2], mode='a')
+        new_rows = tail.read_new()
+        self.assertEqual(list(new_rows['Temperature_C']), [-4.0])
+        self.assertEqual(new_rows['Date_Time'].iloc[0], pd.Timestamp('2024-01-01 01:00:00'))
+
+    def test_skip_existing(self):
+        tail = TailReader(self.path)
+        tail.skip_existing()
+        self.assertTrue(tail.read_new().empty)
+        self.write(ROWS[2], mode='a')
+        self.assertEqual(len(tail.read_new()), 1)
+
+    def test_partial_line_waits_for_the_rest(self):
+        tail = TailReader(self.path)
+        tail.read_new()
+        self.write(ROWS[2] + ROWS[3][:10], mode='a')
+        self.assertEqual(len(tail.read_new()), 1)
+        self.write(ROWS[3][10:], mode='a')
+        self.assertEqual(list(tail.read_new()['Location']), ['Phoenix'])
+
+    def test_chunks_and_commit(self):
+        self.write("".join(ROWS[2:]), mode='a')
+        tail = TailReader(self.path)
+        chunks = list(tail.iter_new(chunk_size=3))
+        self.assertEqual([len(frame) for _, frame, _ in chunks], [3, 1])
+        # Offsets only move on commit
+        self.assertEqual(len(tail.read_new()), 4)
+        self.assertEqual(chunks[-1][2]['offset'], os.path.getsize(self.path))
+
+    def test_rewritten_file_is_read_from_the_start(self):
+        tail = TailReader(self.path)
+        tail.read_new()
+        self.write(HEADER + ROWS[1] + ROWS[0] + ROWS[2])
+        self.assertEqual(tail.replaced(), [self.path])
+        self.assertEqual(len(tail.read_new()), 3)
+        self.write(HEADER + ROWS[3])
+        self.assertEqual(list(tail.read_new()['Temperature_C']), [11.5])
+
+    def test_directory_of_drop_in_files(self):
+        directory = os.path.join(self.temp_dir.name, "incoming")
+        os.mkdir(directory)
+        first = os.path.join(directory, "a.csv")
+        self.write(HEADER + ROWS[0], path=first)
+        tail = TailReader(directory)
+        self.assertEqual(len(tail.read_new()), 1)
+        self.write(HEADER + "".join(ROWS[1:3]), path=os.path.join(directory, "b.csv"))
+        self.write(ROWS[3], mode='a', path=first)
+        self.assertEqual(len(tail.read_new()), 3)
+        self.assertEqual(source_files(directory), [first, os.path.join(directory, "b.csv")])
+
+    def test_offset_after_rows(self):
+        self.assertEqual(offset_after_rows(self.path, 1), len(HEADER) + len(ROWS[0]))
+        with self.assertRaises(FileNotFoundError):
+            source_files(os.path.join(self.temp_dir.name, "missing.csv"))
+
+
+class TestWatermarks(unittest.TestCase):
+
+    def frame(self, rows):
+        return pd.DataFrame(rows, columns=['Location', 'Date_Time']).assign(
+            Date_Time=lambda f: pd.to_datetime(f['Date_Time']))
+
+    def test_select_new_skips_seen_and_late_rows(self):
+        watermarks = Watermarks.from_frame(self.frame([
+            ('Chicago', '2024-01-01 01:00'), ('Phoenix', '2024-01-01 00:00'),
+        ]))
+        new = self.frame([
+            ('Chicago', '2024-01-01 01:00'), ('Chicago', '2024-01-01 00:30'),
+            ('Chicago', '2024-01-01 02:00'), ('Phoenix', '2024-01-01 01:00'), ('Dallas', '2024-01-01 00:00'),
+        ])
+        for locations in (new, new.astype({'Location': 'category'})):
+            selected = watermarks.select_new(locations)
+            self.assertEqual(list(selected.index), [2, 3, 4])
+
+        watermarks.advance(new)
+        self.assertEqual(watermarks.marks['Chicago'], pd.Timestamp('2024-01-01 02:00'))
+        self.assertEqual(watermarks.marks['Dallas'], pd.Timestamp('2024-01-01 00:00'))
+
+
+class TestLocationCodes(unittest.TestCase):
+
+    def test_codes_never_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "codes.json")
+            codes = LocationCodes(path)
+            encoded = codes.encode(pd.Series(["Phoenix", "Chicago", None, "Phoenix"]))
+            self.assertEqual(list(encoded), [1, 0, -1, 1])
+            self.assertEqual(str(encoded.dtype), 'int16')
+            reloaded = LocationCodes(path)
+            encoded = reloaded.encode(pd.Series(["Austin", "Phoenix"], dtype='category'))
+            self.assertEqual(list(encoded), [2, 1])
+            self.assertEqual(LocationCodes(path).codes, {"Chicago": 0, "Phoenix": 1, "Austin": 2})
+
+    def test_instances_sharing_a_file_merge_codes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "codes.json")
+            first, second = LocationCodes(path), LocationCodes(path)
+            first.add(["Chicago", "Phoenix"])
+            second.add(["Dallas"])
+            first.add(["Austin"])
+            self.assertEqual(second.codes, {"Chicago": 0, "Phoenix": 1, "Dallas": 2})
+            self.assertEqual(LocationCodes(path).codes, {"Chicago": 0, "Phoenix": 1, "Dallas": 2, "Austin": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+import instrumentation
+from instrumentation import (stage, instrumented, timed_iter, stage_metrics, configure_profiling,
+                             RequestMetrics, render_prometheus, format_stage_report)
+
+
+class Frame:
+    def __init__(self, rows):
+        self.data = list(range(rows))
+
+    @instrumented('test.grow')
+    def grow(self, extra):
+        self.data.extend(range(extra))
+        return extra
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        stage_metrics.reset()
+        self.addCleanup(configure_profiling)
+
+    def test_stage_records_time_and_rows(self):
+        with stage('test.outer', rows=5) as record:
+            sum(range(100000))
+        totals = stage_metrics.snapshot()['test.outer']
+        self.assertEqual(totals['calls'], 1)
+        self.assertEqual(totals['rows'], 5)
+        self.assertGreater(record.wall_seconds, 0)
+        self.assertGreaterEqual(record.cpu_seconds, 0)
+        self.assertIsNone(record.peak_memory)
+
+    def test_errors_are_counted_and_reraised(self):
+        with self.assertRaises(ValueError):
+            with stage('test.failing'):
+                raise ValueError("boom")
+        self.assertEqual(stage_metrics.snapshot()['test.failing']['errors'], 1)
+
+    def test_decorator_counts_frame_rows(self):
+        frame = Frame(10)
+        self.assertEqual(frame.grow(5), 5)
+        frame.grow(1)
+        totals = stage_metrics.snapshot()['test.grow']
+        self.assertEqual(totals['calls'], 2)
+        self.assertEqual(totals['rows'], 15 + 16)
+
+    def test_timed_iter(self):
+        chunks = list(timed_iter('test.chunks', ([1] * n for n in (3, 4))))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 4])
+        self.assertEqual(stage_metrics.snapshot()['test.chunks']['rows'], 7)
+
+    def test_nested_peak_memory(self):
+        configure_profiling(trace_memory=True)
+        with stage('test.outer') as outer:
+            with stage('test.inner') as inner:
+                block = np.ones(1_000_000)
+                del block
+            small = np.ones(1000)
+        self.assertGreaterEqual(inner.peak_memory, 8_000_000)
+        self.assertGreaterEqual(outer.peak_memory, inner.peak_memory)
+        del small
+        configure_profiling()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profile_dump_for_outermost_stage(self):
+        with tempfile.TemporaryDirectory() as directory:
+            configure_profiling(directory)
+            with stage('test.profiled'):
+                with stage('test.profiled_inner'):
+                    sum(range(1000))
+            files = os.listdir(directory)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith('test.profiled-'))
+            self.assertTrue(files[0].endswith('.prof'))
+
+    def test_render_prometheus(self):
+        requests = RequestMetrics(buckets=(0.1, 1.0))
+        requests.observe('show_results', 200, 0.05)
+        requests.observe('show_results', 200, 0.5)
+        with stage('test.render', rows=3):
+            pass
+        text = render_prometheus(requests, {'dataset': (3, 1)})
+        self.assertIn('weather_request_duration_seconds_bucket{endpoint="show_results",status="200",le="0.1"} 1', text)
+        self.assertIn('weather_request_duration_seconds_bucket{endpoint="show_results",status="200",le="+Inf"} 2', text)
+        self.assertIn('weather_request_duration_seconds_count{endpoint="show_results",status="200"} 2', text)
+        self.assertIn('weather_cache_hit_ratio{cache="dataset"} 0.75', text)
+        self.assertIn('weather_stage_rows_total{stage="test.render"} 3', text)
+        self.assertIn('# TYPE weather_stage_wall_seconds_total counter', text)
+
+    def test_stage_report(self):
+        with stage('test.reported', rows=2):
+            pass
+        report = format_stage_report().splitlines()
+        self.assertTrue(report[0].startswith('stage'))
+        self.assertTrue(report[1].startswith('test.reported'))
+
+    def test_label_escaping(self):
+        self.assertEqual(instrumentation._labels(stage='a"b\\c'), '{stage="a\\"b\\\\c"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
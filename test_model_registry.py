@@ -0,0 +1,155 @@
+import unittest
+import tempfile
+import threading
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import app as web
+from model_registry import ModelRegistry, PredictionBatcher, frame_digest
+
+
+class CountingModel:
+    """Stand-in model recording the size of every predict call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return np.asarray(X)[:, 0] * 2
+
+
+def fitted_model():
+    frame = pd.DataFrame({'Humidity_pct': [10.0, 20.0, 30.0, 15.0], 'month': [1, 3, 2, 4]})
+    return LinearRegression().fit(frame, frame['Humidity_pct'] + frame['month'])
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.temp_dir.name, max_loaded=1)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_and_predict(self):
+        metadata = self.registry.save("New York", fitted_model(), ['Humidity_pct', 'month'],
+                                      "abc", {'mse': np.float64(1.5), 'r2': 0.9})
+        self.assertEqual(metadata['metrics'], {'mse': 1.5, 'r2': 0.9})
+        predictions = self.registry.predict("New York", [{'Humidity_pct': 40, 'month': 4}])
+        self.assertAlmostEqual(predictions[0], 44.0)
+        self.assertEqual(self.registry.metadata("New York")['data_hash'], "abc")
+
+    def test_lru_cache(self):
+        for name in ("Chicago", "Dallas"):
+            self.registry.save(name, fitted_model(), ['Humidity_pct', 'month'], "abc", {})
+        self.registry.load("Chicago")
+        self.registry.load("Chicago")
+        self.registry.load("Dallas")  # evicts Chicago
+        self.registry.load("Chicago")
+        self.assertEqual((self.registry.hits, self.registry.misses), (1, 3))
+
+    def test_evicted_batcher_still_predicts(self):
+        for name in ("Chicago", "Dallas"):
+            self.registry.save(name, fitted_model(), ['Humidity_pct', 'month'], "abc", {})
+        batcher, _ = self.registry.load("Chicago")
+        self.registry.load("Dallas")  # evicts and closes Chicago's batcher
+        results = []
+        thread = threading.Thread(target=lambda: results.append(batcher.predict([[40, 4]])[0]))
+        thread.start()
+        thread.join(timeout=5)
+        self.assertTrue(batcher.closed)
+        self.assertEqual(len(results), 1)
+        self.assertAlmostEqual(results[0], 44.0)
+
+    def test_concurrent_cold_loads_read_once(self):
+        self.registry.save("Chicago", fitted_model(), ['Humidity_pct', 'month'], "abc", {})
+        entries = []
+        threads = [threading.Thread(target=lambda: entries.append(self.registry.load("Chicago")))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.registry.misses, 1)
+        self.assertTrue(all(entry is entries[0] for entry in entries))
+
+    def test_similar_names_do_not_collide(self):
+        self.registry.save("New York", fitted_model(), ['Humidity_pct', 'month'], "spaces", {})
+        self.registry.save("New_York", fitted_model(), ['Humidity_pct', 'month'], "underscore", {})
+        self.assertEqual(self.registry.metadata("New York")['data_hash'], "spaces")
+        self.assertEqual(self.registry.metadata("New_York")['data_hash'], "underscore")
+
+    def test_rows_are_validated_before_batching(self):
+        self.registry.save("Chicago", fitted_model(), ['Humidity_pct', 'month'], "abc", {})
+        self.assertEqual(self.registry.predict("Chicago", []), [])
+        for rows in ([[40, 4]], {'Humidity_pct': 40}, [{'Humidity_pct': None, 'month': 4}]):
+            with self.assertRaises(ValueError):
+                self.registry.predict("Chicago", rows)
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            self.registry.load("Atlantis")
+
+    def test_frame_digest(self):
+        frame = pd.DataFrame({'a': [1.0, 2.0]})
+        self.assertEqual(frame_digest(frame), frame_digest(frame.copy()))
+        self.assertNotEqual(frame_digest(frame), frame_digest(frame * 2))
+
+
+class TestPredictionBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_share_a_call(self):
+        model = CountingModel()
+        batcher = PredictionBatcher(model, max_wait=0.2)
+        results = {}
+
+        def request(i):
+            results[i] = batcher.predict([[i]])[0]
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        self.assertEqual(results, {i: 2 * i for i in range(8)})
+        self.assertLess(len(model.calls), 8)
+        self.assertEqual(sum(model.calls), 8)
+
+    def test_malformed_request_does_not_fail_its_batch(self):
+        batcher = PredictionBatcher(CountingModel(), max_wait=0.2)
+        results = {}
+        thread = threading.Thread(target=lambda: results.update(good=batcher.predict([[1.0, 2.0]])))
+        thread.start()
+        self.assertEqual(len(batcher.predict([])), 0)
+        with self.assertRaises(ValueError):
+            batcher.predict([1.0, 2.0])
+        thread.join()
+        batcher.close()
+        self.assertEqual(list(results['good']), [2.0])
+
+
+class TestPredictRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.temp_dir.name)
+        self.registry.save("Chicago", fitted_model(), ['Humidity_pct', 'month'], "abc", {})
+        self.client = web.app.test_client()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_predict(self):
+        with patch.object(web, 'model_registry', self.registry):
+            response = self.client.post('/predict/Chicago', json={'rows': [{'Humidity_pct': 1, 'month': 1}]})
+            self.assertEqual(response.status_code, 200)
+            self.assertAlmostEqual(response.get_json()['predictions'][0], 2.0)
+            self.assertEqual(self.client.get('/predict/Chicago?Humidity_pct=1').status_code, 400)
+            self.assertEqual(self.client.get('/predict/Atlantis').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
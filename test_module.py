@@ -0,0 +1,129 @@
+import unittest
+import os
+import tempfile
+from datetime import datetime
+from flask import Flask
+import module as mod
+from database import configure_app, read_engine
+
+HEADER = "Location,Date_Time,Temperature_C,Humidity_pct,Precipitation_mm,Wind_Speed_kmh\n"
+ROWS = [
+    "Chicago,2024-01-01 00:00:00,-3.5,70.1,0.0,12.3\n",
+    "Chicago,2024-01-01 01:00:00,-4.0,,0.5,10.1\n",
+    "Phoenix,2024-01-01 00:00:00,12.0,20.4,0.0,5.6\n",
+    "Phoenix,2024-01-01 01:00:00,,22.0,0.0,6.2\n",
+    "Phoenix,2024-01-01 02:00:00,11.5,22.0,0.0,6.2\n",
+]
+
+
+class TestPopulateDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_csv = os.path.join(self.temp_dir.name, "weather_data.csv")
+        with open(self.temp_csv, 'w') as f:
+            f.write(HEADER + "".join(ROWS[:3]))
+        self.app = Flask(__name__)
+        configure_app(self.app, mod.db, "sqlite:///" + os.path.join(self.temp_dir.name, "weather.db"))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        mod.db.create_all()
+
+    def tearDown(self):
+        mod.db.session.remove()
+        mod.db.engine.dispose()
+        read_engine(mod.db).dispose()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def test_bulk_load(self):
+        inserted = mod.populate_database(self.temp_csv, chunk_size=2)
+        self.assertEqual(inserted, 3)
+        rows = mod.WeatherData.query.order_by(mod.WeatherData.id).all()
+        self.assertEqual([r.location for r in rows], ["Chicago", "Chicago", "Phoenix"])
+        self.assertIsNone(rows[1].humidity)
+        self.assertEqual(rows[0].date_time, datetime(2024, 1, 1, 0, 0))
+        self.assertEqual(mod.cached_row_count(), 3)
+
+    def test_rerun_only_appends_new_rows(self):
+        mod.populate_database(self.temp_csv, chunk_size=2)
+        self.assertEqual(mod.populate_database(self.temp_csv, chunk_size=2), 0)
+        with open(self.temp_csv, 'a') as f:
+            f.write("".join(ROWS[3:]))
+        # The row without a temperature is consumed but not inserted
+        self.assertEqual(mod.populate_database(self.temp_csv, chunk_size=2), 1)
+        self.assertEqual(mod.WeatherData.query.count(), 4)
+        self.assertEqual(mod.cached_row_count(), 4)
+        log_entry = mod.db.session.get(mod.IngestLog, os.path.abspath(self.temp_csv))
+        self.assertEqual(log_entry.rows_loaded, 5)
+
+    def test_rerun_resumes_from_byte_offset(self):
+        mod.populate_database(self.temp_csv)
+        with open(self.temp_csv, 'a') as f:
+            f.write(ROWS[4] + "Phoenix,2024-01-01 03")
+        # The half-written last line is left for the next run
+        self.assertEqual(mod.populate_database(self.temp_csv), 1)
+        with open(self.temp_csv, 'a') as f:
+            f.write(":00:00,10.5,23.0,0.0,6.0\n")
+        self.assertEqual(mod.populate_database(self.temp_csv), 1)
+        cursor = mod.db.session.get(mod.IngestCursor, os.path.abspath(self.temp_csv))
+        self.assertEqual(cursor.byte_offset, os.path.getsize(self.temp_csv))
+        self.assertEqual(mod.cached_row_count(), 5)
+
+    def test_legacy_row_count_becomes_offset(self):
+        mod.db.session.add(mod.IngestLog(source=os.path.abspath(self.temp_csv), rows_loaded=2))
+        mod.db.session.commit()
+        self.assertEqual(mod.populate_database(self.temp_csv), 1)
+        self.assertEqual([r.location for r in mod.WeatherData.query.all()], ["Phoenix"])
+
+    def test_directory_with_overlapping_files(self):
+        directory = os.path.join(self.temp_dir.name, "incoming")
+        os.mkdir(directory)
+        with open(os.path.join(directory, "a.csv"), 'w') as f:
+            f.write(HEADER + "".join(ROWS[:3]))
+        # b.csv repeats Chicago 01:00 and adds a later Phoenix reading
+        with open(os.path.join(directory, "b.csv"), 'w') as f:
+            f.write(HEADER + ROWS[1] + ROWS[4])
+        self.assertEqual(mod.populate_database(directory), 4)
+        with open(os.path.join(directory, "c.csv"), 'w') as f:
+            f.write(HEADER + ROWS[4] + "Chicago,2024-01-01 02:00:00,-4.5,72.0,0.0,9.0\n")
+        self.assertEqual(mod.populate_database(directory), 1)
+        marks = {m.location: m.max_date_time.hour for m in mod.LocationWatermark.query.all()}
+        self.assertEqual(marks, {"Chicago": 2, "Phoenix": 2})
+        self.assertEqual(mod.WeatherData.query.count(), 5)
+
+    def test_load_pragmas_are_restored(self):
+        with mod.db.engine.connect() as connection:
+            before = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+        mod.populate_database(self.temp_csv)
+        with mod.db.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql("PRAGMA synchronous").scalar(), before)
+
+    def test_keyset_pages(self):
+        with open(self.temp_csv, 'a') as f:
+            f.write("".join(ROWS[3:]))
+        mod.populate_database(self.temp_csv)
+        first, next_cursor, prev_cursor = mod.fetch_page(per_page=2)
+        self.assertIsNone(prev_cursor)
+        second, next_cursor, prev_cursor = mod.fetch_page(per_page=2, after=next_cursor)
+        self.assertIsNone(next_cursor)
+        ordered = [(r.date_time, r.id) for r in first + second]
+        self.assertEqual(ordered, sorted(ordered))
+        self.assertEqual(len(ordered), 4)
+        back, _, _ = mod.fetch_page(per_page=2, before=prev_cursor)
+        self.assertEqual([r.id for r in back], [r.id for r in first])
+
+    def test_location_and_date_filters(self):
+        mod.populate_database(self.temp_csv)
+        rows, _, _ = mod.fetch_page(location="Chicago", start=datetime(2024, 1, 1, 1))
+        self.assertEqual([(r.location, r.date_time.hour) for r in rows], [("Chicago", 1)])
+
+    def test_location_filter_uses_index(self):
+        plan = mod.db.session.execute(mod.db.text(
+            "EXPLAIN QUERY PLAN SELECT * FROM weather_data "
+            "WHERE location = 'Chicago' ORDER BY date_time, id LIMIT 100"
+        )).fetchall()
+        self.assertIn("ix_weather_data_location_date_time", " ".join(str(r) for r in plan))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import json
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import app as web
+from rendering import ChartRenderer, daily_avg_figure, content_hash, STATE_FILE_NAME
+
+
+def daily_frame(offset=0.0):
+    index = pd.date_range('2024-01-01', periods=5, freq='D', name='Date')
+    return pd.DataFrame({'avg_temp': [1.0, 2.0, 3.0, 2.5, 1.5], 'avg_precip': [0.0, 1.0, 0.5, 0.0, 2.0]},
+                        index=index) + offset
+
+
+class TestChartRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.renderer = ChartRenderer(state_path=os.path.join(self.temp_dir.name, "charts.json"))
+        self.chart = os.path.join(self.temp_dir.name, "daily.png")
+
+    def tearDown(self):
+        self.renderer.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_skips_unchanged_data(self):
+        self.renderer.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        with open(self.chart, 'rb') as f:
+            self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+        self.renderer.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        self.assertEqual((self.renderer.rendered, self.renderer.skipped), (1, 1))
+
+        self.renderer.submit(daily_avg_figure, daily_frame(offset=1.0), self.chart).result()
+        self.assertEqual(self.renderer.rendered, 2)
+        self.assertEqual(self.renderer.etag(self.chart),
+                         content_hash(daily_avg_figure.__name__ + repr(()), daily_frame(offset=1.0)))
+
+    def test_hashes_survive_restart(self):
+        self.renderer.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        restarted = ChartRenderer(state_path=self.renderer.state_path)
+        restarted.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        restarted.shutdown()
+        self.assertEqual((restarted.rendered, restarted.skipped), (0, 1))
+
+
+    def test_state_next_to_images_drops_deleted_ones(self):
+        renderer = ChartRenderer()
+        self.addCleanup(renderer.shutdown)
+        other = os.path.join(self.temp_dir.name, "other.png")
+        renderer.submit(daily_avg_figure, daily_frame(), other).result()
+        os.remove(other)
+        renderer.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        with open(os.path.join(self.temp_dir.name, STATE_FILE_NAME)) as f:
+            self.assertEqual(list(json.load(f)), [os.path.abspath(self.chart)])
+
+    def test_failed_render_leaves_no_temporary_file(self):
+        def partial_write(path, **kwargs):
+            with open(path, 'wb') as f:
+                f.write(b'\x89PNG')
+            raise OSError("disk full")
+
+        with patch('matplotlib.figure.Figure.savefig', side_effect=partial_write):
+            with self.assertRaises(OSError):
+                self.renderer.submit(daily_avg_figure, daily_frame(), self.chart).result()
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+
+class TestChartRoute(unittest.TestCase):
+
+    def test_etag_and_not_modified(self):
+        client = web.app.test_client()
+        with patch.object(web.chart_renderer, 'etag', return_value="abc123"):
+            response = client.get('/charts/temperature_distribution.png')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['ETag'], '"abc123"')
+            response.close()
+            cached = client.get('/charts/temperature_distribution.png', headers={'If-None-Match': '"abc123"'})
+            self.assertEqual(cached.status_code, 304)
+        self.assertEqual(client.get('/charts/missing.png').status_code, 404)
+        self.assertEqual(client.get('/charts/style.css').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
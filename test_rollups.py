@@ -0,0 +1,110 @@
+import unittest
+import pickle
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+import app as web
+from rollups import RollupStore, lttb, downsample
+
+
+def make_frame(hours=24 * 70, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = hours * 2
+    return pd.DataFrame({
+        'Location': np.repeat(['Chicago', 'Phoenix'], hours),
+        'Date_Time': np.tile(pd.date_range('2024-01-01', periods=hours, freq='h'), 2)
+                     + pd.to_timedelta(rng.integers(0, 3600, rows), unit='s'),
+        'Temperature_C': rng.normal(15, 10, rows),
+        'Humidity_pct': rng.uniform(20, 90, rows),
+        'Precipitation_mm': np.where(rng.random(rows) < 0.1, np.nan, rng.exponential(2, rows)),
+        'Wind_Speed_kmh': rng.uniform(0, 30, rows),
+    })
+
+
+class TestRollupStore(unittest.TestCase):
+
+    def test_daily_matches_raw_groupby(self):
+        data = make_frame()
+        daily = RollupStore.from_frame(data).query('daily', location='Phoenix')
+        phoenix = data[data['Location'] == 'Phoenix']
+        expected = phoenix.groupby(phoenix['Date_Time'].dt.floor('D'))['Precipitation_mm'].agg(['mean', 'max'])
+        np.testing.assert_allclose(daily['Precipitation_mm_mean'], expected['mean'])
+        np.testing.assert_allclose(daily['Precipitation_mm_max'], expected['max'])
+
+    def test_incremental_update_matches_rebuild(self):
+        data = make_frame().sort_values('Date_Time')
+        # Split mid-month and mid-day so buckets straddle the two batches
+        cutoff = pd.Timestamp('2024-02-10 13:30')
+        store = RollupStore.from_frame(data[data['Date_Time'] < cutoff])
+        store.update(data[data['Date_Time'] >= cutoff])
+        rebuilt = RollupStore.from_frame(data)
+        for grain in ('hourly', 'daily', 'monthly'):
+            pd.testing.assert_frame_equal(store.query(grain), rebuilt.query(grain))
+        pd.testing.assert_frame_equal(store.by_location(), rebuilt.by_location())
+        self.assertEqual(store.row_count, len(data))
+
+    def test_several_updates_before_a_read(self):
+        data = make_frame().sort_values('Date_Time', ignore_index=True)
+        store = RollupStore.from_frame(data.iloc[:1000])
+        store.query('daily')
+        for start in range(1000, len(data), 700):
+            store.update(data.iloc[start:start + 700])
+        restored = pickle.loads(pickle.dumps(store))
+        for grain in ('hourly', 'daily', 'monthly'):
+            pd.testing.assert_frame_equal(restored.tables[grain], RollupStore.from_frame(data).tables[grain])
+
+    def test_rows_without_location_are_left_out(self):
+        data = make_frame(48)
+        data.loc[0, 'Location'] = None
+        store = RollupStore.from_frame(data.astype({'Location': 'category'}))
+        self.assertEqual(list(store.by_location().index), ['Chicago', 'Phoenix'])
+        self.assertEqual(int(store.tables['monthly']['Temperature_C_count'].sum()), len(data) - 1)
+
+    def test_unknown_grain(self):
+        with self.assertRaises(ValueError):
+            RollupStore.from_frame(make_frame(48)).query('weekly')
+
+
+class TestDownsampling(unittest.TestCase):
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        y = np.zeros(1000)
+        y[500] = 100.0
+        indices = lttb(np.arange(1000), y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertIn(500, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_downsample_frame(self):
+        frame = pd.DataFrame({'v': np.sin(np.arange(500) / 10)},
+                             index=pd.date_range('2024-01-01', periods=500, freq='h'))
+        self.assertEqual(len(downsample(frame, 'v', 100)), 100)
+        self.assertEqual(len(downsample(frame, 'v', 1000)), 500)
+        self.assertEqual(list(downsample(frame, 'v', 2).index), [frame.index[0], frame.index[-1]])
+        self.assertEqual(len(downsample(frame, 'v', 1)), 1)
+        with self.assertRaises(ValueError):
+            downsample(frame, 'v', 0)
+
+
+class TestRollupRoute(unittest.TestCase):
+
+    def test_json_series(self):
+        store = RollupStore.from_frame(make_frame())
+        fake = type('Analysis', (), {'rollups': lambda self: store})()
+        client = web.app.test_client()
+        with patch.object(web.dataset_cache, 'reading', return_value=nullcontext(fake)):
+            body = client.get('/api/rollups?grain=hourly&location=Chicago&max_points=200').get_json()
+            self.assertEqual(body['total_points'], 24 * 70)
+            self.assertEqual(len(body['points']), 200)
+            self.assertIn('Temperature_C_mean', body['points'][0])
+            monthly = client.get('/api/rollups?grain=monthly').get_json()
+            self.assertEqual([p['time'][:7] for p in monthly['points']], ['2024-01', '2024-02', '2024-03'])
+            self.assertEqual(client.get('/api/rollups?grain=weekly').status_code, 400)
+            self.assertEqual(len(client.get('/api/rollups?grain=hourly&max_points=1').get_json()['points']), 1)
+            for max_points in (0, -5):
+                self.assertEqual(client.get(f'/api/rollups?max_points={max_points}').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from streaming import RunningStats, ValueHistogram, GroupAggregates
+from weather_analysis import WeatherAnalysis
+
+
+def make_weather_csv(path, rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Location': rng.choice(['Chicago', 'Dallas', 'Phoenix'], rows),
+        'Date_Time': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 366 * 24, rows), unit='h'),
+        'Temperature_C': rng.normal(15, 10, rows).round(2),
+        'Humidity_pct': rng.uniform(20, 90, rows).round(2),
+        'Precipitation_mm': rng.exponential(2, rows).round(2),
+        'Wind_Speed_kmh': rng.uniform(0, 30, rows).round(2),
+    })
+    frame.loc[::50, 'Precipitation_mm'] = np.nan
+    frame.to_csv(path, index=False)
+
+
+class TestAccumulators(unittest.TestCase):
+
+    def test_merge_matches_single_pass(self):
+        frame = pd.DataFrame({'Location': list('abab'), 'Temperature_C': [3.0, -1.0, 7.0, 2.0]})
+        left = RunningStats('Temperature_C').update(frame.iloc[:2])
+        right = RunningStats('Temperature_C').update(frame.iloc[2:])
+        merged = left.merge(right)
+        self.assertEqual((merged.count, merged.min, merged.max), (4, -1.0, 7.0))
+        self.assertEqual(merged.max_row['Location'], 'a')
+
+        groups = GroupAggregates('Location', ['Temperature_C'])
+        groups.update(frame.iloc[:3]).merge(GroupAggregates('Location', ['Temperature_C']).update(frame.iloc[3:]))
+        pd.testing.assert_frame_equal(groups.means(), frame.groupby('Location')[['Temperature_C']].mean())
+
+    def test_float32_chunks_sum_in_float64(self):
+        values = np.full(3, 0.1, dtype='float32')
+        frame = pd.DataFrame({'Location': ['a'] * 3, 'Temperature_C': values})
+        groups = GroupAggregates('Location', ['Temperature_C']).update(frame)
+        self.assertEqual(groups.sums['Temperature_C'].dtype, np.float64)
+        self.assertEqual(groups.sums.loc['a', 'Temperature_C'], values.astype('float64').sum())
+
+    def test_histogram_quantiles(self):
+        values = pd.Series([1.0, 2.0, 2.0, 3.0, 10.0, 11.0])
+        histogram = ValueHistogram(resolution=0.01).update(values)
+        self.assertAlmostEqual(histogram.median(), values.median())
+        self.assertAlmostEqual(histogram.quantile(0.25), values.quantile(0.25))
+        self.assertAlmostEqual(histogram.mode(), 2.0)
+
+
+class TestStreamAnalysis(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.temp_csv = os.path.join(cls.temp_dir.name, "weather_data.csv")
+        make_weather_csv(cls.temp_csv)
+        cls.analysis = WeatherAnalysis(cls.temp_csv)
+        cls.analysis.fetch_data()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_matches_in_memory_results(self):
+        results = self.analysis.stream_analysis(chunk_size=300)
+        expected = self.analysis.calculate_statistics()
+        self.assertEqual(results['stats'], expected)
+
+        data = self.analysis.data
+        # fetch_data reads float32 and categorical columns; the streamed means are float64
+        expected_summary = data.astype({'Location': str, 'Temperature_C': 'float64',
+                                        'Precipitation_mm': 'float64'}).groupby('Location').agg(
+            avg_temp=('Temperature_C', 'mean'),
+            avg_precip=('Precipitation_mm', 'mean')
+        ).reset_index()
+        pd.testing.assert_frame_equal(results['summary'], expected_summary)
+
+        hottest = data.loc[data['Temperature_C'].idxmax()]
+        self.assertEqual(results['hottest_day']['Date_Time'], hottest['Date_Time'])
+        self.assertEqual(results['coldest_day']['Temperature_C'], data['Temperature_C'].min())
+        self.assertEqual(results['row_count'], len(data))
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            WeatherAnalysis("non_existing_file.csv").stream_analysis()
+
+if __name__ == '__main__':
+    unittest.main()
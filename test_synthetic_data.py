@@ -0,0 +1,49 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from synthetic_data import COLUMNS, city_climates, expected_rows, write_synthetic_csv
+from weather_analysis import WeatherAnalysis
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "weather_data.csv")
+
+    def test_schema_and_row_count(self):
+        rows = write_synthetic_csv(self.path, cities=3, years=1, start_year=2023, freq='6h')
+        data = pd.read_csv(self.path, parse_dates=['Date_Time'])
+        self.assertEqual(list(data.columns), COLUMNS)
+        self.assertEqual(rows, len(data))
+        self.assertEqual(rows, expected_rows(3, 1, start_year=2023, freq='6h'))
+        self.assertEqual(rows, 3 * 365 * 4)
+        # Every city has a reading at every step, in time order
+        self.assertTrue(data['Date_Time'].is_monotonic_increasing)
+        self.assertEqual(set(data.groupby('Location').size()), {365 * 4})
+        self.assertFalse(data.isna().any().any())
+
+    def test_climates_follow_the_seasons(self):
+        write_synthetic_csv(self.path, cities=['Chicago', 'Phoenix'], years=1)
+        data = pd.read_csv(self.path, parse_dates=['Date_Time'])
+        monthly = data.groupby(['Location', data['Date_Time'].dt.month])['Temperature_C'].mean()
+        self.assertGreater(monthly['Chicago', 7] - monthly['Chicago', 1], 15)
+        self.assertGreater(monthly['Phoenix', 1], monthly['Chicago', 1])
+        self.assertTrue(data['Humidity_pct'].between(5, 100).all())
+        self.assertTrue((data['Precipitation_mm'] >= 0).all())
+
+    def test_extra_cities_and_missing_values(self):
+        self.assertEqual(list(city_climates(12))[-2:], ['City 011', 'City 012'])
+        self.assertEqual(city_climates(12), city_climates(12))
+        write_synthetic_csv(self.path, cities=12, years=1, freq='D', missing_rate=0.1)
+        analysis = WeatherAnalysis(self.path)
+        analysis.fetch_data()
+        # Temperatures are never blanked, so cleaning keeps every row
+        self.assertEqual(len(analysis.data), 12 * 366)
+        self.assertGreater(analysis.data['Humidity_pct'].isna().mean(), 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
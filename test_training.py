@@ -0,0 +1,116 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from training import train_city_models, tune_model, build_pipeline, selected_features
+from model_registry import ModelRegistry
+from weather_analysis import WeatherAnalysisImproved
+
+FEATURES = ['Humidity_pct', 'Wind_Speed_kmh']
+
+
+def make_frame(rows_per_city=200, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city, slope in [('Chicago', 0.5), ('Phoenix', -0.3), ('Dallas', 0.1)]:
+        humidity = rng.uniform(20, 90, rows_per_city)
+        wind = rng.uniform(0, 30, rows_per_city)
+        frames.append(pd.DataFrame({
+            'Location': city,
+            'Humidity_pct': humidity,
+            'Wind_Speed_kmh': wind,
+            'Temperature_C': slope * humidity + 0.1 * wind,
+        }))
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+class TestTrainCityModels(unittest.TestCase):
+
+    def test_one_result_per_city(self):
+        results = train_city_models(make_frame(), 'Temperature_C', FEATURES, max_workers=2,
+                                    model_params={'n_estimators': 10})
+        self.assertEqual(sorted(results), ['Chicago', 'Dallas', 'Phoenix'])
+        for result in results.values():
+            self.assertEqual(result['n_rows'], 200)
+            self.assertGreater(result['r2'], 0.8)
+            self.assertGreater(result['fit_seconds'], 0)
+            self.assertNotIn('model', result)
+
+    def test_selected_cities_and_models(self):
+        results = train_city_models(make_frame(), 'Temperature_C', FEATURES, cities=['Phoenix'],
+                                    max_workers=1, return_models=True, model_params={'n_estimators': 5})
+        self.assertEqual(list(results), ['Phoenix'])
+        self.assertEqual(results['Phoenix']['model'].n_features_in_, 2)
+
+    def test_failed_city_does_not_abort_others(self):
+        results = train_city_models(self.with_one_row_city(), 'Temperature_C', FEATURES, max_workers=2,
+                                    return_models=True, model_params={'n_estimators': 5, 'n_jobs': 2})
+        self.assertEqual(results['Reno']['n_rows'], 1)
+        self.assertIn('error', results['Reno'])
+        self.assertGreater(results['Chicago']['r2'], 0.8)
+        self.assertEqual(results['Chicago']['model'].n_jobs, 2)
+
+    def test_failed_city_is_not_saved(self):
+        analysis = WeatherAnalysisImproved("unused.csv")
+        analysis.data = self.with_one_row_city()
+        with tempfile.TemporaryDirectory() as directory:
+            registry = ModelRegistry(directory)
+            results = analysis.train_models_by_city('Temperature_C', FEATURES, max_workers=2,
+                                                    model_params={'n_estimators': 5}, registry=registry)
+            self.assertIn('error', results['Reno'])
+            self.assertEqual(registry.metadata('Dallas')['feature_columns'], FEATURES)
+            with self.assertRaises(KeyError):
+                registry.metadata('Reno')
+
+    @staticmethod
+    def with_one_row_city():
+        return pd.concat([make_frame(), pd.DataFrame({'Location': ['Reno'], 'Humidity_pct': [50.0],
+                                                      'Wind_Speed_kmh': [5.0], 'Temperature_C': [20.0]})],
+                         ignore_index=True)
+
+    def test_unknown_city(self):
+        with self.assertRaises(ValueError):
+            train_city_models(make_frame(), 'Temperature_C', FEATURES, cities=['Atlantis'])
+
+
+class TestTuneModel(unittest.TestCase):
+
+    def setUp(self):
+        frame = make_frame(rows_per_city=150)
+        frame['noise'] = np.random.default_rng(1).normal(size=len(frame))
+        self.X = frame[FEATURES + ['noise']]
+        self.y = frame['Temperature_C']
+
+    def test_reports_every_candidate(self):
+        grid = {'n_estimators': [5, 10], 'max_depth': [4, None]}
+        for search in ('halving', 'random'):
+            model, report = tune_model(self.X, self.y, search=search, param_distributions=grid,
+                                       n_candidates=4, n_splits=2, n_jobs=1)
+            # Successive halving reports each candidate once per round it reached
+            self.assertGreaterEqual(len(report['candidates']), 4)
+            scores = [c['cv_mse'] for c in report['candidates']]
+            self.assertEqual(scores, sorted(scores))
+            self.assertIn(report['best_params']['max_depth'], (4, None))
+            self.assertEqual(len(model.predict(self.X.head(3))), 3)
+
+    def test_unknown_search(self):
+        with self.assertRaises(ValueError):
+            tune_model(self.X, self.y, search='grid')
+
+    def test_pruned_search_caches_rfe_fits(self):
+        grid = {'n_estimators': [5, 10]}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            model, _ = tune_model(self.X, self.y, search='random', param_distributions=grid, n_candidates=2,
+                                  n_splits=2, n_jobs=1, prune_features=2, cache_dir=cache_dir)
+            self.assertTrue(os.listdir(cache_dir))
+            self.assertEqual(selected_features(model, list(self.X.columns)), FEATURES)
+
+    def test_rfe_pruning(self):
+        pipeline = build_pipeline({'n_estimators': 10}, prune_features=2).fit(self.X, self.y)
+        kept = selected_features(pipeline, list(self.X.columns))
+        self.assertEqual(len(kept), 2)
+        self.assertNotIn('noise', kept)
+
+if __name__ == '__main__':
+    unittest.main()
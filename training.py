@@ -0,0 +1,197 @@
+"""
+Model training helpers: per-city batch training and hyperparameter search.
+
+For batch training the feature matrix is written once to a .npy file sorted
+by city; workers memory-map it and slice out their city's contiguous block,
+so the frame is never pickled to each process.
+"""
+import os
+import time
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from sklearn.model_selection import train_test_split, TimeSeriesSplit, RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.feature_selection import RFE
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from frame_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+# Fitted RFE selections reused across tune_model runs; safe to delete at any time
+DEFAULT_TUNE_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "pipelines")
+
+# Search space for tune_model; keys are RandomForestRegressor parameters
+DEFAULT_PARAM_DISTRIBUTIONS = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [None, 8, 16, 32],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': [1.0, 0.5, 'sqrt'],
+}
+
+
+def _fit_city(matrix_path, city, start, stop, model_params, return_model):
+    """Worker: fit and score one city's model on rows [start, stop) of the shared matrix."""
+    started = time.perf_counter()
+    matrix = np.load(matrix_path, mmap_mode='r')
+    block = matrix[start:stop]
+    X, y = block[:, :-1], block[:, -1]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # One core per worker unless the caller asked for more
+    model = RandomForestRegressor(**{'n_jobs': 1, **model_params})
+    model.fit(X_train, y_train)
+    predictions = model.predict(X_test)
+
+    result = {
+        'mse': mean_squared_error(y_test, predictions),
+        'r2': r2_score(y_test, predictions),
+        'n_rows': stop - start,
+        'fit_seconds': time.perf_counter() - started,
+    }
+    if return_model:
+        result['model'] = model
+    return city, result
+
+
+def train_city_models(data, target_column, feature_columns, cities=None, max_workers=None,
+                      return_models=False, model_params=None):
+    """
+    Train one RandomForestRegressor per city in parallel.
+
+    max_workers is the core budget (defaults to all cores); each worker fits
+    with n_jobs=1 unless model_params sets n_jobs. Returns {city: {'mse', 'r2', 'n_rows', 'fit_seconds'[, 'model']}};
+    a city whose model could not be trained gets {'error', 'n_rows'} instead.
+    """
+    missing = [col for col in [target_column, *feature_columns] if col not in data.columns]
+    if missing:
+        raise ValueError(f"Missing required columns in the dataset: {missing}")
+
+    params = dict(DEFAULT_MODEL_PARAMS, **(model_params or {}))
+    if cities is not None:
+        data = data[data['Location'].isin(cities)]
+    data = data.sort_values('Location', kind='mergesort')
+    locations = data['Location'].astype(str).to_numpy()
+    if cities is not None:
+        absent = set(cities) - set(locations)
+        if absent:
+            raise ValueError(f"No data available for: {sorted(absent)}")
+
+    # City blocks are contiguous after sorting: [start, stop) per city
+    names, starts = np.unique(locations, return_index=True)
+    order = np.argsort(starts)
+    names, starts = names[order], starts[order]
+    stops = np.append(starts[1:], len(locations))
+    max_workers = max_workers or os.cpu_count()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        matrix_path = os.path.join(tmp_dir, "features.npy")
+        np.save(matrix_path, data[list(feature_columns) + [target_column]].to_numpy(dtype='float64'))
+        del data
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(names)) or 1) as executor:
+            futures = {
+                executor.submit(_fit_city, matrix_path, name, int(start), int(stop), params, return_models):
+                    (name, int(stop - start))
+                for name, start, stop in zip(names, starts, stops)
+            }
+            for future in as_completed(futures):
+                city, n_rows = futures[future]
+                try:
+                    _, result = future.result()
+                except Exception as e:
+                    # One city failing (e.g. too few rows to split) must not abort the others
+                    logging.error(f"Error training model for {city}: {e}")
+                    results[city] = {'error': str(e), 'n_rows': n_rows}
+                    continue
+                results[city] = result
+                logging.info(f"Trained model for {city} in {result['fit_seconds']:.2f}s (R² {result['r2']:.3f})")
+    return results
+
+
+def build_pipeline(model_params=None, prune_features=None, cache_dir=None):
+    """
+    Random Forest pipeline with an optional RFE step keeping prune_features columns.
+
+    cache_dir enables Pipeline memory, so the RFE selection is fitted once per
+    training fold and reused by every candidate in a search.
+    """
+    steps = []
+    if prune_features:
+        selector = RFE(RandomForestRegressor(n_estimators=25, random_state=42, n_jobs=1),
+                       n_features_to_select=prune_features)
+        steps.append(('select', selector))
+    steps.append(('model', RandomForestRegressor(**dict(DEFAULT_MODEL_PARAMS, **(model_params or {})))))
+    return Pipeline(steps, memory=cache_dir)
+
+
+def selected_features(pipeline, feature_columns):
+    """Feature columns kept by the pipeline's RFE step (all of them if it has none)."""
+    if 'select' not in pipeline.named_steps:
+        return list(feature_columns)
+    support = pipeline.named_steps['select'].support_
+    return [column for column, keep in zip(feature_columns, support) if keep]
+
+
+def tune_model(X, y, search='halving', param_distributions=None, n_candidates=20, n_splits=3,
+               prune_features=None, n_jobs=-1, cache_dir=DEFAULT_TUNE_CACHE_DIR, random_state=42):
+    """
+    Search Random Forest hyperparameters with time-ordered cross-validation.
+
+    X and y must be in time order: TimeSeriesSplit always validates on data
+    later than the training folds. search is 'halving' (successive halving
+    over the number of samples) or 'random'. Candidates are evaluated in
+    parallel on n_jobs cores.
+
+    With prune_features, the fitted RFE step is cached in cache_dir (on by
+    default, None turns it off), so each training fold is pruned once for
+    every candidate and again only when the data changes. The forest itself
+    is refitted per candidate, since its parameters are what is searched.
+
+    Returns (best_pipeline, report) where report lists every candidate with
+    its parameters, mean fit time and cross-validated MSE.
+    """
+    params = {f'model__{name}': values
+              for name, values in (param_distributions or DEFAULT_PARAM_DISTRIBUTIONS).items()}
+    # Only the RFE step is a cacheable transformer; without it there is nothing to store
+    pipeline = build_pipeline({'n_jobs': 1}, prune_features=prune_features,
+                              cache_dir=cache_dir if prune_features else None)
+    cv = TimeSeriesSplit(n_splits=n_splits)
+    if search == 'halving':
+        searcher = HalvingRandomSearchCV(pipeline, params, n_candidates=n_candidates, cv=cv,
+                                         scoring='neg_mean_squared_error', n_jobs=n_jobs,
+                                         random_state=random_state)
+    elif search == 'random':
+        searcher = RandomizedSearchCV(pipeline, params, n_iter=n_candidates, cv=cv,
+                                      scoring='neg_mean_squared_error', n_jobs=n_jobs,
+                                      random_state=random_state)
+    else:
+        raise ValueError(f"Unknown search strategy: {search}")
+
+    started = time.perf_counter()
+    searcher.fit(X, y)
+    elapsed = time.perf_counter() - started
+
+    cv_results = searcher.cv_results_
+    candidates = []
+    for i, candidate_params in enumerate(cv_results['params']):
+        candidates.append({
+            'params': {name.replace('model__', ''): value for name, value in candidate_params.items()},
+            'n_samples': int(cv_results['n_resources'][i]) if 'n_resources' in cv_results else len(X),
+            'fit_seconds': float(cv_results['mean_fit_time'][i]),
+            'score_seconds': float(cv_results['mean_score_time'][i]),
+            'cv_mse': float(-cv_results['mean_test_score'][i]),
+        })
+    candidates.sort(key=lambda c: (np.isnan(c['cv_mse']), c['cv_mse']))
+    report = {
+        'best_params': {name.replace('model__', ''): value for name, value in searcher.best_params_.items()},
+        'search_seconds': elapsed,
+        'candidates': candidates,
+    }
+    logging.info(f"Tuned model in {elapsed:.2f}s, best params {report['best_params']}")
+    return searcher.best_estimator_, report
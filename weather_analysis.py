@@ -1,309 +1,724 @@
-import pandas as pd
-import module as mod
-import logging
-import os
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend for plots
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.feature_selection import RFE
-
-# Set up logging
-logging.basicConfig(
-    filename='weather_analysis.log', 
-    level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] %(filename)s:%(lineno)d: %(message)s'
-)
-
-class WeatherAnalysis:
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.data = None
-
-    def fetch_data(self):
-        """Fetches and cleans the data from the CSV file."""
-        try:
-            if os.path.exists(self.file_path):
-                fetcher = mod.DataFetcher(self.file_path)
-                self.data = fetcher.csv_pandas()
-
-                # Ensure datetime parsing
-                self.data['Date_Time'] = pd.to_datetime(self.data['Date_Time'], errors='coerce')
-
-                # Drop rows with missing essential data
-                self.data = self.data.dropna(subset=['Temperature_C', 'Date_Time'])
-
-                # Encode categorical 'Location' column as numeric values
-                label_encoder = LabelEncoder()
-                self.data['Location_Encoded'] = label_encoder.fit_transform(self.data['Location'])
-
-                # Add time-based features
-                self.data['month'] = self.data['Date_Time'].dt.month
-                self.data['season'] = self.data['month'].apply(lambda x: (x % 12 + 3) // 3)  # 1=Winter, 2=Spring, etc.
-
-                logging.info(f"Data fetched and cleaned successfully from {self.file_path}")
-            else:
-                raise FileNotFoundError(f"File {self.file_path} does not exist.")
-        except Exception as e:
-            logging.error(f"Error fetching data: {e}")
-            raise
-
-    def print_temperatures(self, limit=10):
-        """Print a limited number of temperature records."""
-        try:
-            for i, temp in enumerate(self.data['Temperature_C'][:limit]):
-                print(f"Temperature {i + 1}: {temp:.2f}°C")
-            logging.info("Printed temperature records successfully.")
-        except Exception as e:
-            logging.error(f"Error printing temperatures: {e}")
-            raise
-
-    def calculate_statistics(self):
-        """Calculate and return statistics for the temperature data."""
-        try:
-            temp_data = self.data['Temperature_C']
-            stats = {
-                'mean_temp': round(temp_data.mean(), 2),
-                'median_temp': round(temp_data.median(), 2),
-                'mode_temp': round(temp_data.mode()[0], 2),
-                'range_temp': round(temp_data.max() - temp_data.min(), 2),
-            }
-            logging.info("Statistics calculated successfully.")
-            return stats
-        except Exception as e:
-            logging.error(f"Error calculating statistics: {e}")
-            return {}
-
-    def find_extreme_weather(self):
-        """Identify the hottest and coldest days in the dataset."""
-        try:
-            hottest_day = self.data.loc[self.data['Temperature_C'].idxmax()]
-            coldest_day = self.data.loc[self.data['Temperature_C'].idxmin()]
-            print(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']:.2f}°C")
-            print(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']:.2f}°C")
-            logging.info(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']:.2f}°C")
-            logging.info(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']:.2f}°C")
-        except Exception as e:
-            logging.error(f"Error finding extreme weather: {e}")
-            raise
-
-    def plot_daily_avg_temp_and_precip(self, save_path="static/daily_avg_temp_precip.png"):
-        """Plot daily average temperature and precipitation."""
-        try:
-            self.data['Date'] = self.data['Date_Time'].dt.date
-            daily_data = self.data.groupby('Date').agg(
-                avg_temp=('Temperature_C', 'mean'),
-                avg_precip=('Precipitation_mm', 'mean')
-            )
-
-            fig, ax1 = plt.subplots(figsize=(12, 6))
-            ax2 = ax1.twinx()
-            ax1.plot(daily_data.index, daily_data['avg_temp'], 'g-', label="Avg Temp (°C)")
-            ax2.bar(daily_data.index, daily_data['avg_precip'], color='blue', alpha=0.5, label="Avg Precip (mm)")
-
-            ax1.set_xlabel('Date')
-            ax1.set_ylabel('Temperature (°C)', color='green')
-            ax2.set_ylabel('Precipitation (mm)', color='blue')
-            plt.xticks(rotation=45)
-
-            plt.savefig(save_path, bbox_inches='tight')
-            logging.info(f"Saved daily average temperature and precipitation plot to {save_path}")
-        except Exception as e:
-            logging.error(f"Error plotting daily avg temp and precip: {e}")
-            raise
-
-    def plot_temperature_distribution(self, save_path="static/temperature_distribution.png"):
-        """Plot temperature distribution as a histogram."""
-        try:
-            plt.hist(self.data['Temperature_C'], bins=20, color='skyblue', edgecolor='black')
-            plt.xlabel('Temperature (°C)')
-            plt.ylabel('Frequency')
-            plt.title('Temperature Distribution')
-            plt.savefig(save_path, bbox_inches='tight')
-            logging.info(f"Saved temperature distribution plot to {save_path}")
-        except Exception as e:
-            logging.error(f"Error plotting temperature distribution: {e}")
-
-    def summarize_by_location(self):
-        """Print a summary of average temperature and precipitation for each location."""
-        try:
-            summary = self.data.groupby('Location').agg(
-                avg_temp=('Temperature_C', 'mean'),
-                avg_precip=('Precipitation_mm', 'mean')
-            ).reset_index()
-            print("Location-wise Weather Summary:")
-            print(summary)
-            logging.info("Location-based summary generated successfully.")
-        except Exception as e:
-            logging.error(f"Error summarizing by location: {e}")
-            raise
-
-    def save_summary(self, output_path="weather_summary.txt"):
-        """Save summary statistics to a text file."""
-        try:
-            with open(output_path, 'w') as f:
-                hottest_day = self.data.loc[self.data['Temperature_C'].idxmax()]
-                coldest_day = self.data.loc[self.data['Temperature_C'].idxmin()]
-                f.write(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']}°C\n")
-                f.write(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']}°C\n")
-                f.write("\nSummary by Location:\n")
-                summary = self.data.groupby('Location').agg(
-                    avg_temp=('Temperature_C', 'mean'),
-                    avg_precip=('Precipitation_mm', 'mean')
-                )
-                f.write(summary.to_string())
-                print(f"Summary saved to {output_path}")
-                logging.info("Summary saved successfully.")
-        except Exception as e:
-            logging.error(f"Error saving summary: {e}")
-            raise
-
-from sklearn.ensemble import RandomForestRegressor
-import numpy as np
-
-class WeatherAnalysisImproved(WeatherAnalysis):
-    def remove_outliers(self):
-        """Remove outliers using the IQR method."""
-        try:
-            q1 = self.data['Temperature_C'].quantile(0.25)
-            q3 = self.data['Temperature_C'].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            self.data = self.data[(self.data['Temperature_C'] >= lower_bound) & 
-                                  (self.data['Temperature_C'] <= upper_bound)]
-            logging.info("Outliers removed successfully.")
-        except Exception as e:
-            logging.error(f"Error removing outliers: {e}")
-            raise
-
-    def add_features(self):
-        """Add lagged and interaction features."""
-        try:
-            # Lagged features
-            self.data['temp_lag_1'] = self.data['Temperature_C'].shift(1)
-            self.data['temp_lag_7'] = self.data['Temperature_C'].shift(7)
-            
-            # Interaction terms
-            self.data['humidity_precip_interaction'] = self.data['Humidity_pct'] * self.data['Precipitation_mm']
-            
-            # Drop rows with NaN due to lagged features
-            self.data.dropna(inplace=True)
-            logging.info("Lagged and interaction features added successfully.")
-        except Exception as e:
-            logging.error(f"Error adding features: {e}")
-            raise
-
-    def train_predictive_model(self, target_column, feature_columns, city=None, graph_path="static/actual_vs_predicted_rf.png"):
-        """Train a Random Forest model and plot Actual vs Predicted values."""
-        try:
-            if city:
-                city_data = self.data[self.data['Location'] == city]
-                if city_data.empty:
-                    raise ValueError(f"No data available for the city: {city}")
-            else:
-                city_data = self.data
-
-            # Ensure required columns exist
-            if target_column not in city_data.columns or not all(col in city_data.columns for col in feature_columns):
-                raise ValueError("Missing required columns in the dataset.")
-
-            # Prepare data
-            X = city_data[feature_columns]
-            y = city_data[target_column]
-
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-            # Train the model (Random Forest)
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
-
-            # Make predictions
-            predictions = model.predict(X_test)
-
-            # Evaluate the model
-            mse = mean_squared_error(y_test, predictions)
-            r2 = r2_score(y_test, predictions)
-
-            # Align dates with test data
-            test_indices = X_test.index
-            test_dates = city_data.loc[test_indices, 'Date_Time']
-
-            # Create a results DataFrame for daily averages
-            results_df = pd.DataFrame({
-                'Date': test_dates.dt.date,
-                'Actual': y_test.values,
-                'Predicted': predictions
-            })
-            daily_results = results_df.groupby('Date').mean().reset_index()
-
-            # Plot daily averages
-            plt.figure(figsize=(12, 6))
-            plt.plot(daily_results['Date'], daily_results['Actual'], label="Actual", color="blue", linestyle='-', marker='o', alpha=0.7)
-            plt.plot(daily_results['Date'], daily_results['Predicted'], label="Predicted", color="red", linestyle='--', marker='x', alpha=0.7)
-            plt.title(f"Daily Average Actual vs Predicted Temperatures ({city if city else 'All Cities'})")
-            plt.xlabel("Date")
-            plt.ylabel("Temperature (°C)")
-            plt.xticks(rotation=45)
-            plt.legend()
-            plt.grid(True)
-            plt.savefig(graph_path, bbox_inches="tight")
-            plt.close()
-
-            logging.info(f"Graph saved at {graph_path}")
-            return {
-                "model": model,
-                "predictions": predictions,
-                "mse": mse,
-                "r2": r2,
-                "actual_vs_predicted": list(zip(y_test, predictions)),
-                "graph_path": graph_path
-            }
-        except Exception as e:
-            logging.error(f"Error training predictive model: {e}")
-            raise
-
-if __name__ == "__main__":
-    file_name = r"C:\Users\msong\OneDrive\Documents\cs3270\weather_analysis_project\weather_data.csv"
-    analysis = WeatherAnalysisImproved(file_name)
-
-    try:
-        # Fetch data
-        analysis.fetch_data()
-
-        # Preprocessing steps
-        analysis.remove_outliers()
-        analysis.add_features()
-
-        # Analyze the data
-        analysis.find_extreme_weather()
-        analysis.summarize_by_location()
-        stats = analysis.calculate_statistics()
-        print("Temperature Statistics:", stats)
-
-        # Train a predictive model
-        city = "Chicago"
-        results = analysis.train_predictive_model(
-            target_column="Temperature_C",
-            feature_columns=["Humidity_pct", "Precipitation_mm", "Wind_Speed_kmh", 
-                             "Location_Encoded", "month", "season", 
-                             "temp_lag_1", "temp_lag_7", "humidity_precip_interaction"],
-            city=city
-        )
-
-        # Print results
-        print(f"Model Evaluation for {city}:")
-        print(f"Mean Squared Error (MSE): {results['mse']}")
-        print(f"R-squared (R²): {results['r2']}")
-        print("Actual vs Predicted:")
-        for actual, predicted in results["actual_vs_predicted"][:10]:
-            print(f"Actual: {actual:.2f}, Predicted: {predicted:.2f}")
-
-        print(f"Graph saved at: {results['graph_path']}")
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
+import pandas as pd
+import numpy as np
+import logging
+import threading
+from data_fetcher import DataFetcher, parse_date_times, frame_memory, source_files, concat_frames
+from streaming import RunningStats, ValueHistogram, GroupAggregates, ColumnSketch
+from frame_cache import FrameCache, DEFAULT_CACHE_DIR
+from rendering import (chart_renderer, daily_avg_figure, temperature_histogram_figure,
+                       actual_vs_predicted_figure)
+from rollups import RollupStore
+from ingest import TailReader, Watermarks, LocationCodes, LOCATION_CODES_FILE
+from anomalies import GROUP_KEYS, compute_bounds, flag_anomalies, StreamingAnomalyDetector
+from instrumentation import configure_logging, instrumented, stage, timed_iter, format_stage_report
+from features import (LAGS, WINDOWS, add_time_series_features, extend_time_series_features,
+                      lag_columns, window_columns)
+
+# scikit-learn, training and model_registry are imported inside the methods that use them,
+# so loading data and computing statistics never pays for them (see test_import_time.py)
+
+# Log file and level are shared with module.py (see instrumentation.configure_logging)
+configure_logging()
+
+def clean_weather_frame(data):
+    """Parse Date_Time and drop rows missing essential data."""
+    # DataFetcher already parses Date_Time; frames from elsewhere may still hold strings
+    if not pd.api.types.is_datetime64_any_dtype(data['Date_Time']):
+        data['Date_Time'] = parse_date_times(data['Date_Time'])
+
+    # Drop rows with missing essential data
+    return data.dropna(subset=['Temperature_C', 'Date_Time'])
+
+def add_time_columns(data):
+    """Add month, season and Date derived from Date_Time, in place."""
+    month = data['Date_Time'].dt.month.astype('int8')
+    data['month'] = month
+    data['season'] = (month % 12 + 3) // 3  # 1=Winter, 2=Spring, etc. (stays int8)
+    data['Date'] = data['Date_Time'].dt.normalize()
+    return data
+
+class WeatherAnalysis:
+    def __init__(self, file_path, location_codes_path=LOCATION_CODES_FILE):
+        # A CSV file, a directory of CSVs or a glob such as "data/*/2024-*.csv"
+        self.file_path = file_path
+        # Rows appended by refresh() that are not concatenated onto the frame yet; see _append
+        self._chunks = []
+        self._chunks_lock = threading.Lock()
+        self.data = None
+        # Location_Encoded codes, kept in location_codes_path (if given) so they are stable across runs
+        self.location_encoding = LocationCodes(location_codes_path)
+        # Byte offsets of what fetch_data/refresh have read, for incremental refreshes
+        self._tail = None
+        # Bounds from the last detect_anomalies and the keys they are grouped by; refresh() flags new rows with them
+        self.anomaly_bounds = None
+        self.anomaly_by = GROUP_KEYS
+        # Whether the last refresh() reloaded the whole source because a file was rewritten
+        self.reloaded = False
+
+    @property
+    def data(self):
+        with self._chunks_lock:
+            if self._chunks:
+                # One copy of the history for every refresh since the last read
+                self._data = concat_frames([self._data, *self._chunks])
+                self._chunks = []
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        # Any new frame invalidates the memoized aggregates
+        with self._chunks_lock:
+            self._data = value
+            self._chunks = []
+        self._aggregates = {}
+
+    @instrumented()
+    def fetch_data(self, use_cache=False, cache_dir=DEFAULT_CACHE_DIR, max_workers=None):
+        """
+        Fetches and cleans the data from the CSV file, or from every file of a partitioned source.
+
+        With use_cache, the cleaned frame is stored in (and on later runs
+        memory-mapped from) a columnar cache keyed by the files' contents.
+        max_workers caps the files parsed in parallel (default: all cores).
+        """
+        try:
+            if source_files(self.file_path):
+                # Remember where the file ends now; rows appended later are left for refresh()
+                tail = TailReader(self.file_path)
+                tail.skip_existing()
+                self._tail = tail
+
+                if use_cache:
+                    frame_cache = FrameCache(cache_dir)
+                    cached = frame_cache.load(self.file_path)
+                    if cached is not None:
+                        self.data = cached
+                        self.data['Location_Encoded'] = self.location_encoding.encode(self.data['Location'])
+                        logging.info(f"Data loaded from frame cache for {self.file_path}")
+                        return
+
+                with stage('fetch_data.read_csv') as record:
+                    fetcher = DataFetcher(self.file_path, max_workers=max_workers)
+                    self.data = fetcher.csv_pandas()
+                    record.rows = len(self.data)
+
+                with stage('fetch_data.clean') as record:
+                    self.data = clean_weather_frame(self.data)
+                    record.rows = len(self.data)
+
+                # Encode categorical 'Location' column as numeric values
+                with stage('fetch_data.encode', rows=len(self.data)):
+                    # Without saved codes these match sklearn's LabelEncoder (positions in the sorted names)
+                    self.data['Location_Encoded'] = self.location_encoding.encode(self.data['Location'])
+
+                self.precompute()
+
+                if use_cache:
+                    self.data = self.data.reset_index(drop=True)
+                    frame_cache.store(self.file_path, self.data)
+
+                logging.info(f"Data fetched and cleaned successfully from {self.file_path}: "
+                             f"{len(self.data)} rows in {frame_memory(self.data) / 2**20:.1f} MiB")
+            else:
+                raise FileNotFoundError(f"No CSV files match {self.file_path}.")
+        except Exception as e:
+            logging.error(f"Error fetching data: {e}")
+            raise
+
+    @instrumented()
+    def precompute(self):
+        """Add all derived time columns in one vectorized pass and reset memoized aggregates."""
+        add_time_columns(self.data)
+        self._aggregates = {}
+
+    def _memoized(self, name, compute):
+        """Compute an aggregate once per frame and reuse it afterwards."""
+        if name not in self._aggregates:
+            with stage(f'aggregate.{name}', rows=len(self.data)):
+                self._aggregates[name] = compute()
+        return self._aggregates[name]
+
+    def rollups(self):
+        """Hourly, daily and monthly rollups per location, built once per frame."""
+        return self._memoized('rollups', lambda: RollupStore.from_frame(self.data))
+
+    def location_summary(self):
+        """Average temperature and precipitation per location, indexed by Location."""
+        return self._memoized('location_summary', lambda: self.rollups().by_location().rename(
+            columns={'Temperature_C_mean': 'avg_temp', 'Precipitation_mm_mean': 'avg_precip'}
+        )[['avg_temp', 'avg_precip']])
+
+    def temperature_sketch(self):
+        """Running temperature stats and histogram; refresh() updates it with new rows only."""
+        return self._memoized('temperature_sketch', lambda: ColumnSketch('Temperature_C').update(self.data))
+
+    def extreme_days(self):
+        """Return the (hottest, coldest) rows."""
+        running = self.temperature_sketch().stats
+        if not running.count:
+            raise ValueError("No temperature readings")
+        return running.max_row, running.min_row
+
+    def location_codes(self):
+        """Location name -> Location_Encoded."""
+        return dict(self.location_encoding.codes)
+
+    def watermarks(self):
+        """Per-location high-water mark on Date_Time; refresh() skips rows at or before it."""
+        return self._memoized('watermarks', lambda: Watermarks.from_frame(self.data))
+
+    def daily_averages(self):
+        """Average temperature and precipitation per calendar day, read from the daily rollup."""
+        return self._memoized('daily_averages', lambda: self.rollups().query('daily').rename(
+            columns={'Temperature_C_mean': 'avg_temp', 'Precipitation_mm_mean': 'avg_precip'}
+        )[['avg_temp', 'avg_precip']].rename_axis('Date'))
+
+    @instrumented(rows=lambda args, new_rows: len(new_rows))
+    def refresh(self):
+        """
+        Append the rows written to the CSV since fetch_data (or the last refresh).
+
+        Only the new bytes are parsed, and rows at or before their location's
+        latest Date_Time are skipped as duplicates or late arrivals. Rollups,
+        extremes, statistics and watermarks are updated from the new rows alone.
+        Returns the rows that were appended. If nothing was loaded yet or a
+        file was rewritten rather than appended to, the whole source is
+        reloaded, every row counts as new and self.reloaded is set.
+        """
+        try:
+            self.reloaded = self._data is None or self._tail is None or bool(self._tail.replaced())
+            if self.reloaded:
+                self.fetch_data()
+                return self.data
+            new_rows, read = self._read_new_rows()
+            self._append(new_rows)
+            self._commit(read)
+            logging.info(f"Refreshed {self.file_path}: {len(new_rows)} new rows")
+            return new_rows
+        except Exception as e:
+            logging.error(f"Error refreshing data: {e}")
+            raise
+
+    def _read_new_rows(self):
+        """
+        Parse, clean and encode what was appended to the file, without touching self.data.
+
+        Returns (new_rows, read); pass read to _commit once the rows are stored,
+        so rows whose load fails are read again by the next refresh.
+        """
+        with stage('refresh.read_csv') as record:
+            frames, read = [], []
+            for file_path, frame, state in self._tail.iter_new():
+                frames.append(frame)
+                read.append((file_path, state))
+            new_rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            record.rows = len(new_rows)
+        if new_rows.empty:
+            return self._data.iloc[:0], read
+
+        with stage('refresh.clean') as record:
+            new_rows = self.watermarks().select_new(clean_weather_frame(new_rows)).copy()
+            record.rows = len(new_rows)
+
+        with stage('refresh.encode', rows=len(new_rows)):
+            # Known cities keep their code; new ones are numbered after the existing codes
+            new_rows['Location_Encoded'] = self.location_encoding.encode(new_rows['Location'])
+            add_time_columns(new_rows)
+
+        if self.anomaly_bounds is not None and 'is_anomaly' in self._data:
+            with stage('refresh.flag_anomalies', rows=len(new_rows)):
+                new_rows = new_rows.join(flag_anomalies(new_rows, self.anomaly_bounds, self.anomaly_by))
+        return new_rows, read
+
+    def _commit(self, read):
+        """Advance the tail offsets past rows returned by _read_new_rows."""
+        for file_path, state in read:
+            self._tail.commit(file_path, state)
+
+    def _append(self, new_rows):
+        """
+        Queue rows for self.data, carrying the incrementally updatable aggregates over.
+
+        The rows are only concatenated onto the frame when self.data is next
+        read, so a run of refreshes copies the history once rather than once
+        per refresh.
+        """
+        kept = {name: self._aggregates[name]
+                for name in ('rollups', 'temperature_sketch', 'watermarks')
+                if name in self._aggregates}
+        if new_rows.empty:
+            return
+
+        if isinstance(self._data['Location'].dtype, pd.CategoricalDtype):
+            # Keep Location categorical; concat_frames unions the categories when the chunks are joined
+            new_rows = new_rows.assign(Location=new_rows['Location'].astype(str).astype('category'))
+        with self._chunks_lock:
+            # Label the rows with the positions they take once concatenated
+            start = len(self._data) + sum(len(chunk) for chunk in self._chunks)
+            new_rows = new_rows.set_axis(pd.RangeIndex(start, start + len(new_rows)))
+            self._chunks.append(new_rows)
+        if 'rollups' in kept:
+            kept['rollups'].update(new_rows)
+        if 'temperature_sketch' in kept:
+            kept['temperature_sketch'].update(new_rows)
+        if 'watermarks' in kept:
+            kept['watermarks'].advance(new_rows)
+        # The remaining aggregates are cheap to rebuild from the rollups
+        self._aggregates = kept
+
+    @instrumented()
+    def print_temperatures(self, limit=10):
+        """Print a limited number of temperature records."""
+        try:
+            for i, temp in enumerate(self.data['Temperature_C'][:limit]):
+                print(f"Temperature {i + 1}: {temp:.2f}°C")
+            logging.info("Printed temperature records successfully.")
+        except Exception as e:
+            logging.error(f"Error printing temperatures: {e}")
+            raise
+
+    @instrumented()
+    def calculate_statistics(self):
+        """Calculate and return statistics for the temperature data."""
+        try:
+            sketch = self.temperature_sketch()
+            if sketch.exact and sketch.stats.count:
+                # Kept up to date by refresh(), so appended rows do not cost a full pass
+                running = sketch.stats
+                values = (running.mean, sketch.histogram.median(), sketch.histogram.mode(),
+                          running.max - running.min)
+            else:
+                temp_data = self.data['Temperature_C']
+                values = (temp_data.mean(), temp_data.median(), temp_data.mode()[0],
+                          temp_data.max() - temp_data.min())
+            stats = {
+                name: round(float(value), 2)
+                for name, value in zip(['mean_temp', 'median_temp', 'mode_temp', 'range_temp'], values)
+            }
+            logging.info("Statistics calculated successfully.")
+            return stats
+        except Exception as e:
+            logging.error(f"Error calculating statistics: {e}")
+            return {}
+
+    @instrumented()
+    def find_extreme_weather(self):
+        """Identify the hottest and coldest days in the dataset."""
+        try:
+            hottest_day, coldest_day = self.extreme_days()
+            print(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']:.2f}°C")
+            print(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']:.2f}°C")
+            logging.info(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']:.2f}°C")
+            logging.info(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']:.2f}°C")
+        except Exception as e:
+            logging.error(f"Error finding extreme weather: {e}")
+            raise
+
+    @instrumented()
+    def plot_daily_avg_temp_and_precip(self, save_path="static/daily_avg_temp_precip.png", wait=True):
+        """
+        Plot daily average temperature and precipitation.
+
+        Rendering happens on the shared chart_renderer pool and is skipped when
+        the daily averages are unchanged. Returns the render Future; with
+        wait=True it has already completed.
+        """
+        try:
+            daily_data = self.daily_averages()
+            future = chart_renderer.submit(daily_avg_figure, daily_data, save_path)
+            if wait:
+                future.result()
+                logging.info(f"Saved daily average temperature and precipitation plot to {save_path}")
+            return future
+        except Exception as e:
+            logging.error(f"Error plotting daily avg temp and precip: {e}")
+            raise
+
+    @instrumented()
+    def plot_temperature_distribution(self, save_path="static/temperature_distribution.png", wait=True):
+        """Plot temperature distribution as a histogram (rendered like plot_daily_avg_temp_and_precip)."""
+        try:
+            histogram = np.histogram(self.data['Temperature_C'], bins=20)
+            future = chart_renderer.submit(temperature_histogram_figure, histogram, save_path)
+            if wait:
+                future.result()
+                logging.info(f"Saved temperature distribution plot to {save_path}")
+            return future
+        except Exception as e:
+            logging.error(f"Error plotting temperature distribution: {e}")
+
+    @instrumented()
+    def summarize_by_location(self):
+        """Print a summary of average temperature and precipitation for each location."""
+        try:
+            summary = self.location_summary().reset_index()
+            print("Location-wise Weather Summary:")
+            print(summary)
+            logging.info("Location-based summary generated successfully.")
+        except Exception as e:
+            logging.error(f"Error summarizing by location: {e}")
+            raise
+
+    @instrumented()
+    def detect_anomalies(self, columns=None, method='iqr', k=None, by=GROUP_KEYS):
+        """
+        Flag readings outside robust per-location, per-month bounds.
+
+        Bounds come from one grouped pass over every measurement column (see
+        anomalies.py). Adds <column>_anomaly and is_anomaly columns to the data
+        instead of removing rows, and returns those flags.
+        """
+        try:
+            self.anomaly_bounds = compute_bounds(self.data, columns, by, method, k)
+            self.anomaly_by = tuple(by)
+            flags = flag_anomalies(self.data, self.anomaly_bounds, by)
+            for name in flags.columns:
+                self.data[name] = flags[name]
+            logging.info(f"Flagged {int(flags['is_anomaly'].sum())} anomalous rows.")
+            return flags
+        except Exception as e:
+            logging.error(f"Error detecting anomalies: {e}")
+            raise
+
+    @instrumented(rows=lambda args, results: results['row_count'])
+    def stream_anomalies(self, chunk_size=100000, columns=None, method='iqr', k=None, resolution=0.01):
+        """
+        detect_anomalies for files larger than memory, in two chunked passes.
+
+        The first pass builds per-group histograms, the second flags each chunk
+        against the resulting bounds. Returns the flagged rows (with their flag
+        columns), the bounds and the number of rows read.
+        """
+        try:
+            if not source_files(self.file_path):
+                raise FileNotFoundError(f"No CSV files match {self.file_path}.")
+
+            detector = StreamingAnomalyDetector(columns, method=method, k=k, resolution=resolution)
+            fetcher = DataFetcher(self.file_path)
+            for chunk in timed_iter('stream_anomalies.bounds', fetcher.csv_chunks(chunk_size)):
+                detector.update(clean_weather_frame(chunk))
+
+            anomalies = []
+            row_count = 0
+            for chunk in timed_iter('stream_anomalies.flag', fetcher.csv_chunks(chunk_size)):
+                chunk = clean_weather_frame(chunk)
+                row_count += len(chunk)
+                flags = detector.flag(chunk)
+                anomalies.append(chunk.join(flags)[flags['is_anomaly']])
+
+            results = {
+                'anomalies': concat_frames(anomalies) if anomalies else pd.DataFrame(),
+                'bounds': detector.bounds(),
+                'row_count': row_count,
+            }
+            logging.info(f"Streamed anomaly detection: {len(results['anomalies'])} of {row_count} rows flagged")
+            return results
+        except Exception as e:
+            logging.error(f"Error streaming anomaly detection: {e}")
+            raise
+
+    @instrumented(rows=lambda args, results: results['row_count'])
+    def stream_analysis(self, chunk_size=100000, resolution=0.01):
+        """
+        Compute statistics, the location summary and extreme days chunk by chunk.
+
+        Memory stays bounded by chunk_size, so this works on files larger than
+        RAM. Results match calculate_statistics, summarize_by_location and
+        find_extreme_weather, except that median and mode come from a histogram
+        with the given resolution.
+        """
+        try:
+            if not source_files(self.file_path):
+                raise FileNotFoundError(f"No CSV files match {self.file_path}.")
+
+            temp_stats = RunningStats('Temperature_C')
+            temp_histogram = ValueHistogram(resolution)
+            by_location = GroupAggregates('Location', ['Temperature_C', 'Precipitation_mm'])
+
+            fetcher = DataFetcher(self.file_path)
+            for chunk in timed_iter('stream_analysis.read_csv', fetcher.csv_chunks(chunk_size)):
+                chunk = clean_weather_frame(chunk)
+                temp_stats.update(chunk)
+                temp_histogram.update(chunk['Temperature_C'])
+                by_location.update(chunk)
+
+            if not temp_stats.count:
+                raise ValueError(f"No usable temperature data in {self.file_path}")
+
+            summary = by_location.means().rename(
+                columns={'Temperature_C': 'avg_temp', 'Precipitation_mm': 'avg_precip'}
+            ).rename_axis('Location').reset_index()
+            results = {
+                'stats': {
+                    'mean_temp': round(float(temp_stats.mean), 2),
+                    'median_temp': round(float(temp_histogram.median()), 2),
+                    'mode_temp': round(float(temp_histogram.mode()), 2),
+                    'range_temp': round(float(temp_stats.max - temp_stats.min), 2),
+                },
+                'summary': summary,
+                'hottest_day': temp_stats.max_row,
+                'coldest_day': temp_stats.min_row,
+                'row_count': temp_stats.count,
+            }
+            logging.info(f"Streamed analysis of {temp_stats.count} rows from {self.file_path}")
+            return results
+        except Exception as e:
+            logging.error(f"Error streaming analysis: {e}")
+            raise
+
+    @instrumented()
+    def save_summary(self, output_path="weather_summary.txt"):
+        """Save summary statistics to a text file."""
+        try:
+            with open(output_path, 'w') as f:
+                hottest_day, coldest_day = self.extreme_days()
+                f.write(f"Hottest Day: {hottest_day['Date_Time']} with {hottest_day['Temperature_C']}°C\n")
+                f.write(f"Coldest Day: {coldest_day['Date_Time']} with {coldest_day['Temperature_C']}°C\n")
+                f.write("\nSummary by Location:\n")
+                summary = self.location_summary()
+                f.write(summary.to_string())
+                print(f"Summary saved to {output_path}")
+                logging.info("Summary saved successfully.")
+        except Exception as e:
+            logging.error(f"Error saving summary: {e}")
+            raise
+
+class WeatherAnalysisImproved(WeatherAnalysis):
+    @instrumented()
+    def remove_outliers(self, columns=None, method='iqr', k=None):
+        """Remove the rows detect_anomalies flags (per location and month, every measurement column)."""
+        try:
+            flags = self.detect_anomalies(columns, method, k)
+            self.data = self.data[~flags['is_anomaly']].drop(columns=list(flags.columns))
+            logging.info(f"Outliers removed successfully: {int(flags['is_anomaly'].sum())} rows.")
+        except Exception as e:
+            logging.error(f"Error removing outliers: {e}")
+            raise
+
+    @instrumented()
+    def add_features(self, lags=LAGS, windows=WINDOWS):
+        """Add per-city lagged, rolling-window and interaction features."""
+        try:
+            data = add_time_series_features(self.data, lags, windows)
+
+            # Drop only the rows without enough per-city history for the new features
+            self.data = data.dropna(subset=lag_columns(lags) + window_columns(windows))
+            logging.info("Lagged and interaction features added successfully.")
+        except Exception as e:
+            logging.error(f"Error adding features: {e}")
+            raise
+
+    @instrumented(rows=lambda args, extended: len(extended))
+    def extend_features(self, new_rows, lags=LAGS, windows=WINDOWS):
+        """
+        Append newly arrived rows, computing their features from recent history only.
+
+        new_rows must carry the same base columns as self.data and be later
+        than the existing readings for their city.
+        """
+        try:
+            extended = extend_time_series_features(self.data, new_rows, lags, windows)
+            extended = extended.dropna(subset=lag_columns(lags) + window_columns(windows))
+            self._append(extended)
+            logging.info(f"Features extended with {len(extended)} new rows.")
+            return extended
+        except Exception as e:
+            logging.error(f"Error extending features: {e}")
+            raise
+
+    @instrumented(rows=lambda args, new_rows: len(new_rows))
+    def refresh(self, lags=LAGS, windows=WINDOWS):
+        """Like WeatherAnalysis.refresh, also computing features for the new rows once add_features has run."""
+        try:
+            if (self._data is None or self._tail is None or self._tail.replaced()
+                    or not set(lag_columns(lags)) <= set(self._data.columns)):
+                return super().refresh()
+            self.reloaded = False
+            new_rows, read = self._read_new_rows()
+            if not new_rows.empty:
+                new_rows = self.extend_features(new_rows, lags, windows)
+            self._commit(read)
+            return new_rows
+        except Exception as e:
+            logging.error(f"Error refreshing data: {e}")
+            raise
+
+    @instrumented()
+    def train_predictive_model(self, target_column, feature_columns, city=None, graph_path="static/actual_vs_predicted_rf.png",
+                               registry=None, tune=False, prune_features=None, tune_options=None):
+        """
+        Train a Random Forest model and plot Actual vs Predicted values.
+
+        If a ModelRegistry is given, the fitted model is saved under the city
+        name (or "all") for the web app to serve.
+
+        With tune=True the hyperparameters are searched with training.tune_model
+        (tune_options are passed through) on the earliest 80% of the data, and
+        the latest 20% is held out for evaluation. prune_features keeps only that
+        many features, chosen by RFE.
+        """
+        from sklearn.model_selection import train_test_split
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.metrics import mean_squared_error, r2_score
+        from training import tune_model, build_pipeline, selected_features
+        from model_registry import frame_digest
+
+        try:
+            if city:
+                city_data = self.data[self.data['Location'] == city]
+                if city_data.empty:
+                    raise ValueError(f"No data available for the city: {city}")
+            else:
+                city_data = self.data
+
+            # Ensure required columns exist
+            if target_column not in city_data.columns or not all(col in city_data.columns for col in feature_columns):
+                raise ValueError("Missing required columns in the dataset.")
+
+            tuning = None
+            if tune:
+                # Time-ordered split so validation never sees the future
+                city_data = city_data.sort_values('Date_Time', kind='mergesort')
+
+            # Prepare data
+            X = city_data[feature_columns]
+            y = city_data[target_column]
+
+            if tune:
+                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+                with stage('train_predictive_model.tune', rows=len(X_train)):
+                    model, tuning = tune_model(X_train, y_train, prune_features=prune_features,
+                                               **(tune_options or {}))
+            else:
+                # Train-test split
+                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+                # Train the model (Random Forest)
+                if prune_features:
+                    model = build_pipeline(prune_features=prune_features)
+                else:
+                    model = RandomForestRegressor(n_estimators=100, random_state=42)
+                with stage('train_predictive_model.fit', rows=len(X_train)):
+                    model.fit(X_train, y_train)
+
+            # Make predictions
+            predictions = model.predict(X_test)
+
+            # Evaluate the model
+            mse = mean_squared_error(y_test, predictions)
+            r2 = r2_score(y_test, predictions)
+
+            # Align dates with test data
+            test_indices = X_test.index
+            test_dates = city_data.loc[test_indices, 'Date_Time']
+
+            # Create a results DataFrame for daily averages
+            results_df = pd.DataFrame({
+                'Date': test_dates.dt.normalize(),
+                'Actual': y_test.values,
+                'Predicted': predictions
+            })
+            daily_results = results_df.groupby('Date').mean().reset_index()
+
+            # Plot daily averages
+            title = f"Daily Average Actual vs Predicted Temperatures ({city if city else 'All Cities'})"
+            chart_renderer.submit(actual_vs_predicted_figure, daily_results, graph_path, title).result()
+
+            logging.info(f"Graph saved at {graph_path}")
+            if registry is not None:
+                registry.save(city or "all", model, feature_columns,
+                              frame_digest(city_data[list(feature_columns) + [target_column]]),
+                              {'mse': mse, 'r2': r2})
+            return {
+                "model": model,
+                "predictions": predictions,
+                "mse": mse,
+                "r2": r2,
+                "actual_vs_predicted": list(zip(y_test, predictions)),
+                "graph_path": graph_path,
+                "tuning": tuning,
+                "selected_features": (selected_features(model, feature_columns)
+                                      if hasattr(model, 'named_steps') else list(feature_columns)),
+            }
+        except Exception as e:
+            logging.error(f"Error training predictive model: {e}")
+            raise
+
+    @instrumented()
+    def train_models_by_city(self, target_column, feature_columns, cities=None, max_workers=None,
+                             return_models=False, model_params=None, registry=None):
+        """
+        Train one Random Forest per city across a process pool; see training.train_city_models.
+
+        If a ModelRegistry is given, every city's model is saved to it; cities
+        whose training failed keep their {'error', 'n_rows'} result and are not saved.
+        """
+        from training import train_city_models
+        from model_registry import frame_digest
+
+        try:
+            results = train_city_models(self.data, target_column, feature_columns, cities=cities,
+                                        max_workers=max_workers,
+                                        return_models=return_models or registry is not None,
+                                        model_params=model_params)
+            if registry is not None:
+                columns = list(feature_columns) + [target_column]
+                for city, result in results.items():
+                    if 'error' in result:
+                        continue
+                    city_data = self.data.loc[self.data['Location'] == city, columns]
+                    registry.save(city, result['model'], feature_columns, frame_digest(city_data),
+                                  {'mse': result['mse'], 'r2': result['r2']})
+                    if not return_models:
+                        del result['model']
+            trained = sum('error' not in result for result in results.values())
+            logging.info(f"Trained {trained} of {len(results)} city models.")
+            return results
+        except Exception as e:
+            logging.error(f"Error training city models: {e}")
+            raise
+
+if __name__ == "__main__":
+    file_name = r"C:\Users\msong\OneDrive\Documents\cs3270\weather_analysis_project\weather_data.csv"
+    analysis = WeatherAnalysisImproved(file_name)
+
+    try:
+        # Fetch data
+        analysis.fetch_data()
+
+        # Preprocessing steps
+        analysis.remove_outliers()
+        analysis.add_features()
+
+        # Analyze the data
+        analysis.find_extreme_weather()
+        analysis.summarize_by_location()
+        stats = analysis.calculate_statistics()
+        print("Temperature Statistics:", stats)
+
+        # Train a predictive model
+        city = "Chicago"
+        results = analysis.train_predictive_model(
+            target_column="Temperature_C",
+            feature_columns=["Humidity_pct", "Precipitation_mm", "Wind_Speed_kmh", 
+                             "Location_Encoded", "month", "season", 
+                             "temp_lag_1", "temp_lag_7", "temp_mean_24h", "temp_mean_7D",
+                             "humidity_precip_interaction"],
+            city=city
+        )
+
+        # Print results
+        print(f"Model Evaluation for {city}:")
+        print(f"Mean Squared Error (MSE): {results['mse']}")
+        print(f"R-squared (R²): {results['r2']}")
+        print("Actual vs Predicted:")
+        for actual, predicted in results["actual_vs_predicted"][:10]:
+            print(f"Actual: {actual:.2f}, Predicted: {predicted:.2f}")
+
+        print(f"Graph saved at: {results['graph_path']}")
+
+        # Where the time went (set WEATHER_PROFILE_DIR for per-stage profiles)
+        print(format_stage_report())
+
+    except Exception as e:
+        print(f"An error occurred: {e}")